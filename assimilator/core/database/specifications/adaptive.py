@@ -50,7 +50,7 @@ class CompositeAdaptiveFilter(AdaptiveFilter):
 
     def __call__(self, query, repository, **context):
         first = self._parse_specification(filter_spec=self.first, repository=repository)
-        second = self._parse_specification(filter_spec=self.first, repository=repository)
+        second = self._parse_specification(filter_spec=self.second, repository=repository)
         return self.func(first, second)(query=query, repository=repository, **context)
 
 
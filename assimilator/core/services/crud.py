@@ -48,6 +48,9 @@ class CRUDService(Service):
     def get(self, *filters, lazy: bool = False, **kwargs_filters) -> ModelT | LazyCommand[ModelT]:
         return self.uow.repository.get(self._specs.filter(*filters, **kwargs_filters), lazy=lazy)
 
+    def count(self, *filters, lazy: bool = False, **kwargs_filters) -> int | LazyCommand[int]:
+        return self.uow.repository.count(self._specs.filter(*filters, **kwargs_filters), lazy=lazy)
+
     def delete(self, *filters, **kwargs_filters) -> None:
         with self.uow:
             obj = self.get(*filters, **kwargs_filters)
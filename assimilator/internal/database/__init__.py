@@ -3,3 +3,11 @@ from assimilator.internal.database.unit_of_work import *
 from assimilator.internal.database.specifications.specifications import *
 from assimilator.internal.database.specifications.internal_operator import *
 from assimilator.internal.database.specifications.filter_specifications import *
+from assimilator.internal.database.session import *
+from assimilator.internal.database.indexes import *
+from assimilator.internal.database.concurrency import *
+from assimilator.internal.database.persistence import *
+from assimilator.internal.database.cache import *
+from assimilator.internal.database.shared import *
+from assimilator.internal.database.views import *
+from assimilator.internal.database.parallel import *
@@ -0,0 +1,252 @@
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta
+from functools import cache
+from itertools import islice
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel as PydanticBaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+from assimilator.core.database import SpecificationType
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.models_utils import build_model
+from assimilator.internal.database.session import SessionValues
+
+
+def _is_model_field(field: ModelField) -> bool:
+    """Returns True if the field stores foreign models or lists of them. They are saved as structs."""
+    return (
+        field.shape in (SHAPE_SINGLETON, SHAPE_LIST)
+        and isinstance(field.type_, type)
+        and issubclass(field.type_, PydanticBaseModel)
+    )
+
+
+_ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bytes: pa.binary(),
+    datetime: pa.timestamp("us"),
+    date: pa.date32(),
+    time: pa.time64("us"),
+    timedelta: pa.duration("us"),
+}
+
+
+@cache
+def _get_foreign_fields(model: type[BaseModel]) -> list[tuple[str, type[BaseModel], bool]]:
+    """Returns the names of the fields with the foreign models, their types and whether they are lists."""
+    return [
+        (field_name, field.type_, field.shape == SHAPE_LIST)
+        for field_name, field in model.__fields__.items()
+        if _is_model_field(field)
+    ]
+
+
+def construct_model(model: type[BaseModel], values: dict) -> BaseModel:
+    """
+    Creates the model from the values of the row without validation. Missing fields get their default values,
+    and foreign models are created from the structs in the same way.
+    """
+    fields_set = set(values)
+
+    if len(values) != len(model.__fields__):
+        for field_name, field in model.__fields__.items():
+            if field_name not in values:
+                values[field_name] = field.get_default()
+
+    for field_name, foreign_model, is_list in _get_foreign_fields(model):
+        value = values[field_name]
+
+        if value is None:
+            continue
+        elif is_list:
+            values[field_name] = [construct_model(foreign_model, dict(member)) for member in value]
+        elif isinstance(value, dict):
+            values[field_name] = construct_model(foreign_model, value)
+
+    built_model = build_model(model=model, values=values, fields_set=fields_set)
+
+    if issubclass(model, BaseModel) and values["id"] is None and model.AssimilatorConfig.autogenerate_id:
+        values["id"] = built_model.generate_id(**values)  # values are the __dict__ of the model
+        built_model.__fields_set__.add("id")
+
+    return built_model
+
+
+def _read_batches(path: str, model: type[BaseModel], batch_size: int) -> Iterator[list[dict]]:
+    parquet_file = pq.ParquetFile(path)
+    # Columns are read in the order of the fields, so the models look the same as the validated ones
+    columns = [field for field in model.__fields__ if field in parquet_file.schema_arrow.names]
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pylist()
+
+
+def load_from_parquet(repository, path: str, validate: bool = False, batch_size: int = 65_536) -> int:
+    """
+    Reads the models from the Parquet file and saves them to the session of the InternalRepository.
+    Rows are read in batches that are converted to Python by Arrow. If validate is False, the models are created
+    without pydantic validation, so only use it with the files that were written from valid models.
+    Columns that are not the fields of the model are not read. Returns the number of loaded models.
+    """
+    model = repository.model
+    session = repository.session
+    loaded = 0
+
+    for rows in _read_batches(path=path, model=model, batch_size=batch_size):
+        if validate:
+            models = [model(**row) for row in rows]
+        else:
+            models = [construct_model(model=model, values=row) for row in rows]
+
+        session.update({loaded_model.id: loaded_model for loaded_model in models})
+        loaded += len(models)
+
+    return loaded
+
+
+def _to_column_value(value: Any) -> Any:
+    if isinstance(value, PydanticBaseModel):
+        return value.dict()
+    elif isinstance(value, list):
+        return [_to_column_value(member) for member in value]
+
+    return value
+
+
+def _get_arrow_type(field: ModelField) -> pa.DataType | None:
+    """Returns the Arrow type of the field, or None if the type must be found from the values."""
+    if field.shape not in (SHAPE_SINGLETON, SHAPE_LIST) or not isinstance(field.type_, type):
+        return None
+
+    if issubclass(field.type_, PydanticBaseModel):
+        arrow_fields = []
+
+        for field_name, foreign_field in field.type_.__fields__.items():
+            arrow_type = _get_arrow_type(foreign_field)
+            if arrow_type is None:
+                return None
+
+            arrow_fields.append(pa.field(field_name, arrow_type))
+
+        arrow_type = pa.struct(arrow_fields)
+    else:
+        arrow_type = next(
+            (arrow_type for python_type, arrow_type in _ARROW_TYPES.items() if issubclass(field.type_, python_type)),
+            None,
+        )
+
+    if arrow_type is None or field.shape == SHAPE_SINGLETON:
+        return arrow_type
+
+    return pa.list_(arrow_type)
+
+
+def _has_null_type(arrow_type: pa.DataType) -> bool:
+    """Checks if Arrow could not find the type of the column or of its members, because all of them were None."""
+    if pa.types.is_null(arrow_type):
+        return True
+    elif pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return _has_null_type(arrow_type.value_type)
+    elif pa.types.is_struct(arrow_type):
+        return any(_has_null_type(arrow_type.field(position).type) for position in range(arrow_type.num_fields))
+
+    return False
+
+
+def _create_schema(model: type[BaseModel], table: pa.Table) -> pa.Schema:
+    """
+    Creates the schema of the file from the first batch. Columns where all the values are None or empty lists
+    get the types of the fields of the model instead, so the next batches with the values can be written.
+    """
+    arrow_fields = []
+
+    for arrow_field in table.schema:
+        if _has_null_type(arrow_field.type):
+            arrow_type = _get_arrow_type(model.__fields__[arrow_field.name])
+
+            if arrow_type is not None:
+                arrow_field = pa.field(arrow_field.name, arrow_type)
+
+        arrow_fields.append(arrow_field)
+
+    return pa.schema(arrow_fields)
+
+
+def _create_batch(models: list[BaseModel], fields: list[str], model_fields: set[str]) -> dict[str, list]:
+    """Creates the columns from the values of the models. Only the foreign models are converted to dicts."""
+    columns = {}
+
+    for field in fields:
+        if field in model_fields:
+            columns[field] = [_to_column_value(model.__dict__[field]) for model in models]
+        else:
+            columns[field] = [model.__dict__[field] for model in models]
+
+    return columns
+
+
+def dump_to_parquet(
+    repository,
+    path: str,
+    *specifications: SpecificationType,
+    batch_size: int = 65_536,
+    **writer_options,
+) -> int:
+    """
+    Writes the models of the InternalRepository that are found with the specifications to the Parquet file.
+    Every field is written as a column, and the schema is found from the first batch of the models. Columns
+    that only have None values in the first batch use the types of the fields, if they can be found from them.
+    Fields in AssimilatorConfig.exclude are not written. Returns the number of written models.
+    """
+    model = repository.model
+    excluded_fields = set(getattr(model.AssimilatorConfig, "exclude", None) or ())
+    fields = [field for field in model.__fields__ if field not in excluded_fields]
+    model_fields = {field for field in fields if _is_model_field(model.__fields__[field])}
+
+    models: Iterable[BaseModel] = repository._apply_specifications(
+        query=SessionValues(repository.session),
+        specifications=specifications,
+    )
+    models = iter(models)
+    writer = None
+    written = 0
+
+    try:
+        while True:
+            batch = list(islice(models, batch_size))
+            if not batch and writer is not None:
+                break
+
+            columns = _create_batch(models=batch, fields=fields, model_fields=model_fields)
+
+            if writer is None:
+                table = pa.Table.from_pydict(columns)
+                schema = _create_schema(model=model, table=table)
+                table = table.cast(schema)
+                writer = pq.ParquetWriter(path, schema, **writer_options)
+            else:
+                table = pa.Table.from_pydict(columns, schema=writer.schema)
+
+            writer.write_table(table)
+            written += len(batch)
+
+            if len(batch) < batch_size:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return written
+
+
+__all__ = [
+    "construct_model",
+    "dump_to_parquet",
+    "load_from_parquet",
+]
@@ -0,0 +1,375 @@
+import heapq
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Hashable, Iterable
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.session import InternalSession
+
+
+class EvictionPolicy(ABC):
+    """Chooses the key that is removed from the full CacheSession."""
+
+    @abstractmethod
+    def add(self, key: Hashable) -> None:
+        raise NotImplementedError("add() is not implemented in the eviction policy")
+
+    @abstractmethod
+    def touch(self, key: Hashable) -> None:
+        """Called when the model is read or saved again."""
+        raise NotImplementedError("touch() is not implemented in the eviction policy")
+
+    @abstractmethod
+    def remove(self, key: Hashable) -> None:
+        raise NotImplementedError("remove() is not implemented in the eviction policy")
+
+    @abstractmethod
+    def get_victim(self) -> Hashable:
+        raise NotImplementedError("get_victim() is not implemented in the eviction policy")
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError("clear() is not implemented in the eviction policy")
+
+
+class LRUPolicy(EvictionPolicy):
+    """Removes the key that was not used for the longest time."""
+
+    def __init__(self):
+        self._keys: OrderedDict[Hashable, None] = OrderedDict()
+
+    def add(self, key: Hashable) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+    def touch(self, key: Hashable) -> None:
+        self._keys.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        self._keys.pop(key, None)
+
+    def get_victim(self) -> Hashable:
+        return next(iter(self._keys))
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Removes the key that was used the least number of times. If there are many of them,
+    the one that was not used for the longest time is removed.
+    """
+
+    def __init__(self):
+        self._frequencies: dict[Hashable, int] = {}
+        self._buckets: dict[int, dict[Hashable, None]] = {}  # keys with the same frequency in the order of use
+        self._min_frequency = 0
+
+    def _move(self, key: Hashable, frequency: int) -> None:
+        self._frequencies[key] = frequency
+        self._buckets.setdefault(frequency, {})[key] = None
+
+    def _forget(self, key: Hashable) -> int:
+        frequency = self._frequencies.pop(key)
+        bucket = self._buckets[frequency]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[frequency]
+
+        return frequency
+
+    def add(self, key: Hashable) -> None:
+        if key in self._frequencies:
+            self.touch(key)
+            return
+
+        self._move(key, frequency=1)
+        self._min_frequency = 1
+
+    def touch(self, key: Hashable) -> None:
+        frequency = self._forget(key)
+        self._move(key, frequency=frequency + 1)
+
+        if frequency == self._min_frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+
+    def remove(self, key: Hashable) -> None:
+        if key in self._frequencies:
+            self._forget(key)
+
+    def get_victim(self) -> Hashable:
+        if self._min_frequency not in self._buckets:  # keys with the lowest frequency were removed
+            self._min_frequency = min(self._buckets)
+
+        return next(iter(self._buckets[self._min_frequency]))
+
+    def clear(self) -> None:
+        self._frequencies.clear()
+        self._buckets.clear()
+        self._min_frequency = 0
+
+
+def get_model_size(model: BaseModel) -> int:
+    """Returns the approximate number of bytes that the model and the values of its fields use."""
+    values = model.__dict__
+    return sys.getsizeof(model) + sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values.values())
+
+
+class CacheSession(InternalSession):
+    """
+    InternalSession with a limited size. When the session is full, the models are removed with the eviction
+    policy. Models also expire after expire_in seconds or expire_in_px milliseconds, the same as RedisModel,
+    or after default_ttl seconds. The session counts the hits, misses, evictions and expirations of the keys.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_memory: int | None = None,
+        eviction_policy: EvictionPolicy | None = None,
+        default_ttl: float | None = None,
+        get_size: Callable[[BaseModel], int] = get_model_size,
+    ):
+        """
+        :param max_entries: maximum number of the models in the session.
+        :param max_memory: maximum number of bytes that the models use. get_size() is used to find it.
+        :param eviction_policy: policy that chooses the removed models. LRUPolicy() by default.
+        :param default_ttl: number of seconds after which the models without expire_in are removed.
+        :param get_size: function that returns the size of the model in bytes.
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_memory = max_memory
+        self.eviction_policy = eviction_policy or LRUPolicy()
+        self.default_ttl = default_ttl
+        self.get_size = get_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.memory_usage = 0
+
+        self._sizes: dict[Hashable, int] = {}
+        self._deadlines: dict[Hashable, float] = {}
+        self._expiration_queue: list[tuple[float, int, Hashable]] = []  # heap of the deadlines
+        self._expiration_counter = 0  # keys may not be comparable, so the counter is compared instead of them
+
+    def _get_ttl(self, model: BaseModel) -> float | None:
+        expire_in = getattr(model, "expire_in", None)
+        if expire_in is not None:
+            return expire_in
+
+        expire_in_px = getattr(model, "expire_in_px", None)
+        if expire_in_px is not None:
+            return expire_in_px / 1000
+
+        return self.default_ttl
+
+    def _is_expired(self, key: Hashable) -> bool:
+        deadline = self._deadlines.get(key)
+        return deadline is not None and deadline <= time.monotonic()
+
+    def _expire(self, key: Hashable) -> None:
+        self.expirations += 1
+        self._remove(key)
+
+    def remove_expired(self) -> None:
+        """Removes all the expired models. It is called before we iterate over the models or search them."""
+        queue, now = self._expiration_queue, time.monotonic()
+
+        while queue and queue[0][0] <= now:
+            deadline, _, key = heapq.heappop(queue)
+
+            if self._deadlines.get(key) == deadline:  # key could be saved again with another deadline
+                self._expire(key)
+
+    def _evict(self, size: int) -> None:
+        while super().__len__() and (
+            (self.max_entries is not None and super().__len__() >= self.max_entries)
+            or (self.max_memory is not None and self.memory_usage + size > self.max_memory)
+        ):
+            self.evictions += 1
+            self._remove(self.eviction_policy.get_victim())
+
+    def _remove(self, key: Hashable) -> None:
+        super().__delitem__(key)
+        self.eviction_policy.remove(key)
+        self.memory_usage -= self._sizes.pop(key, 0)
+        self._deadlines.pop(key, None)
+
+    def find_candidates(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        self.remove_expired()
+        return super().find_candidates(*filter_funcs)
+
+    def find_matches(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        self.remove_expired()
+        return super().find_matches(*filter_funcs)
+
+    def find_sorted_keys(self, field: str, reverse: bool = False) -> Iterable[Hashable] | None:
+        self.remove_expired()
+        return super().find_sorted_keys(field, reverse)
+
+    def values(self):
+        self.remove_expired()
+        return super().values()
+
+    def items(self):
+        self.remove_expired()
+        return super().items()
+
+    def keys(self):
+        self.remove_expired()
+        return super().keys()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        if not super().__contains__(key) or self._is_expired(key):
+            return super().pop(key, *default)
+
+        model = super().__getitem__(key)
+        self._remove(key)
+        return model
+
+    def popitem(self):
+        self.remove_expired()
+
+        if not super().__len__():
+            raise KeyError("popitem(): cache session is empty")
+
+        key = self.eviction_policy.get_victim()
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if not self.contains_key(key):
+            self[key] = default
+
+        return super().__getitem__(key)
+
+    def clear(self):
+        super().clear()
+        self.eviction_policy.clear()
+        self._sizes.clear()
+        self._deadlines.clear()
+        self._expiration_queue.clear()
+        self.memory_usage = 0
+
+    def __getitem__(self, key) -> BaseModel:
+        if self._is_expired(key):
+            self._expire(key)
+
+        try:
+            model = super().__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+
+        self.hits += 1
+        self.eviction_policy.touch(key)
+        return model
+
+    def __setitem__(self, key, model: BaseModel):
+        size = self.get_size(model) if self.max_memory is not None else 0
+
+        if super().__contains__(key):
+            self.memory_usage -= self._sizes.pop(key, 0)
+            self.eviction_policy.remove(key)
+            self._deadlines.pop(key, None)
+        else:
+            self.remove_expired()
+            self._evict(size)
+
+        super().__setitem__(key, model)
+        self.eviction_policy.add(key)
+
+        if size:
+            self._sizes[key] = size
+            self.memory_usage += size
+
+        ttl = self._get_ttl(model)
+        if ttl is not None:
+            deadline = self._deadlines[key] = time.monotonic() + ttl
+            self._expiration_counter += 1
+            heapq.heappush(self._expiration_queue, (deadline, self._expiration_counter, key))
+
+        if len(self._expiration_queue) > 2 * len(self._deadlines) + 1024:  # old deadlines of the saved keys
+            self._expiration_queue = [
+                (deadline, counter, key)
+                for deadline, counter, key in self._expiration_queue
+                if self._deadlines.get(key) == deadline
+            ]
+            heapq.heapify(self._expiration_queue)
+
+    def __delitem__(self, key):
+        if not super().__contains__(key) or self._is_expired(key):
+            if super().__contains__(key):
+                self._expire(key)
+
+            raise KeyError(key)
+
+        self._remove(key)
+
+    def contains_key(self, key) -> bool:
+        """
+        Checks the key without counting it as a hit or a miss. Transactions and other internal code use it,
+        so only the access by the key from the repository changes the counters.
+        """
+        if self._is_expired(key):
+            self._expire(key)
+
+        return super().__contains__(key)
+
+    def __contains__(self, key) -> bool:
+        """Checks the key as the access by the key, so both the hits and the misses are counted."""
+        if not self.contains_key(key):
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        self.eviction_policy.touch(key)
+        return True
+
+    def get_models(self, keys: Iterable[Hashable]) -> list[BaseModel]:
+        """
+        Loads the found models without counting them. The keys requested with the filters are counted when
+        the repository checks them with `in`, and the models found with other filters are not counted at all.
+        """
+        get_model = super().__getitem__
+        return [get_model(key) for key in keys if self.contains_key(key)]
+
+    def __iter__(self):
+        self.remove_expired()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self.remove_expired()
+        return super().__len__()
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self),
+            "memory_usage": self.memory_usage,
+        }
+
+
+__all__ = [
+    "CacheSession",
+    "EvictionPolicy",
+    "LFUPolicy",
+    "LRUPolicy",
+    "get_model_size",
+]
@@ -0,0 +1,256 @@
+import operator
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator, MutableMapping, ValuesView
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel as PydanticBaseModel
+from pydantic.fields import SHAPE_SINGLETON, ModelField
+
+from assimilator.core.database.models import BaseModel
+
+_NUMPY_TYPES = {
+    int: np.int64,
+    float: np.float64,
+    bool: np.bool_,
+}
+_MASK_OPERATIONS = {
+    operator.eq: operator.eq,
+    operator.is_: operator.eq,  # is_ is checked by the filter again, so eq gives us the candidates
+    operator.gt: operator.gt,
+    operator.ge: operator.ge,
+    operator.lt: operator.lt,
+    operator.le: operator.le,
+}
+_EXACT_OPERATIONS = (operator.eq, operator.gt, operator.ge, operator.lt, operator.le)
+
+
+class ColumnarKeys(Collection):
+    """Keys of the rows found with a mask. len() is the number of rows, so we do not create the list of keys."""
+
+    def __init__(self, session: "ColumnarSession", rows: np.ndarray):
+        self.session = session
+        self.rows = rows
+
+    def __iter__(self) -> Iterator[Hashable]:
+        keys = self.session._keys
+        return (keys[row] for row in self.rows.tolist())
+
+    def __contains__(self, key: Hashable) -> bool:
+        row = self.session._rows.get(key)
+        return row is not None and bool(np.any(self.rows == row))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class ColumnarValues(ValuesView):
+    chunk_size = 1024
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        session = self._mapping
+
+        for start in range(0, len(session), self.chunk_size):
+            yield from session.load_rows(slice(start, min(start + self.chunk_size, len(session))))
+
+
+class ColumnarSession(MutableMapping):
+    """
+    Session that stores every field of the models in a separate NumPy array, and the key of the model
+    in a dictionary with the row numbers. Filters on scalar fields are evaluated as vectorized masks,
+    and the models are only created for the rows that we return.
+    """
+
+    def __init__(self, model: type[BaseModel], capacity: int = 1024):
+        self.model = model
+        self._capacity = capacity
+        self._keys: list[Hashable] = []
+        self._rows: dict[Hashable, int] = {}
+        self._columns: dict[str, np.ndarray] = {}
+        self._scalar_fields: set[str] = set()
+
+        for name, field in model.__fields__.items():
+            self._columns[name] = np.empty(capacity, dtype=self._get_dtype(field))
+
+            if self._is_scalar(field):
+                self._scalar_fields.add(name)
+
+    @staticmethod
+    def _is_scalar(field: ModelField) -> bool:
+        if field.shape != SHAPE_SINGLETON or not isinstance(field.type_, type):
+            return False
+
+        return not issubclass(field.type_, (PydanticBaseModel, list, set, tuple, dict))
+
+    def _get_dtype(self, field: ModelField):
+        if field.allow_none or not self._is_scalar(field):
+            return object
+
+        return _NUMPY_TYPES.get(field.type_, object)
+
+    def _grow(self) -> None:
+        self._capacity = max(self._capacity * 2, 1)
+
+        for name, column in self._columns.items():
+            grown_column = np.empty(self._capacity, dtype=column.dtype)
+            grown_column[: len(column)] = column
+            self._columns[name] = grown_column
+
+    def _write_value(self, name: str, row: int, value: Any) -> None:
+        column = self._columns[name]
+
+        try:
+            column[row] = value
+        except (TypeError, ValueError, OverflowError):  # value does not fit the type of the column
+            self._columns[name] = column = column.astype(object)
+            column[row] = value
+
+    def load_rows(self, rows: slice | np.ndarray) -> Iterator[BaseModel]:
+        """
+        Creates the models from the rows. We convert whole columns with tolist(), because
+        reading the values of NumPy arrays one by one is really slow.
+        """
+        names = list(self._columns)
+        columns = [self._columns[name][rows].tolist() for name in names]
+        construct = self.model.construct  # values were validated when the model was saved
+
+        for values in zip(*columns):
+            yield construct(**dict(zip(names, values)))
+
+    def get_models(self, keys: Iterable[Hashable]) -> Iterator[BaseModel]:
+        if isinstance(keys, ColumnarKeys):
+            return self.load_rows(keys.rows)
+
+        rows = self._rows
+        return self.load_rows(np.fromiter((rows[key] for key in keys), dtype=np.intp))
+
+    def find_candidates(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the rows that satisfy all the filters that can be vectorized.
+        None is returned if none of the filters can be vectorized.
+        """
+        mask = None
+
+        for filter_func in filter_funcs:
+            filter_mask = self._get_mask(filter_func)
+
+            if filter_mask is not None:
+                mask = filter_mask if mask is None else mask & filter_mask
+
+        if mask is None:
+            return None
+
+        return ColumnarKeys(session=self, rows=np.flatnonzero(mask))
+
+    def find_matches(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the rows that satisfy all the filters if every filter can be vectorized exactly.
+        The number of the found keys is the sum of the mask, so count() does not create any models.
+        """
+        if not filter_funcs:
+            return None
+
+        for filter_func in filter_funcs:
+            if getattr(filter_func, "operation", None) not in _EXACT_OPERATIONS:
+                return None
+
+        mask = None
+
+        for filter_func in filter_funcs:
+            filter_mask = self._get_mask(filter_func)
+            if filter_mask is None:
+                return None
+
+            mask = filter_mask if mask is None else mask & filter_mask
+
+        return ColumnarKeys(session=self, rows=np.flatnonzero(mask))
+
+    def _get_mask(self, filter_func: Callable[[BaseModel], bool]) -> np.ndarray | None:
+        field = getattr(filter_func, "field", None)
+        compare = _MASK_OPERATIONS.get(getattr(filter_func, "operation", None))
+
+        if field not in self._scalar_fields or compare is None:
+            return None
+
+        value = filter_func.value
+        if isinstance(value, (list, set, tuple, dict, np.ndarray)):
+            return None
+
+        try:
+            mask = np.asarray(compare(self._columns[field][: len(self._keys)], value), dtype=bool)
+        except (TypeError, ValueError, OverflowError):  # values cannot be compared, so the filter checks them
+            return None
+
+        return mask if mask.shape == (len(self._keys),) else None
+
+    def find_sorted_keys(self, field: str, reverse: bool = False) -> Iterable[Hashable] | None:
+        """
+        Sorts the keys by the column with a stable argsort(). The reverse order sorts the reversed column,
+        so the rows with equal values keep their order, the same way as sorted(reverse=True).
+        """
+        if field not in self._scalar_fields:
+            return None
+
+        column = self._columns[field][: len(self._keys)]
+
+        try:
+            if reverse:
+                rows = (len(column) - 1 - np.argsort(column[::-1], kind="stable"))[::-1]
+            else:
+                rows = np.argsort(column, kind="stable")
+        except TypeError:  # None values cannot be sorted
+            return None
+
+        keys = self._keys
+        return (keys[row] for row in rows.tolist())
+
+    def values(self) -> ColumnarValues:
+        return ColumnarValues(self)
+
+    def __getitem__(self, key: Hashable) -> BaseModel:
+        return next(self.load_rows(slice(self._rows[key], self._rows[key] + 1)))
+
+    def __setitem__(self, key: Hashable, model: BaseModel) -> None:
+        row = self._rows.get(key)
+
+        if row is None:
+            row = len(self._keys)
+            if row == self._capacity:
+                self._grow()
+
+            self._keys.append(key)
+            self._rows[key] = row
+
+        for name in self._columns:
+            self._write_value(name=name, row=row, value=getattr(model, name))
+
+    def __delitem__(self, key: Hashable) -> None:
+        row = self._rows.pop(key)
+        last_row = len(self._keys) - 1
+
+        if row != last_row:  # the last row takes the place of the deleted one
+            for column in self._columns.values():
+                column[row] = column[last_row]
+
+            moved_key = self._keys[last_row]
+            self._keys[row] = moved_key
+            self._rows[moved_key] = row
+
+        self._keys.pop()
+
+        for column in self._columns.values():
+            if column.dtype == object:
+                column[last_row] = None  # we do not want to keep the deleted objects in memory
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+__all__ = [
+    "ColumnarSession",
+]
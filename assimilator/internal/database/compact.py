@@ -0,0 +1,120 @@
+import operator
+from collections.abc import Callable, Hashable, ItemsView, Iterable, Iterator, ValuesView
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.models_utils import build_model
+from assimilator.internal.database.session import InternalSession
+from assimilator.internal.database.specifications.internal_operator import conjunction
+
+
+def create_row_type(model: type[BaseModel]) -> type:
+    """
+    Creates the class that stores the values of the model in __slots__. Rows do not have
+    __dict__, __fields_set__ and the validation of the model, so they use much less memory.
+    """
+    fields = tuple(model.__fields__)
+
+    def __init__(self, model_values: dict, fields_set: frozenset | None):
+        for field in fields:
+            setattr(self, field, model_values[field])
+
+        self._fields_set = fields_set
+
+    get_values = operator.attrgetter(*fields)
+
+    if len(fields) == 1:
+
+        def to_dict(self) -> dict:
+            return {fields[0]: get_values(self)}
+
+    else:
+
+        def to_dict(self) -> dict:
+            return dict(zip(fields, get_values(self)))
+
+    return type(
+        f"{model.__name__}Row",
+        (),
+        # Names of the fields cannot start with "_", so they never conflict with our attributes
+        {"__slots__": (*fields, "_fields_set"), "__init__": __init__, "_to_dict": to_dict, "_fields": fields},
+    )
+
+
+class CompactSession(InternalSession):
+    """
+    InternalSession that stores the models of one type as rows with __slots__ and creates the models again
+    when we read them. Filters and indexes that use the fields of the models are checked on the rows,
+    so the models are only created for the results. Models of other types are stored as they are,
+    and so are the models with private attributes, because rows cannot keep them.
+    """
+
+    def __init__(self, model: type[BaseModel], *args, **kwargs):
+        self.model = model
+        self.row_type = create_row_type(model)
+        self.stores_rows = not getattr(model, "__private_attributes__", None)
+        self._fields_sets: dict[frozenset, frozenset] = {}  # most of the rows share the same set of fields
+        super().__init__()
+        self.update(*args, **kwargs)
+
+    def _to_row(self, model: BaseModel):
+        if type(model) is not self.model or not self.stores_rows:
+            return model
+
+        fields_set = None
+        if len(model.__fields_set__) != len(self.row_type._fields):
+            fields_set = frozenset(model.__fields_set__)
+            fields_set = self._fields_sets.setdefault(fields_set, fields_set)
+
+        return self.row_type(model.__dict__, fields_set)
+
+    def _to_model(self, row) -> BaseModel:
+        if type(row) is not self.row_type:
+            return row
+
+        return build_model(model=self.model, values=row._to_dict(), fields_set=row._fields_set)
+
+    def get_models(self, keys: Iterable[Hashable]) -> list[BaseModel]:
+        get_row = super().__getitem__
+        return [self._to_model(get_row(key)) for key in keys]
+
+    def filter_rows(self, *filter_funcs: Callable[[BaseModel], bool]) -> Iterator[BaseModel] | None:
+        """
+        Checks the filters on the rows and creates the models that satisfy them. None is returned if some
+        of the filters are not created with the fields of the model, because they may need the model itself.
+        """
+        if not filter_funcs or not all(hasattr(filter_func, "field") for filter_func in filter_funcs):
+            return None
+
+        predicate = conjunction(*filter_funcs)
+        return (self._to_model(row) for row in super().values() if predicate(row))
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+    def popitem(self):
+        key, row = super().popitem()
+        return key, self._to_model(row)
+
+    def __getitem__(self, key) -> BaseModel:
+        return self._to_model(super().__getitem__(key))
+
+    def __setitem__(self, key, model: BaseModel):
+        super().__setitem__(key, self._to_row(model))
+
+
+__all__ = [
+    "CompactSession",
+    "create_row_type",
+]
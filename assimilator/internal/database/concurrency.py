@@ -0,0 +1,183 @@
+import threading
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator
+from contextlib import contextmanager
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.indexes import Index
+from assimilator.internal.database.session import InternalSession
+from assimilator.internal.database.views import MaterializedView
+
+
+class ReadWriteLock:
+    """
+    Lock that allows many threads to read at the same time, while the writers get exclusive access.
+    Waiting writers are preferred, so the readers cannot starve them. The thread that writes
+    can enter the lock again to read or write, but readers must not enter the lock twice.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer: int | None = None
+        self._writes = 0  # how many times the writer entered the lock
+
+    @contextmanager
+    def read(self):
+        thread = threading.get_ident()
+
+        with self._condition:
+            if self._writer == thread:  # writer can read what it writes
+                reading = False
+            else:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+
+                self._readers += 1
+                reading = True
+
+        try:
+            yield
+        finally:
+            if reading:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        thread = threading.get_ident()
+
+        with self._condition:
+            if self._writer != thread:
+                self._waiting_writers += 1
+
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._waiting_writers -= 1
+
+                self._writer = thread
+
+            self._writes += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writes -= 1
+
+                if not self._writes:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class ConcurrentSession(InternalSession):
+    """
+    InternalSession that can be shared by many threads. The changes are made with the write lock,
+    and the readers get snapshots of the session, so they can iterate over the models while
+    other threads change it. The snapshot of the models is reused until the next change, so
+    many readers do not copy the session again.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.lock = ReadWriteLock()
+        self._snapshot: tuple | None = None
+        super().__init__(*args, **kwargs)
+
+    def _get_snapshot(self) -> tuple:
+        snapshot = self._snapshot
+
+        if snapshot is None:
+            with self.lock.read():
+                snapshot = self._snapshot = tuple(super().values())
+
+        return snapshot
+
+    def add_index(self, index: Index) -> Index:
+        with self.lock.write():
+            return super().add_index(index)
+
+    def add_view(self, view: MaterializedView) -> MaterializedView:
+        with self.lock.write():
+            return super().add_view(view)
+
+    def find_candidates(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        with self.lock.read():
+            candidates = super().find_candidates(*filter_funcs)
+            return None if candidates is None else list(candidates)
+
+    def find_matches(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        with self.lock.read():  # keys of the indexes are copied, because other threads change them
+            matches = super().find_matches(*filter_funcs)
+            return None if matches is None else list(matches)
+
+    def find_sorted_keys(self, field: str, reverse: bool = False) -> Iterable[Hashable] | None:
+        with self.lock.read():
+            keys = super().find_sorted_keys(field, reverse)
+            return None if keys is None else list(keys)
+
+    def get_models(self, keys: Iterable[Hashable]) -> list[BaseModel]:
+        """Returns the models with the keys. Models that were deleted by other threads are skipped."""
+        with self.lock.read():
+            models = [self.get(key) for key in keys]
+
+        return [model for model in models if model is not None]
+
+    def values(self) -> tuple:
+        return self._get_snapshot()
+
+    def items(self) -> list:
+        with self.lock.read():
+            return list(super().items())
+
+    def keys(self) -> list:
+        with self.lock.read():
+            return list(super().keys())
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.keys())
+
+    def __setitem__(self, key, model):
+        with self.lock.write():
+            super().__setitem__(key, model)
+            self._snapshot = None
+
+    def __delitem__(self, key):
+        with self.lock.write():
+            super().__delitem__(key)
+            self._snapshot = None
+
+    def pop(self, key, *default):
+        with self.lock.write():
+            return super().pop(key, *default)
+
+    def popitem(self):
+        with self.lock.write():
+            self._snapshot = None
+            return super().popitem()
+
+    def setdefault(self, key, default=None):
+        with self.lock.write():
+            return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        with self.lock.write():
+            super().update(*args, **kwargs)
+
+    def clear(self):
+        with self.lock.write():
+            super().clear()
+            self._snapshot = None
+
+    def copy(self) -> dict:
+        with self.lock.read():
+            return dict(super().items())
+
+
+__all__ = [
+    "ConcurrentSession",
+    "ReadWriteLock",
+]
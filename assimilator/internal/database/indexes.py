@@ -0,0 +1,508 @@
+import math
+import numbers
+import operator
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator
+from decimal import Decimal
+from itertools import count
+from typing import Any
+
+from assimilator.core.database.models import BaseModel
+from assimilator.core.database.specifications.filtering_options import FILTERING_OPTIONS_SEPARATOR
+from assimilator.internal.database.specifications.internal_operator import match_regex
+from assimilator.internal.database.specifications.utils import InternalContainers, find_model_value
+
+try:
+    from re import _parser as regex_parser
+except ImportError:  # Python 3.10 and older
+    import sre_parse as regex_parser
+
+
+def _is_nan(value: Any) -> bool:
+    """NaN is not equal to itself, so it cannot be found with == or with the binary search."""
+    if isinstance(value, Decimal):
+        return value.is_nan()
+
+    return isinstance(value, numbers.Real) and math.isnan(value)
+
+
+class Index(ABC):
+    """
+    Index of the field of the models stored in the session. Indexes only return the keys of the
+    candidates for the filter, so the found models must still be checked with the filter.
+    """
+
+    exact_operations: tuple = ()
+
+    def __init__(self, field: str):
+        self.field = field
+        self._fields = field.split(FILTERING_OPTIONS_SEPARATOR)
+        self._indexed_values: dict[Hashable, tuple] = {}
+        self._unindexed: dict[Hashable, None] = {}  # models that we cannot index. They are always checked
+
+    def get_values(self, model: BaseModel) -> tuple:
+        """
+        Returns the values that the model is indexed by. Fields with foreign models
+        return all the values of the container the same way that find_attribute() checks them.
+        """
+        if len(self._fields) == 1:
+            return (getattr(model, self._fields[0]),)
+
+        model_val = find_model_value(fields=self._fields, model=model)
+        if isinstance(model_val, InternalContainers):
+            return tuple(model_val)
+
+        return (model_val,)
+
+    def add(self, key: Hashable, model: BaseModel) -> None:
+        try:
+            values = self.get_values(model)
+        except AttributeError:
+            values = None
+
+        if values is not None and self._indexed_values.get(key) == values:
+            return  # Model was saved again without changes in the field
+
+        self._discard(key)
+
+        try:
+            if values is None:
+                raise TypeError(f"{model} does not have {self.field}")
+
+            self._insert(key=key, values=values)
+            self._indexed_values[key] = values
+        except TypeError:
+            self._unindexed[key] = None
+
+    def remove(self, key: Hashable) -> None:
+        """Removes the key of the model that was deleted from the session."""
+        self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        self._unindexed.pop(key, None)
+        values = self._indexed_values.pop(key, None)
+
+        if values is not None:
+            self._delete(key=key, values=values)
+
+    def clear(self) -> None:
+        self._indexed_values.clear()
+        self._unindexed.clear()
+
+    def has_values(self, key: Hashable, model: BaseModel) -> bool:
+        """Checks that the key is indexed with the values of the model, so the index does not have to change."""
+        values = self._indexed_values.get(key)
+        if values is None:
+            return False
+
+        try:
+            return self.get_values(model) == values
+        except AttributeError:
+            return False
+
+    @abstractmethod
+    def _insert(self, key: Hashable, values: tuple) -> None:
+        """Adds the key to the index. Raises TypeError if the values cannot be indexed."""
+        raise NotImplementedError("_insert() is not implemented in the index")
+
+    @abstractmethod
+    def _delete(self, key: Hashable, values: tuple) -> None:
+        raise NotImplementedError("_delete() is not implemented in the index")
+
+    @abstractmethod
+    def lookup(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the models that may satisfy the filter, or None if the index
+        cannot be used with that operation.
+        """
+        raise NotImplementedError("lookup() is not implemented in the index")
+
+    def find_matches(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the models that satisfy the filter exactly, so they do not have to be checked again.
+        None is returned if the index cannot find them exactly.
+        """
+        if self._unindexed or operation not in self.exact_operations:
+            return None
+
+        return self.lookup(operation=operation, value=value)
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.field})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class HashIndex(Index):
+    """
+    Maps values of the field to the keys of the models that have them. That allows us to find
+    the models for eq/is filters without checking every model in the session.
+    """
+
+    operations = (operator.eq, operator.is_)
+    exact_operations = (operator.eq,)  # is_ candidates are found with eq, so they must be checked
+
+    def __init__(self, field: str):
+        super().__init__(field=field)
+        self._buckets: dict[Hashable, dict[Hashable, None]] = {}  # dicts are used as ordered sets
+
+    def _insert(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            hash(value)
+
+        for value in values:
+            self._buckets.setdefault(value, {})[key] = None
+
+    def _delete(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            bucket = self._buckets.get(value)
+            if bucket is None:
+                continue
+
+            bucket.pop(key, None)
+            if not bucket:
+                del self._buckets[value]
+
+    def clear(self) -> None:
+        super().clear()
+        self._buckets.clear()
+
+    def lookup(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        if operation not in self.operations:
+            return None
+
+        try:
+            bucket = self._buckets.get(value, {})
+        except TypeError:  # unhashable value cannot be in the index
+            return None
+
+        return [*bucket, *self._unindexed]
+
+    def find_matches(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        if self._unindexed or operation not in self.exact_operations:
+            return None
+
+        try:
+            if _is_nan(value):  # NaN can still be found in the bucket by its identity
+                return None
+
+            return self._buckets.get(value, {}).keys()  # size of the bucket is known without copying it
+        except (TypeError, ValueError):
+            return None
+
+
+class SortedKeyList:
+    """
+    Keys sorted by their values. Keys with equal values keep the order in which they were first added,
+    the same way sorted() keeps the order of the session. Items are stored in small sorted lists, so adding
+    or removing a key only moves the items of one list, and the item of the key is found with a binary search.
+    """
+
+    load = 512  # lists are split when they become twice as large
+
+    def __init__(self):
+        self._lists: list[list[tuple]] = []  # items are (value, order, key) tuples
+        self._maxes: list[tuple] = []  # last item of every list
+        self._orders: dict[Hashable, int] = {}
+        self._counter = count()
+        self._length = 0
+
+    def _locate(self, item: tuple) -> tuple[int, int]:
+        """Returns the list and the position in it where the item must be inserted."""
+        position = bisect_left(self._maxes, item)
+        if position == len(self._maxes):
+            return position, 0
+
+        return position, bisect_left(self._lists[position], item)
+
+    def check(self, value: Any) -> None:
+        """Raises TypeError if the value cannot be compared with the values in the list."""
+        self._locate((value,))
+
+    def add(self, key: Hashable, value: Any) -> None:
+        order = self._orders.get(key)
+        if order is None:
+            order = self._orders[key] = next(self._counter)
+
+        item = (value, order, key)
+
+        if not self._lists:
+            self._lists.append([item])
+            self._maxes.append(item)
+        else:
+            position = bisect_left(self._maxes, item)
+
+            if position == len(self._maxes):
+                position -= 1
+                self._lists[position].append(item)
+                self._maxes[position] = item
+            else:
+                insort(self._lists[position], item)
+
+            self._split(position)
+
+        self._length += 1
+
+    def _split(self, position: int) -> None:
+        items = self._lists[position]
+        if len(items) <= self.load * 2:
+            return
+
+        self._lists.insert(position + 1, items[self.load :])
+        del items[self.load :]
+        self._maxes.insert(position, items[-1])
+
+    def remove(self, key: Hashable, value: Any) -> None:
+        item = (value, self._orders[key], key)
+        position, item_position = self._locate(item)
+
+        if position == len(self._lists) or self._lists[position][item_position] != item:
+            # values that are not equal to themselves cannot be found with the binary search
+            position, item_position = next(
+                (position, item_position)
+                for position, items in enumerate(self._lists)
+                for item_position, found_item in enumerate(items)
+                if found_item[1:] == item[1:]
+            )
+
+        items = self._lists[position]
+        del items[item_position]
+        self._length -= 1
+
+        if items:
+            self._maxes[position] = items[-1]
+        else:
+            del self._lists[position]
+            del self._maxes[position]
+
+    def forget(self, key: Hashable) -> None:
+        """Forgets the order of the removed key, so it is added to the end of equal values next time."""
+        self._orders.pop(key, None)
+
+    def clear(self) -> None:
+        self._lists.clear()
+        self._maxes.clear()
+        self._orders.clear()
+        self._length = 0
+
+    def find_range(self, start: tuple | None = None, end: tuple | None = None) -> Iterator[Hashable]:
+        """
+        Returns the keys of the items that are not less than start and less than end.
+        (value,) is less than all the items with the value, and (value, math.inf) is greater than all of them.
+        """
+        position, item_position = (0, 0) if start is None else self._locate(start)
+        end_position, end_item_position = (len(self._lists), 0) if end is None else self._locate(end)
+
+        while position < end_position or (position == end_position and item_position < end_item_position):
+            items = self._lists[position]
+            stop = end_item_position if position == end_position else len(items)
+
+            for _, _, key in items[item_position:stop]:
+                yield key
+
+            position, item_position = position + 1, 0
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for items in self._lists:
+            for _, _, key in items:
+                yield key
+
+    def __reversed__(self) -> Iterator[Hashable]:
+        """Returns the keys from the largest value to the smallest one. Keys with equal values keep their order."""
+        equal_keys, equal_value = [], None
+
+        for items in reversed(self._lists):
+            for value, _, key in reversed(items):
+                if equal_keys and value != equal_value:
+                    yield from reversed(equal_keys)
+                    equal_keys = []
+
+                equal_keys.append(key)
+                equal_value = value
+
+        yield from reversed(equal_keys)
+
+    def __len__(self) -> int:
+        return self._length
+
+
+class SortedIndex(Index):
+    """
+    Keeps the values of the field in a sorted list, so range filters(gt, gte, lt, lte) and eq
+    are found with a binary search. It can also be used to iterate over the models in the sorted order.
+    None values and values that cannot be compared with the rest are not indexed.
+    """
+
+    operations = (operator.eq, operator.gt, operator.ge, operator.lt, operator.le)
+    exact_operations = operations
+
+    def __init__(self, field: str):
+        super().__init__(field=field)
+        self._items = SortedKeyList()
+        self._multiple_values = 0  # number of models that are indexed with more than one value
+
+    def _insert(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            if value is None or _is_nan(value):
+                raise TypeError("None and NaN values cannot be sorted")
+
+            self._items.check(value)  # raises TypeError if values are not comparable
+
+        for value in values:
+            self._items.add(key=key, value=value)
+
+        if len(values) != 1:
+            self._multiple_values += 1
+
+    def _delete(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            self._items.remove(key=key, value=value)
+
+        if len(values) != 1:
+            self._multiple_values -= 1
+
+    def remove(self, key: Hashable) -> None:
+        super().remove(key)
+        self._items.forget(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self._items.clear()
+        self._multiple_values = 0
+
+    @staticmethod
+    def _find_range(operation: Callable, value: Any) -> tuple[tuple | None, tuple | None]:
+        if operation is operator.eq:
+            return (value,), (value, math.inf)
+        elif operation is operator.gt:
+            return (value, math.inf), None
+        elif operation is operator.ge:
+            return (value,), None
+        elif operation is operator.lt:
+            return None, (value,)
+
+        return None, (value, math.inf)
+
+    def lookup(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        if operation not in self.operations or value is None:
+            return None
+
+        try:
+            if _is_nan(value):
+                return None
+
+            keys = list(self._items.find_range(*self._find_range(operation=operation, value=value)))
+        except TypeError:  # value cannot be compared with the indexed values
+            return None
+
+        if self._multiple_values:
+            keys = list(dict.fromkeys(keys))
+
+        keys.extend(self._unindexed)
+        return keys
+
+    def sorted_keys(self, reverse: bool = False) -> Iterable[Hashable] | None:
+        """
+        Returns the keys of all the models sorted by the field, or None if some of the models
+        cannot be sorted with the index. Models with equal values keep the order of the session.
+        """
+        if self._unindexed or self._multiple_values:
+            return None
+
+        return reversed(self._items) if reverse else iter(self._items)
+
+
+def get_trigrams(text: str) -> set[str]:
+    return {text[position : position + 3] for position in range(len(text) - 2)}
+
+
+def find_required_literals(pattern: re.Pattern) -> list[str]:
+    """
+    Returns the parts of the regex that every matched string must contain. We only read the literal characters
+    that are not inside of groups, alternatives or repetitions, so some of the required text may be missed.
+    """
+    parsed_pattern = regex_parser.parse(pattern.pattern, pattern.flags)
+    if parsed_pattern.state.flags & re.IGNORECASE:
+        return []
+
+    literals, current_literal = [], []
+
+    for opcode, argument in parsed_pattern:
+        if opcode is regex_parser.LITERAL:
+            current_literal.append(chr(argument))
+            continue
+        elif opcode is regex_parser.AT:  # ^ and $ do not consume any characters
+            continue
+
+        literals.append("".join(current_literal))
+        current_literal = []
+
+    literals.append("".join(current_literal))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex(Index):
+    """
+    Maps every three characters of the text fields to the keys of the models that contain them.
+    like and regex filters find the models that contain all the trigrams from the literal text of the pattern,
+    and the pattern is checked on them later. Values that are not strings are not indexed.
+    """
+
+    operations = (match_regex,)
+
+    def __init__(self, field: str):
+        super().__init__(field=field)
+        self._postings: dict[str, dict[Hashable, None]] = {}
+
+    def _insert(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            if not isinstance(value, str):
+                raise TypeError("Only strings can be indexed with trigrams")
+
+        for value in values:
+            for trigram in get_trigrams(value):
+                self._postings.setdefault(trigram, {})[key] = None
+
+    def _delete(self, key: Hashable, values: tuple) -> None:
+        for value in values:
+            for trigram in get_trigrams(value):
+                postings = self._postings.get(trigram)
+                if postings is None:
+                    continue
+
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[trigram]
+
+    def clear(self) -> None:
+        super().clear()
+        self._postings.clear()
+
+    def lookup(self, operation: Callable, value: Any) -> Collection[Hashable] | None:
+        if operation not in self.operations or not isinstance(value, re.Pattern) or not isinstance(value.pattern, str):
+            return None
+
+        trigrams = set()
+        for literal in find_required_literals(value):
+            trigrams.update(get_trigrams(literal))
+
+        if not trigrams:  # pattern does not have enough text, so every model may match it
+            return None
+
+        postings = sorted((self._postings.get(trigram, {}) for trigram in trigrams), key=len)
+        keys = [key for key in postings[0] if all(key in other_postings for other_postings in postings[1:])]
+
+        keys.extend(self._unindexed)
+        return keys
+
+
+__all__ = [
+    "HashIndex",
+    "Index",
+    "SortedIndex",
+    "SortedKeyList",
+    "TrigramIndex",
+]
@@ -1,3 +1,5 @@
+from collections.abc import Set as AbstractSet
+
 from pydantic import BaseModel as PydanticBaseModel
 
 from assimilator.core.database.models import BaseModel
@@ -26,3 +28,14 @@ def dict_to_internal_models(data: dict, model: type[BaseModel]) -> dict:
             data[field_name] = field_type(**value)
 
     return data
+
+
+def build_model(model: type[BaseModel], values: dict, fields_set: AbstractSet[str] | None = None) -> BaseModel:
+    """
+    Creates the model from the values without validation, the same way that pickle does it.
+    Only use it with the values that were taken from a valid model of the same type.
+    """
+    built_model = model.__new__(model)
+    object.__setattr__(built_model, "__dict__", values)
+    object.__setattr__(built_model, "__fields_set__", set(values if fields_set is None else fields_set))
+    return built_model
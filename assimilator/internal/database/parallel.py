@@ -0,0 +1,192 @@
+import gc
+import heapq
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.session import InternalSession
+from assimilator.internal.database.specifications.internal_operator import conjunction
+from assimilator.internal.database.specifications.specifications import _get_sorting_key
+
+_scan_lock = threading.Lock()
+_scan_state: tuple | None = None  # models and the filters of the scan in the worker process
+
+
+def _start_worker(scan_state: tuple) -> None:
+    """
+    Runs in the worker process when it is forked. The pool keeps the state until it is joined, so the workers
+    that the pool forks again to replace the stopped ones get the same state. Forked processes inherit
+    the arguments, so the models are not pickled.
+    """
+    global _scan_state
+    _scan_state = scan_state
+
+
+def _scan_partition(bounds: tuple[int, int]) -> list[int]:
+    """
+    Runs in the worker process. Checks the models from start to end and returns the positions of the found
+    models. Sorted scans return the positions in the order of the sorting key.
+    """
+    models, predicate, sorting_key, reverse, limit = _scan_state
+    start, end = bounds
+
+    if predicate is None:
+        positions = range(start, end)
+    else:
+        positions = [position for position in range(start, end) if predicate(models[position])]
+
+    if sorting_key is None:
+        return list(positions)
+
+    def get_key(position: int):
+        return sorting_key(models[position])
+
+    if limit is None:
+        return sorted(positions, key=get_key, reverse=reverse)
+
+    find_first = heapq.nlargest if reverse else heapq.nsmallest
+    return find_first(limit, positions, key=get_key)
+
+
+class ParallelQuery:
+    """
+    Models of ParallelSession that satisfy the filters. The session is only scanned when we iterate over
+    the models, count them, or sort them, so internal_order() and internal_paginate() are done in the workers.
+    """
+
+    def __init__(self, session: "ParallelSession", predicate: Callable[[BaseModel], bool]):
+        self.session = session
+        self.predicate = predicate
+        self._models: list[BaseModel] | None = None
+
+    def sort_models(self, clauses: tuple[str, ...], limit: int | None = None) -> list[BaseModel]:
+        return self.session.scan_sorted(clauses=clauses, limit=limit, predicate=self.predicate)
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        # list() calls len() after iter(), so we check the found models when the iteration starts
+        if self._models is None:  # internal_paginate() may only need the first models
+            yield from self.session.scan(predicate=self.predicate)
+        else:
+            yield from self._models
+
+    def __len__(self) -> int:
+        if self._models is None:
+            self._models = list(self.session.scan(predicate=self.predicate))
+
+        return len(self._models)
+
+
+class ParallelSession(InternalSession):
+    """
+    InternalSession that checks the filters in many processes when the session is large.
+    The workers are forked for every scan, so they read the models of the session without copying
+    or pickling them, and only the positions of the found models are sent back. Results of the workers are
+    merged in the order of the session, or with the sorting key when the models are ordered.
+
+    Filters are functions that cannot be pickled, so the workers cannot be reused for the next scan. Every scan
+    pays for forking the pool, which takes milliseconds, so min_size must keep the small sessions in one process.
+    Forking a process that runs other threads is unsafe: the workers only get the thread that forked them,
+    and the locks held by the other threads are never released in the workers. Do not use the session in
+    multithreaded processes if the filters or the models use the locks, for example logging in the validators.
+
+    Forked processes are not available on Windows, so the session is scanned in one process there.
+    Indexes of the session are used before the parallel scan.
+    """
+
+    def __init__(self, *args, processes: int | None = None, min_size: int = 100_000, **kwargs):
+        """
+        :param processes: number of the worker processes. Number of the CPUs by default.
+        :param min_size: number of the models after which the session is scanned in parallel.
+        """
+        super().__init__(*args, **kwargs)
+        self.processes = processes or os.cpu_count() or 1
+        self.min_size = min_size
+
+    def is_parallel(self) -> bool:
+        return self.processes > 1 and len(self) >= self.min_size and "fork" in multiprocessing.get_all_start_methods()
+
+    def _run(
+        self,
+        models: list[BaseModel],
+        predicate: Callable[[BaseModel], bool] | None,
+        sorting_key: Callable | None = None,
+        reverse: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[list[int]]:
+        """
+        Splits the models between the workers and returns the results of every part in the order of the models.
+        Workers are stopped when we stop reading the results, so the first found models are returned faster.
+        """
+        parts = self.processes * 4  # small parts keep all the workers busy if some parts have more results
+        part_size = -(-len(models) // parts) or 1
+        bounds = [(start, min(start + part_size, len(models))) for start in range(0, len(models), part_size)]
+        scan_state = (models, predicate, sorting_key, reverse, limit)
+
+        with _scan_lock:
+            gc.freeze()  # garbage collector of the workers must not copy the memory of the models
+
+            try:
+                pool = multiprocessing.get_context("fork").Pool(
+                    processes=self.processes, initializer=_start_worker, initargs=(scan_state,)
+                )
+            finally:
+                gc.unfreeze()
+
+        try:
+            yield from pool.imap(_scan_partition, bounds)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def scan(self, predicate: Callable[[BaseModel], bool]) -> Iterator[BaseModel]:
+        models = list(super().values())
+
+        for positions in self._run(models=models, predicate=predicate):
+            for position in positions:
+                yield models[position]
+
+    def scan_sorted(
+        self,
+        clauses: tuple[str, ...],
+        limit: int | None = None,
+        predicate: Callable[[BaseModel], bool] | None = None,
+    ) -> list[BaseModel]:
+        """
+        Every worker sorts its models and returns the first limit of them. Sorted parts are merged, and
+        the models with the same key stay in the order of the session, the same way that sorted() does it.
+        """
+        models = list(super().values())
+        sorting_key, reverse = _get_sorting_key(tuple(clauses))
+        results = list(
+            self._run(
+                models=models,
+                predicate=predicate,
+                sorting_key=sorting_key,
+                reverse=reverse,
+                limit=limit,
+            )
+        )
+
+        merged_positions = heapq.merge(*results, key=lambda position: sorting_key(models[position]), reverse=reverse)
+        return [models[position] for position in islice(merged_positions, limit)]
+
+    def filter_rows(self, *filter_funcs: Callable[[BaseModel], bool]) -> Iterable[BaseModel] | None:
+        if not filter_funcs or not self.is_parallel():
+            return None
+
+        return ParallelQuery(session=self, predicate=conjunction(*filter_funcs))
+
+    def sort_models(self, clauses: tuple[str, ...], limit: int | None = None) -> list[BaseModel] | None:
+        if not self.is_parallel():
+            return None
+
+        return self.scan_sorted(clauses=clauses, limit=limit)
+
+
+__all__ = [
+    "ParallelQuery",
+    "ParallelSession",
+]
@@ -0,0 +1,182 @@
+import mmap
+import os
+import pickle
+import struct
+import threading
+import zlib
+from collections.abc import Hashable, Iterator, MutableMapping
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.models_utils import build_model
+from assimilator.internal.database.session import InternalTransaction
+
+_SNAPSHOT_HEADER = b"ASSIMILATOR-SNAPSHOT-1\n"
+_RECORD_HEADER = struct.Struct("<II")  # length and crc32 of the record
+
+
+class InternalStorage:
+    """
+    Saves the internal session to the disk. Every commit of InternalUnitOfWork is appended to the log file, and
+    the whole session is saved to a compact binary snapshot after snapshot_every commits. When we load the session,
+    we read the snapshot with mmap and apply the commits that were written to the log after it.
+
+    Files are pickled, so only load the files that were written by your application.
+    """
+
+    def __init__(self, path: str, snapshot_every: int | None = 1000, fsync: bool = True):
+        """
+        :param path: path of the storage without the extension. We create path.snapshot and path.log files.
+        :param snapshot_every: number of commits in the log after which the snapshot is created. None to disable it.
+        :param fsync: whether to wait until the commit is written to the disk.
+        """
+        self.snapshot_path = f"{path}.snapshot"
+        self.log_path = f"{path}.log"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.log_records = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def load(self, session: MutableMapping) -> MutableMapping:
+        """Adds the models from the snapshot and the log to the session and returns it."""
+        with self._lock:
+            session.update(self._read_snapshot())
+
+            for changes in self._read_log():
+                self._apply(session=session, changes=changes)
+                self.log_records += 1
+
+        return session
+
+    def commit(self, transaction: InternalTransaction) -> None:
+        """Appends the changes of the transaction to the log and commits them to the session."""
+        with self._lock:
+            changes = list(transaction.get_changes())
+
+            if changes:
+                self._write_record(pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL))
+                self.log_records += 1
+
+            transaction.commit(changes)  # session gets exactly the changes that were logged
+
+            if self.snapshot_every is not None and self.log_records >= self.snapshot_every:
+                self._write_snapshot(transaction.session)
+
+    def snapshot(self, session: MutableMapping) -> None:
+        """Saves all the models of the session to the snapshot and clears the log."""
+        with self._lock:
+            self._write_snapshot(session)
+
+    @staticmethod
+    def _apply(session: MutableMapping, changes: list[tuple[Hashable, BaseModel | None]]) -> None:
+        for key, model in changes:
+            if model is None:
+                session.pop(key, None)
+            else:
+                session[key] = model
+
+    def _read_snapshot(self) -> dict:
+        if not os.path.exists(self.snapshot_path) or not os.path.getsize(self.snapshot_path):
+            return {}
+
+        with open(self.snapshot_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[: len(_SNAPSHOT_HEADER)] != _SNAPSHOT_HEADER:
+                raise ValueError(f"{self.snapshot_path} is not a snapshot of the internal session")
+
+            with memoryview(data) as view:  # pickle reads the file without copying it into bytes
+                groups, models = pickle.loads(view[len(_SNAPSHOT_HEADER) :])
+
+        for model_type, fields, rows in groups:
+            for key, values, fields_set in rows:
+                models[key] = build_model(model=model_type, values=dict(zip(fields, values)), fields_set=fields_set)
+
+        return models
+
+    def _read_log(self) -> Iterator[list]:
+        """
+        Reads the commits from the log. If the last record was not written completely, because
+        the process was stopped, we remove it from the log.
+        """
+        if not os.path.exists(self.log_path) or not os.path.getsize(self.log_path):
+            return
+
+        position = 0
+
+        with open(self.log_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while position + _RECORD_HEADER.size <= len(data):
+                length, checksum = _RECORD_HEADER.unpack_from(data, position)
+                start, end = position + _RECORD_HEADER.size, position + _RECORD_HEADER.size + length
+
+                if end > len(data) or zlib.crc32(data[start:end]) != checksum:
+                    break
+
+                yield pickle.loads(data[start:end])
+                position = end
+
+            log_size = len(data)
+
+        if position != log_size:
+            os.truncate(self.log_path, position)
+
+    def _write_record(self, record: bytes) -> None:
+        with open(self.log_path, "ab") as file:
+            file.write(_RECORD_HEADER.pack(len(record), zlib.crc32(record)) + record)
+            file.flush()
+
+            if self.fsync:
+                os.fsync(file.fileno())
+
+    @staticmethod
+    def _compact_models(session: MutableMapping) -> tuple[list, dict]:
+        """
+        Stores the models as the lists of their values, grouped by the type of the model. That makes
+        the snapshot smaller and faster to write than pickled models. Models with private attributes are pickled.
+        """
+        groups: dict[type, tuple[list[str], list]] = {}
+        models = {}
+
+        for key, model in session.items():
+            model_type = type(model)
+
+            if getattr(model_type, "__private_attributes__", None):
+                models[key] = model
+                continue
+
+            group = groups.get(model_type)
+            if group is None:
+                group = groups[model_type] = (list(model_type.__fields__), [])
+
+            fields, rows = group
+            values = model.__dict__
+            fields_set = model.__fields_set__
+
+            rows.append(
+                (key, [values[field] for field in fields], None if len(fields_set) == len(fields) else fields_set)
+            )
+
+        return [(model_type, fields, rows) for model_type, (fields, rows) in groups.items()], models
+
+    def _write_snapshot(self, session: MutableMapping) -> None:
+        temporary_path = f"{self.snapshot_path}.tmp"
+
+        with open(temporary_path, "wb") as file:
+            file.write(_SNAPSHOT_HEADER)
+            pickle.dump(self._compact_models(session), file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self.snapshot_path)  # old snapshot is used until the new one is written
+
+        with open(self.log_path, "wb"):  # commits in the log are in the snapshot now
+            self.log_records = 0
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.log_path})"
+
+
+__all__ = [
+    "InternalStorage",
+]
@@ -1,5 +1,9 @@
+from collections.abc import Iterable, Mapping, Sized
+from copy import deepcopy
 from typing import Optional, TypeVar, List
 
+from pydantic import ValidationError
+
 from assimilator.core.patterns.error_wrapper import ErrorWrapper
 from assimilator.internal.database.error_wrapper import InternalErrorWrapper
 from assimilator.core.database import (
@@ -11,8 +15,10 @@ from assimilator.core.database import (
     NotFoundError,
 )
 from assimilator.core.database import MultipleResultsError
-from assimilator.internal.database.specifications.specifications import InternalSpecificationList
+from assimilator.internal.database.specifications.specifications import InternalSpecificationList, OrderedQuery
 from assimilator.internal.database.models_utils import dict_to_internal_models
+from assimilator.internal.database.session import InternalSession, InternalTransaction, SessionValues
+from assimilator.internal.database.indexes import HashIndex
 
 ModelT = TypeVar("ModelT", bound=BaseModel)
 
@@ -34,6 +40,32 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
             error_wrapper=error_wrapper or InternalErrorWrapper(),
         )
 
+        self.view = LazyCommand.decorate(self.error_wrapper.decorate(self.view))
+
+        if isinstance(session, InternalSession):
+            self._create_indexes(session)
+
+    def _create_indexes(self, session: InternalSession) -> None:
+        config = getattr(self.model, "AssimilatorConfig", None)
+
+        indexes = getattr(config, "indexes", None) or ()
+
+        if not isinstance(indexes, Mapping):  # only field names are provided
+            indexes = dict.fromkeys(indexes, HashIndex)
+
+        for field, index_type in indexes.items():
+            session.add_index(index_type(field))
+
+    def _load_models(self, models: Iterable[ModelT]) -> list[ModelT]:
+        """
+        Models that are read in InternalUnitOfWork are copied by the transaction.
+        That way, their changes are not visible outside until we commit them.
+        """
+        if isinstance(self.session, InternalTransaction):
+            return [self.session.checkout(model.id, model) for model in models]
+
+        return list(models)
+
     def get(
         self,
         *specifications: SpecificationType,
@@ -46,11 +78,11 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
         )
 
         if query:  # Dict key was not provided, we must use other search parameters
-            return self.session[query]
+            return self._load_models([self.session[query]])[0]
 
-        found_models = list(
+        found_models = self._load_models(
             self._apply_specifications(
-                query=self.session.values(),
+                query=SessionValues(self.session),
                 specifications=specifications,
             )
         )
@@ -68,9 +100,33 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
         lazy: bool = False,
         initial_query: Optional[str] = None,
     ) -> LazyCommand[List[ModelT]] | List[ModelT]:
-        return list(
+        return self._load_models(
+            self._apply_specifications(
+                query=SessionValues(self.session),
+                specifications=specifications,
+            )
+        )
+
+    def view(
+        self,
+        name: str,
+        *specifications: SpecificationType,
+        lazy: bool = False,
+        initial_query: str | None = None,
+    ) -> LazyCommand[list[ModelT]] | list[ModelT]:
+        """
+        Returns the models of the MaterializedView that was added to the session. The view is kept up to date
+        by the session, so we only load the models that are in it. Specifications are applied to the view.
+        """
+        find_view = getattr(self.session, "find_view", None)
+        view = None if find_view is None else find_view(name)
+
+        if view is None:
+            raise NotFoundError(f"{self} repository does not have {name} view")
+
+        return self._load_models(
             self._apply_specifications(
-                query=self.session.values(),
+                query=view.query(self.session),
                 specifications=specifications,
             )
         )
@@ -78,6 +134,30 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
     def dict_to_models(self, data: dict) -> ModelT:
         return self.model(**dict_to_internal_models(data=data, model=self.model))
 
+    def load_from_parquet(self, path: str, validate: bool = False, batch_size: int = 65_536) -> int:
+        """
+        Saves the models from the Parquet file in batches. You need to install pyarrow to use it.
+        Check assimilator.internal.database.arrow.load_from_parquet() for the details.
+        """
+        from assimilator.internal.database.arrow import load_from_parquet  # pyarrow is an optional dependency
+
+        return load_from_parquet(repository=self, path=path, validate=validate, batch_size=batch_size)
+
+    def dump_to_parquet(
+        self,
+        path: str,
+        *specifications: SpecificationType,
+        batch_size: int = 65_536,
+        **writer_options,
+    ) -> int:
+        """
+        Writes the models that are found with the specifications to the Parquet file. You need to install pyarrow.
+        Check assimilator.internal.database.arrow.dump_to_parquet() for the details.
+        """
+        from assimilator.internal.database.arrow import dump_to_parquet
+
+        return dump_to_parquet(self, path, *specifications, batch_size=batch_size, **writer_options)
+
     def save(self, obj: Optional[ModelT] = None, **obj_data) -> ModelT:
         if obj is None:
             obj = self.dict_to_models(obj_data)
@@ -89,17 +169,44 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
         obj, specifications = self._check_obj_is_specification(obj, specifications)
 
         if specifications:
-            for model in self.filter(*specifications, lazy=True):
+            found_models = list(  # We do not call filter() because deleted models are not copied
+                self._apply_specifications(
+                    query=SessionValues(self.session),
+                    specifications=specifications,
+                )
+            )
+
+            for model in found_models:
                 del self.session[model.id]
         elif obj is not None:
             del self.session[obj.id]
 
+    def _validate_update_values(self, update_values: dict) -> dict:
+        """Validates the values with the fields of the model. Values are the same for all the updated models."""
+        validated_values = {}
+
+        for field_name, value in dict_to_internal_models(data=dict(update_values), model=self.model).items():
+            field = self.model.__fields__.get(field_name)
+            if field is None:
+                raise InvalidQueryError(f"{self.model} does not have {field_name} field")
+
+            validated_values[field_name], errors = field.validate(value, validated_values, loc=field_name)
+            if errors:
+                raise InvalidQueryError(str(ValidationError([errors], self.model)))
+
+        return validated_values
+
     def update(
         self,
         obj: Optional[ModelT] = None,
         *specifications: SpecificationType,
         **update_values,
-    ) -> None:
+    ) -> int:
+        """
+        Saves the obj, or updates all the models that are found with the specifications.
+        Updated models are replaced with the copies, so the indexes, the views and InternalUnitOfWork see the changes.
+        Returns the number of updated models.
+        """
         obj, specifications = self._check_obj_is_specification(obj, specifications)
 
         if specifications:
@@ -108,12 +215,25 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
                     "You did not provide any update_values to the update() yet provided specifications"
                 )
 
-            for model in self.filter(*specifications, lazy=True):
-                model.__dict__.update(update_values)
-                self.save(model)
+            update_values = self._validate_update_values(update_values)
+            found_models = list(  # We do not call filter() because transactions would copy the models twice
+                self._apply_specifications(
+                    query=SessionValues(self.session),
+                    specifications=specifications,
+                )
+            )
+
+            for model in found_models:
+                # Mutable values must not be shared by the updated models
+                self.session[model.id] = model.copy(update=deepcopy(update_values))
+
+            return len(found_models)
 
         elif obj is not None:
             self.save(obj)
+            return 1
+
+        return 0
 
     def is_modified(self, obj: ModelT) -> bool:
         return self.get(self.specs.filter(id=obj.id)) == obj
@@ -128,16 +248,21 @@ class InternalRepository(Repository[dict, ModelT, str, InternalSpecificationList
         lazy: bool = False,
         initial_query: Optional[str] = None,
     ) -> LazyCommand[int] | int:
-        if specifications:
-            return len(
-                list(
-                    self._apply_specifications(  # We do not call filter() for list() optimization
-                        query=self.session.values(),
-                        specifications=specifications,
-                    )
-                )
-            )
-        return len(self.session)
+        if not specifications:
+            return len(self.session)
+
+        query = self._apply_specifications(
+            query=SessionValues(self.session),
+            specifications=specifications,
+        )
+
+        if isinstance(query, OrderedQuery):  # ordering does not change the number of the models
+            query = query.query
+
+        if isinstance(query, Sized):  # models were found by the indexes, or they are already in a list
+            return len(query)
+
+        return sum(1 for _ in query)  # We do not call filter() to avoid the list of the models
 
 
 __all__ = [
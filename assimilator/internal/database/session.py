@@ -0,0 +1,470 @@
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator, MutableMapping, ValuesView
+from contextlib import nullcontext
+from copy import deepcopy
+from itertools import count
+from typing import TYPE_CHECKING, Optional
+
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.indexes import Index, SortedIndex
+
+if TYPE_CHECKING:
+    from assimilator.internal.database.views import MaterializedView
+
+
+class SessionValues(ValuesView):
+    """
+    Models of the internal session that are passed to the specifications as a query.
+    Unlike dict.values(), it keeps the session, so the specifications can use its indexes.
+    """
+
+    @property
+    def session(self):
+        return self._mapping
+
+    def __iter__(self):
+        return iter(self._mapping.values())
+
+
+class SessionModels:
+    """
+    Models of the session that were found by their keys. The keys are only loaded when we iterate over
+    the models, so len() tells us how many models were found without creating or copying them.
+    """
+
+    def __init__(self, session: MutableMapping, keys: Collection[Hashable]):
+        self.session = session
+        self.keys = keys
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        session = self.session
+
+        get_models = getattr(session, "get_models", None)  # some sessions can load many models faster
+        if get_models is not None:
+            return iter(get_models(self.keys))
+
+        keys = list(self.keys)  # keys may come from an index that changes while we iterate over the models
+        models = (session.get(key) for key in keys)
+        return (model for model in models if model is not None)  # other threads may delete the models
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class _KeysInSessionOrder(Collection):
+    """
+    Keys found with the indexes that are sorted in the order of the session when we iterate over them.
+    Indexes keep the keys in their own order, and adding an index must not change the results of the queries.
+    Keys that are not in the session yet, like the new keys of the transaction, are returned last.
+    """
+
+    def __init__(self, keys: Collection[Hashable], positions: dict[Hashable, int]):
+        self.keys = keys
+        self.positions = positions
+
+    def __iter__(self) -> Iterator[Hashable]:
+        positions, last_position = self.positions, len(self.positions)
+        return iter(sorted(self.keys, key=lambda key: positions.get(key, last_position)))
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class InternalSession(dict):
+    """
+    Dictionary session that keeps the indexes of its models up to date.
+    All the changes in the session must go through the dictionary methods, so
+    do not change the models that are stored in it without saving them again.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.indexes: list[Index] = []
+        self.views: dict[str, MaterializedView] = {}
+        self._counter = count()
+        self._positions: dict[Hashable, int] = dict(zip(dict.keys(self), self._counter))  # order of the keys
+
+    def add_index(self, index: Index) -> Index:
+        for existing_index in self.indexes:
+            if type(existing_index) is type(index) and existing_index.field == index.field:
+                return existing_index
+
+        for key, model in self.items():
+            index.add(key, model)
+
+        self.indexes.append(index)
+        return index
+
+    def add_view(self, view: "MaterializedView") -> "MaterializedView":
+        """Adds the view that is updated with the changes of the session. Views with the same name are replaced."""
+        for key, model in self.items():
+            view.add(key, model)
+
+        self.views[view.name] = view
+        return view
+
+    def find_view(self, name: str) -> Optional["MaterializedView"]:
+        return self.views.get(name)
+
+    def find_index(self, field: str, index_type: type[Index]) -> Index | None:
+        for index in self.indexes:
+            if isinstance(index, index_type) and index.field == field:
+                return index
+
+        return None
+
+    def find_candidates(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the models that may satisfy all the filter functions using the indexes.
+        We choose the smallest set of keys, so the rest of the filters are checked on fewer models.
+        None is returned if there is no index that can be used with the filters.
+        """
+        candidates = None
+
+        for filter_func in filter_funcs:
+            field = getattr(filter_func, "field", None)
+
+            for index in self.indexes:
+                if index.field != field:
+                    continue
+
+                keys = index.lookup(filter_func.operation, filter_func.value)
+                if keys is not None and (candidates is None or len(keys) < len(candidates)):
+                    candidates = keys
+
+        return None if candidates is None else self.in_session_order(candidates)
+
+    def find_matches(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        """
+        Returns the keys of the models that satisfy all the filter functions if the indexes can find them exactly.
+        Results of the filters are intersected starting with the smallest one, and the keys are returned
+        in the order of the session. None is returned if one of the filters cannot be answered by the indexes.
+        """
+        found_keys = []
+
+        for filter_func in filter_funcs:
+            field = getattr(filter_func, "field", None)
+
+            for index in self.indexes:
+                if index.field != field:
+                    continue
+
+                keys = index.find_matches(filter_func.operation, filter_func.value)
+                if keys is not None:
+                    found_keys.append(keys)
+                    break
+            else:
+                return None
+
+        if len(found_keys) <= 1:
+            return self.in_session_order(found_keys[0]) if found_keys else None
+
+        found_keys.sort(key=len)
+        other_keys = [set(keys) for keys in found_keys[1:]]
+        return self.in_session_order([key for key in found_keys[0] if all(key in keys for keys in other_keys)])
+
+    def in_session_order(self, keys: Collection[Hashable]) -> Collection[Hashable]:
+        """
+        Returns the keys that are sorted in the order of the session when we iterate over them.
+        They are only sorted if the models are loaded, so len() of the keys is still cheap.
+        """
+        return _KeysInSessionOrder(keys=keys, positions=self._positions)
+
+    def find_sorted_keys(self, field: str, reverse: bool = False) -> Iterable[Hashable] | None:
+        """Returns all the keys sorted by the field if there is SortedIndex for it."""
+        index = self.find_index(field, SortedIndex)
+        return None if index is None else index.sorted_keys(reverse=reverse)
+
+    def __setitem__(self, key, model):
+        super().__setitem__(key, model)
+
+        if key not in self._positions:
+            self._positions[key] = next(self._counter)
+
+        for index in self.indexes:
+            index.add(key, model)
+
+        for view in self.views.values():
+            view.add(key, model)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        del self._positions[key]
+
+        for index in self.indexes:
+            index.remove(key)
+
+        for view in self.views.values():
+            view.remove(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+
+        model = self[key]
+        del self[key]
+        return model
+
+    def popitem(self):
+        key, model = super().popitem()
+        del self._positions[key]
+
+        for index in self.indexes:
+            index.remove(key)
+
+        for view in self.views.values():
+            view.remove(key)
+
+        return key, model
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, model in dict(*args, **kwargs).items():
+            self[key] = model
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._positions.clear()
+
+        for index in self.indexes:
+            index.clear()
+
+        for view in self.views.values():
+            view.clear()
+
+
+_DELETED = object()
+
+
+def _get_key_checker(session: MutableMapping) -> Callable[[Hashable], bool]:
+    """
+    Returns the function that checks that the key is in the session. Sessions like CacheSession count `in`
+    as the access by the key, so they provide contains_key() that we use for our own checks.
+    """
+    return getattr(session, "contains_key", None) or session.__contains__
+
+
+class TransactionValues(ValuesView):
+    def __iter__(self):
+        transaction = self._mapping
+        changes = transaction.changes
+
+        if not changes:
+            yield from transaction.session.values()
+            return
+
+        for key, model in transaction.session.items():
+            model = changes.get(key, model)
+            if model is not _DELETED:
+                yield model
+
+        contains_key = _get_key_checker(transaction.session)
+
+        for key, model in changes.items():
+            if model is not _DELETED and not contains_key(key):
+                yield model
+
+
+class InternalTransaction(MutableMapping):
+    """
+    Copy-on-write view of the session that is used in InternalUnitOfWork.
+    It only stores the changed keys, so the cost of the transaction depends on the number of changes
+    instead of the size of the session. Deleted keys are marked and removed in commit().
+
+    Keys that were saved or deleted are remembered separately from the models copied with checkout(),
+    so saved models are always committed, and the copies are only committed if they were changed.
+    """
+
+    def __init__(self, session: MutableMapping):
+        self.session = session
+        self.changes: dict = {}
+        self.written: dict[Hashable, None] = {}  # dict is used as an ordered set
+        self._originals: dict = {}  # models that were copied with checkout()
+
+    def checkout(self, key: Hashable, model: BaseModel | None = None) -> BaseModel:
+        """
+        Returns a copy of the model that is stored in the transaction. We do that to make sure that
+        the changes of the models read in the transaction are not visible outside until commit().
+
+        :param model: model of the key that was already read from the transaction, so we do not read it again.
+        """
+        if key in self.changes:
+            return self[key]
+        elif model is None:
+            model = self.session[key]
+
+        self._originals[key] = model
+        model = self.changes[key] = deepcopy(model)
+        return model
+
+    def commit(self, changes: Iterable[tuple[Hashable, BaseModel | None]] | None = None) -> None:
+        """
+        Writes the changes to the session. Only the changed keys are written, so the indexes and the views
+        are not updated for the models that were only read.
+
+        :param changes: result of get_changes() if it was already found, so the copies are not compared again.
+        """
+        if changes is None:
+            changes = list(self.get_changes())
+
+        lock = getattr(self.session, "lock", None)  # concurrent sessions must not show a part of the changes
+
+        with nullcontext() if lock is None else lock.write():
+            for key, model in changes:
+                if model is None:
+                    self.session.pop(key, None)
+                else:
+                    self.session[key] = model
+
+        self.rollback()
+
+    def rollback(self) -> None:
+        self.changes.clear()
+        self.written.clear()
+        self._originals.clear()
+
+    def get_changes(self) -> Iterator[tuple[Hashable, BaseModel | None]]:
+        """
+        Returns the keys and the models that are changed by the transaction. Deleted keys have None instead
+        of the model. Saved and deleted keys are always returned, even if the saved model is the same object
+        as the one in the session. Models that were copied with checkout(), but were not changed, are skipped.
+        """
+        written, originals = self.written, self._originals
+
+        for key, model in self.changes.items():
+            if key in written:
+                yield key, None if model is _DELETED else model
+            elif originals[key] != model:
+                yield key, model
+
+    def _is_sorted_by(self, field: str) -> bool:
+        """Checks that the changes do not move the models in the sorted index of the session."""
+        find_index = getattr(self.session, "find_index", None)
+        index = None if find_index is None else find_index(field, SortedIndex)
+        if index is None:
+            return False
+
+        return all(model is not _DELETED and index.has_values(key, model) for key, model in self.changes.items())
+
+    def find_view(self, name: str) -> Optional["MaterializedView"]:
+        find_view = getattr(self.session, "find_view", None)
+        return None if find_view is None else find_view(name)
+
+    def find_sorted_keys(self, field: str, reverse: bool = False) -> Iterable[Hashable] | None:
+        if self.changes and not self._is_sorted_by(field):  # indexes of the session do not know about our changes
+            return None
+
+        find_sorted_keys = getattr(self.session, "find_sorted_keys", None)
+        return None if find_sorted_keys is None else find_sorted_keys(field, reverse)
+
+    def find_candidates(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        find_candidates = getattr(self.session, "find_candidates", None)
+        candidates = None if find_candidates is None else find_candidates(*filter_funcs)
+
+        if candidates is None or not self.changes:
+            return candidates
+
+        changes = self.changes
+        return self._in_session_order(
+            [
+                *(key for key in candidates if key not in changes),
+                *(key for key, model in changes.items() if model is not _DELETED),
+            ]
+        )
+
+    def find_matches(self, *filter_funcs: Callable[[BaseModel], bool]) -> Collection[Hashable] | None:
+        find_matches = getattr(self.session, "find_matches", None)
+        matches = None if find_matches is None else find_matches(*filter_funcs)
+
+        if matches is None or not self.changes:
+            return matches
+
+        changes = self.changes  # changed models are not in the indexes, so we check them with the filters
+        return self._in_session_order(
+            [
+                *(key for key in matches if key not in changes),
+                *(
+                    key
+                    for key, model in changes.items()
+                    if model is not _DELETED and all(filter_func(model) for filter_func in filter_funcs)
+                ),
+            ]
+        )
+
+    def _in_session_order(self, keys: list[Hashable]) -> Collection[Hashable]:
+        """Changed keys that are already in the session keep their place, and the new keys are returned last."""
+        in_session_order = getattr(self.session, "in_session_order", None)
+        return keys if in_session_order is None else in_session_order(keys)
+
+    def values(self):
+        return TransactionValues(self)
+
+    def __getitem__(self, key):
+        model = self.changes.get(key, None)
+
+        if model is None:
+            return self.session[key]
+        elif model is _DELETED:
+            raise KeyError(key)
+
+        return model
+
+    def __setitem__(self, key, model):
+        self.changes[key] = model
+        self.written[key] = None
+
+    def __delitem__(self, key):
+        model = self.changes.get(key, None)
+        if model is _DELETED or (model is None and not _get_key_checker(self.session)(key)):
+            raise KeyError(key)
+
+        self.changes[key] = _DELETED
+        self.written[key] = None
+
+    def __contains__(self, key):
+        model = self.changes.get(key, None)
+        return _get_key_checker(self.session)(key) if model is None else model is not _DELETED
+
+    def __iter__(self):
+        changes = self.changes
+
+        for key in self.session:
+            if changes.get(key, None) is not _DELETED:
+                yield key
+
+        contains_key = _get_key_checker(self.session)
+
+        for key, model in changes.items():
+            if model is not _DELETED and not contains_key(key):
+                yield key
+
+    def __len__(self):
+        length = len(self.session)
+        contains_key = _get_key_checker(self.session)
+
+        for key, model in self.changes.items():
+            if not contains_key(key):
+                length += model is not _DELETED
+            elif model is _DELETED:
+                length -= 1
+
+        return length
+
+
+__all__ = [
+    "InternalSession",
+    "InternalTransaction",
+    "SessionModels",
+    "SessionValues",
+]
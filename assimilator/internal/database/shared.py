@@ -0,0 +1,358 @@
+import hashlib
+import inspect
+import pickle
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Hashable, Iterable, Iterator, Mapping, ValuesView
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from assimilator.core.database.exceptions import DataLayerError
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.models_utils import build_model
+
+_VERSION = struct.Struct("<Q")
+_SNAPSHOT_HEADER = struct.Struct("<QQQ")  # number of the models, offset of the table, length of the pickled types
+_ENTRY = struct.Struct("<qQQQQ")  # type of the model, offsets and lengths of the pickled key and model
+_ARRAY_ITEM = struct.Struct("<Q")  # items of the sorted hashes of the keys and of the positions of their entries
+_CAN_SKIP_TRACKING = "track" in inspect.signature(SharedMemory).parameters  # Python 3.13 and newer
+
+
+def _encode_key(key: Hashable) -> bytes:
+    return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _hash_key(encoded_key: bytes) -> int:
+    """hash() of strings is different in every process, so the readers find the keys by the hash of their pickle."""
+    return int.from_bytes(hashlib.blake2b(encoded_key, digest_size=_ARRAY_ITEM.size).digest(), "little")
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Opens the shared memory created by another process. We do not want the resource tracker of
+    the reader to remove the memory when the reader stops, because other processes still use it.
+    """
+    if _CAN_SKIP_TRACKING:
+        return SharedMemory(name=name, track=False)
+
+    memory = SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+def _unlink(memory: SharedMemory) -> None:
+    """
+    Removes the shared memory of the publisher. Readers that share the resource tracker with the publisher
+    unregister the memory when they open it, so we register it again before unlink() unregisters it.
+    """
+    if not _CAN_SKIP_TRACKING:
+        resource_tracker.register(memory._name, "shared_memory")
+
+    memory.close()
+    memory.unlink()
+
+
+class SharedMemoryPublisher:
+    """
+    Writes the snapshots of the models to the shared memory, so other processes can read them with
+    SharedMemorySession. Every snapshot is a new block of memory, and the number of the current snapshot
+    is stored in the block with the name of the publisher. Snapshots cannot be changed after they are published.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self._snapshot: SharedMemory | None = None
+
+        try:
+            self._pointer = SharedMemory(name=name, create=True, size=_VERSION.size)
+        except FileExistsError:  # publisher was restarted, so we continue with its versions
+            self._pointer = SharedMemory(name=name)
+            (self.version,) = _VERSION.unpack_from(self._pointer.buf)
+            self._snapshot = self._open_published_snapshot()
+
+    def _open_published_snapshot(self) -> SharedMemory | None:
+        """Opens the snapshot of the previous publisher, so it is removed when we publish the next one."""
+        if not self.version:
+            return None
+
+        try:
+            return SharedMemory(name=f"{self.name}-{self.version}")
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _encode_models(models: Mapping) -> tuple[list[bytes], list[tuple[int, int, int, int]], list]:
+        """
+        Pickles every key and model separately, so the readers only decode the models that they use.
+        Values of the models are stored without their field names, which are saved once for every type.
+        Returns the blobs, the entries with the hash of the key, the type and the positions of the blobs, and the types.
+        """
+        model_types: dict[type, int] = {}
+        entries, blobs = [], []
+
+        for key, model in models.items():
+            model_type = type(model)
+
+            if getattr(model_type, "__private_attributes__", None):
+                type_position = -1  # pickle stores the private attributes
+                blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                type_position = model_types.setdefault(model_type, len(model_types))
+                values = model.__dict__
+                fields_set = model.__fields_set__
+                blob = pickle.dumps(
+                    (
+                        [values[field] for field in model_type.__fields__],
+                        None if len(fields_set) == len(model_type.__fields__) else fields_set,
+                    ),
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+
+            encoded_key = _encode_key(key)
+            entries.append((_hash_key(encoded_key), type_position, len(blobs), len(blobs) + 1))
+            blobs.extend((encoded_key, blob))
+
+        return blobs, entries, [(model_type, list(model_type.__fields__)) for model_type in model_types]
+
+    def publish(self, models: Mapping) -> int:
+        """
+        Writes all the models to a new snapshot and makes the readers use it. Returns the version of it.
+        The table of the models is written as arrays, so the readers search it in the shared memory without
+        decoding it: the entries in the order of the models, and the hashes of the keys sorted with the positions
+        of their entries.
+        """
+        blobs, entries, model_types = self._encode_models(models)
+
+        offset, offsets = _SNAPSHOT_HEADER.size, []
+        for blob in blobs:
+            offsets.append(offset)
+            offset += len(blob)
+
+        table_offset = offset + -offset % 8  # arrays of the table are aligned for memoryview.cast()
+        hashes_offset = table_offset + len(entries) * _ENTRY.size
+        positions_offset = hashes_offset + len(entries) * _ARRAY_ITEM.size
+        types_offset = positions_offset + len(entries) * _ARRAY_ITEM.size
+        encoded_types = pickle.dumps(model_types, protocol=pickle.HIGHEST_PROTOCOL)
+
+        version = self.version + 1
+        snapshot = SharedMemory(name=f"{self.name}-{version}", create=True, size=types_offset + len(encoded_types))
+        _SNAPSHOT_HEADER.pack_into(snapshot.buf, 0, len(entries), table_offset, len(encoded_types))
+
+        for blob, blob_offset in zip(blobs, offsets):
+            snapshot.buf[blob_offset : blob_offset + len(blob)] = blob
+
+        for position, (_, type_position, key_position, model_position) in enumerate(entries):
+            _ENTRY.pack_into(
+                snapshot.buf,
+                table_offset + position * _ENTRY.size,
+                type_position,
+                offsets[key_position],
+                len(blobs[key_position]),
+                offsets[model_position],
+                len(blobs[model_position]),
+            )
+
+        sorted_positions = sorted(range(len(entries)), key=lambda position: entries[position][0])
+        for index, position in enumerate(sorted_positions):
+            _ARRAY_ITEM.pack_into(snapshot.buf, hashes_offset + index * _ARRAY_ITEM.size, entries[position][0])
+            _ARRAY_ITEM.pack_into(snapshot.buf, positions_offset + index * _ARRAY_ITEM.size, position)
+
+        snapshot.buf[types_offset : types_offset + len(encoded_types)] = encoded_types
+
+        _VERSION.pack_into(self._pointer.buf, 0, version)  # readers switch to the snapshot after it is written
+        self.version = version
+        self._remove_snapshot()
+        self._snapshot = snapshot
+        return version
+
+    def _remove_snapshot(self) -> None:
+        """Readers that still use the old snapshot keep it in memory until they switch to the new one."""
+        if self._snapshot is not None:
+            _unlink(self._snapshot)
+            self._snapshot = None
+
+    def close(self) -> None:
+        """Removes the shared memory. Call it when the readers do not need the models anymore."""
+        self._remove_snapshot()
+        _unlink(self._pointer)
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.name})"
+
+
+class SharedSnapshot:
+    """
+    Snapshot that is opened by the reader. The table of the models is searched in the shared memory with
+    the binary search over the hashes of the keys, so opening the snapshot does not decode or copy it,
+    and only the found entry and model are decoded.
+    """
+
+    def __init__(self, memory: SharedMemory):
+        self.memory = memory
+        self.size, self._table_offset, types_length = _SNAPSHOT_HEADER.unpack_from(memory.buf)
+
+        self._hashes_offset = self._table_offset + self.size * _ENTRY.size
+        self._positions_offset = self._hashes_offset + self.size * _ARRAY_ITEM.size
+        types_offset = self._positions_offset + self.size * _ARRAY_ITEM.size
+
+        with memory.buf[types_offset : types_offset + types_length] as encoded_types:
+            self.model_types = pickle.loads(encoded_types)
+
+    def _decode(self, offset: int, length: int):
+        with self.memory.buf[offset : offset + length] as blob:
+            return pickle.loads(blob)
+
+    def _read_entry(self, position: int) -> tuple[int, int, int, int, int]:
+        return _ENTRY.unpack_from(self.memory.buf, self._table_offset + position * _ENTRY.size)
+
+    def find(self, key: Hashable) -> int | None:
+        """Returns the position of the model with the key. Only the keys with the same hash are decoded."""
+        key_hash = _hash_key(_encode_key(key))
+        buffer = self.memory.buf
+
+        # views are released after the search, otherwise the memory could not be closed
+        with buffer[self._hashes_offset : self._positions_offset].cast(_ARRAY_ITEM.format[-1]) as hashes:
+            index = bisect_left(hashes, key_hash)
+            indexes = range(index, bisect_right(hashes, key_hash, lo=index))
+
+        for index in indexes:
+            (position,) = _ARRAY_ITEM.unpack_from(buffer, self._positions_offset + index * _ARRAY_ITEM.size)
+            _, key_offset, key_length, _, _ = self._read_entry(position)
+
+            if self._decode(key_offset, key_length) == key:
+                return position
+
+        return None
+
+    def load_position(self, position: int) -> BaseModel:
+        type_position, _, _, offset, length = self._read_entry(position)
+        data = self._decode(offset, length)
+
+        if type_position == -1:
+            return data
+
+        model_type, fields = self.model_types[type_position]
+        values, fields_set = data
+        return build_model(model=model_type, values=dict(zip(fields, values)), fields_set=fields_set)
+
+    def load(self, key: Hashable) -> BaseModel:
+        position = self.find(key)
+        if position is None:
+            raise KeyError(key)
+
+        return self.load_position(position)
+
+    def keys(self) -> Iterator[Hashable]:
+        for position in range(self.size):
+            _, key_offset, key_length, _, _ = self._read_entry(position)
+            yield self._decode(key_offset, key_length)
+
+    def models(self) -> Iterator[BaseModel]:
+        for position in range(self.size):
+            yield self.load_position(position)
+
+    def __contains__(self, key) -> bool:
+        return self.find(key) is not None
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class SharedValues(ValuesView):
+    def __iter__(self) -> Iterator[BaseModel]:
+        snapshot = self._mapping.pin()  # models are read from one snapshot even if a new one is published
+        yield from snapshot.models()
+
+
+class SharedMemorySession(Mapping):
+    """
+    Read-only session that reads the models published by SharedMemoryPublisher in another process.
+    All the processes use the same memory, and the models are only decoded when we read them.
+
+    The session switches to the new snapshot when we start searching the models: `in`, iteration, len()
+    and values(). Every thread keeps the snapshot of its last search, so the models found by it are
+    loaded from the same snapshot, even if a new one is published in the meantime.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self._pointer = _attach(name)
+        self._snapshot: SharedSnapshot | None = None
+        self._pinned = threading.local()
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Opens the latest snapshot if it was changed. Returns True if the snapshot was changed."""
+        while True:
+            (version,) = _VERSION.unpack_from(self._pointer.buf)
+            if version == self.version:
+                return False
+
+            try:
+                memory = _attach(f"{self.name}-{version}")
+            except FileNotFoundError:  # newer snapshot was published while we were opening this one
+                continue
+
+            self._snapshot = SharedSnapshot(memory)
+            self.version = version
+            return True
+
+    def pin(self) -> SharedSnapshot:
+        """Opens the latest snapshot and makes the current thread read the models from it."""
+        self.refresh()
+
+        if self._snapshot is None:
+            raise DataLayerError(f"Nothing was published to {self.name} yet")
+
+        self._pinned.snapshot = self._snapshot
+        return self._snapshot
+
+    @property
+    def snapshot(self) -> SharedSnapshot:
+        """Snapshot that the current thread reads the models from."""
+        snapshot = getattr(self._pinned, "snapshot", None)
+        return self.pin() if snapshot is None else snapshot
+
+    def get_models(self, keys: Iterable[Hashable]) -> list[BaseModel]:
+        """Loads the models from the pinned snapshot. Keys that are not in it are skipped."""
+        snapshot = self.snapshot
+        positions = (snapshot.find(key) for key in keys)
+        return [snapshot.load_position(position) for position in positions if position is not None]
+
+    def values(self) -> SharedValues:
+        return SharedValues(self)
+
+    def __getitem__(self, key: Hashable) -> BaseModel:
+        snapshot = self.snapshot
+
+        if key not in snapshot:  # model may be added in the latest snapshot
+            snapshot = self.pin()
+
+        return snapshot.load(key)
+
+    def __setitem__(self, key, model):
+        raise DataLayerError(f"{self} is read-only. Publish the changes with SharedMemoryPublisher")
+
+    def __delitem__(self, key):
+        raise DataLayerError(f"{self} is read-only. Publish the changes with SharedMemoryPublisher")
+
+    def __contains__(self, key) -> bool:
+        return key in self.pin()
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return self.pin().keys()
+
+    def __len__(self) -> int:
+        return len(self.pin())
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.name})"
+
+
+__all__ = [
+    "SharedMemoryPublisher",
+    "SharedMemorySession",
+]
@@ -1,10 +1,13 @@
-from operator import or_, and_
-from typing import Union, List, Generator, Any
+import operator
+from collections.abc import Callable, Iterable, Iterator
+from typing import Union, List
 
 from assimilator.core.database.models import BaseModel
-from assimilator.core.database import FilterSpecification
-from assimilator.internal.database.specifications.internal_operator import invert
+from assimilator.core.database import FilterSpecification, AdaptiveFilter, Specification
+from assimilator.core.database.specifications.adaptive import CompositeAdaptiveFilter
+from assimilator.internal.database.specifications.internal_operator import invert, conjunction, disjunction
 from assimilator.internal.database.specifications.filtering_options import InternalFilteringOptions
+from assimilator.internal.database.session import SessionValues, SessionModels
 
 QueryT = str | List[BaseModel]
 
@@ -14,58 +17,168 @@ class InternalFilter(FilterSpecification):
 
     def __init__(self, *filters, **named_filters):
         self.text_filters = [filter_ for filter_ in filters if isinstance(filter_, str)]
-
-        if named_filters.get("id"):
-            self.text_filters.append(named_filters.pop("id"))
+        self.keys = self._parse_keys(named_filters)
 
         super(InternalFilter, self).__init__(
-            *(set(filters) - set(self.text_filters)),
+            *(filter_ for filter_ in filters if not isinstance(filter_, str)),
             **named_filters,
         )
 
-    def __call__(self, query: QueryT, **context) -> str | Generator[BaseModel, Any, None]:
+        # Predicates are compiled once for all the queries
+        self._filters_predicate = conjunction(*self.filters) if self.filters else None
+
+        if self.keys is None:
+            self.predicate = self._filters_predicate
+        else:
+            self.predicate = conjunction(self._create_key_filter(self.keys), *self.filters)
+
+    @staticmethod
+    def _parse_keys(named_filters: dict) -> list[str] | None:
+        """
+        Removes id and id__in from the filters. They are the keys of the models, so we can find
+        the models in the session without checking every one of them.
+        """
+        keys = named_filters.pop("id__in", None)
+
+        if named_filters.get("id"):
+            key = named_filters.pop("id")
+            keys = [key] if keys is None else [found_key for found_key in keys if found_key == key]
+
+        return None if keys is None else list(dict.fromkeys(keys))
+
+    @staticmethod
+    def _create_key_filter(keys: list[str]) -> Callable[[BaseModel], bool]:
+        keys = set(keys)
+        return lambda model: model.id in keys
+
+    def __call__(self, query: QueryT, **context) -> str | Iterator[BaseModel]:
         if isinstance(query, str):
             return f"{query}{''.join(str(filter_) for filter_ in self.text_filters)}"
-        elif not self.filters:
+        elif self.keys is not None and isinstance(query, SessionValues):
+            return self._find_models_by_keys(query)
+        elif self.predicate is None:
             return query
+        elif isinstance(query, SessionValues):
+            return self._find_indexed_models(query)
+
+        return filter(self.predicate, query)
+
+    def _find_models_by_keys(self, query: SessionValues) -> Iterable[BaseModel]:
+        """Finds the models by their keys in the session, and only checks the other filters."""
+        session = query.session
+        models = SessionModels(session=session, keys=[key for key in self.keys if key in session])
+
+        if self._filters_predicate is None:
+            return models
+
+        return filter(self._filters_predicate, models)
+
+    def _find_indexed_models(self, query: SessionValues) -> Iterable[BaseModel]:
+        """
+        Uses the indexes of the session to find the models that satisfy the filters. If the session can find
+        them exactly, we return them without checking, and their number is known without loading them.
+        Otherwise, found candidates are still checked with all the filters.
+        """
+        session = query.session
+
+        find_matches = getattr(session, "find_matches", None)
+        matches = None if find_matches is None else find_matches(*self.filters)
+
+        if matches is not None:
+            return SessionModels(session=session, keys=matches)
+
+        find_candidates = getattr(session, "find_candidates", None)
+        candidates = None if find_candidates is None else find_candidates(*self.filters)
+
+        if candidates is not None:
+            return filter(self.predicate, SessionModels(session=session, keys=candidates))
+
+        filter_rows = getattr(session, "filter_rows", None)  # session may check the filters without the models
+        found_models = None if filter_rows is None else filter_rows(*self.filters)
 
-        return (model for model in query if all(filter_func(model) for filter_func in self.filters))
+        if found_models is not None:
+            return found_models
 
-    def __or__(self, other: Union["InternalFilter", "CompositeFilter"]) -> "InternalFilter":
-        return CompositeFilter(first=self, second=other, operation=or_)
+        return filter(self.predicate, query)
 
-    def __and__(self, other: Union["InternalFilter", "CompositeFilter"]) -> "InternalFilter":
-        return CompositeFilter(first=self, second=other, operation=and_)
+    @staticmethod
+    def _parse_filter(other: Union["InternalFilter", AdaptiveFilter]) -> "InternalFilter":
+        if isinstance(other, AdaptiveFilter):
+            return InternalFilter(*other.fields, **other.kwargs_fields)
+
+        return other
+
+    def __or__(self, other: Union["InternalFilter", AdaptiveFilter]) -> "InternalFilter":
+        other = self._parse_filter(other)
+        text_filters = [*self.text_filters, *other.text_filters]
+
+        if self.predicate is None or other.predicate is None:  # one of the filters does not filter anything
+            return InternalFilter(*text_filters)
+
+        return InternalFilter(*text_filters, disjunction(self.predicate, other.predicate))
+
+    def __and__(self, other: Union["InternalFilter", AdaptiveFilter]) -> "InternalFilter":
+        other = self._parse_filter(other)
+
+        if self.keys is None or other.keys is None:
+            keys = self.keys if other.keys is None else other.keys
+        else:
+            keys = [key for key in self.keys if key in other.keys]
+
+        # Filters are not wrapped, so the indexes can still be used with them
+        return InternalFilter(
+            *self.text_filters,
+            *other.text_filters,
+            *self.filters,
+            *other.filters,
+            **({} if keys is None else {"id__in": keys}),
+        )
 
     def __invert__(self):
-        return InternalFilter(*(invert(func) for func in self.filters))
-
-
-class CompositeFilter(InternalFilter):
-    def __init__(
-        self,
-        first: Union[FilterSpecification, "CompositeFilter"],
-        second: Union[FilterSpecification, "CompositeFilter"],
-        operation: Union[or_, and_],
-    ):
-        super(CompositeFilter, self).__init__()
-        self.first = first
-        self.second = second
-        self.operation = operation
-
-    def __call__(self, query: QueryT, **context) -> str | QueryT:
-        if isinstance(query, str):
-            first_result = self.first(query=query, **context)
-            second_result = self.second(query=query, **context)
-            return f"{query}{first_result.replace(query, '')}{second_result.replace(query, '')}"
+        if self.predicate is None:
+            return InternalFilter()
+
+        return InternalFilter(invert(self.predicate))
+
+
+def _find_keys(specification: Specification) -> list[str] | None:
+    """Returns the keys of the specification. Composite filters combine the keys of both of their filters."""
+    if isinstance(specification, InternalFilter):
+        return specification.keys
+    elif isinstance(specification, CompositeAdaptiveFilter):
+        first_keys, second_keys = _find_keys(specification.first), _find_keys(specification.second)
+
+        if specification.func is operator.and_:
+            return _intersect_keys(first_keys, second_keys)
+        elif specification.func is operator.or_ and first_keys is not None and second_keys is not None:
+            return list(dict.fromkeys([*first_keys, *second_keys]))
+
+        return None
+    elif isinstance(specification, AdaptiveFilter):
+        return InternalFilter._parse_keys(dict(specification.kwargs_fields))
+
+    return None
+
+
+def _intersect_keys(keys: list[str] | None, other_keys: list[str] | None) -> list[str] | None:
+    if keys is None or other_keys is None:
+        return keys if other_keys is None else other_keys
+
+    return [key for key in keys if key in other_keys]
+
 
-        first_result = self.first(query=query, **context)
-        second_result = self.second(query=query, **context)
+def get_primary_keys(*specifications: Specification) -> list[str] | None:
+    """
+    Returns the keys of the models that are requested with id or id__in in the filters,
+    so the repositories can find the models directly. None is returned if there are no such filters.
+    Adaptive filters and their combinations are checked too, so filter_(id=...) does not scan the models.
+    """
+    keys = None
 
-        return list(self.operation(set(first_result), set(second_result)))
+    for specification in specifications:
+        keys = _intersect_keys(keys, _find_keys(specification))
 
-    def __str__(self):
-        return f"{self.first} {self.operation} {self.second}"
+    return keys
 
 
-__all__ = ["InternalFilter"]
+__all__ = ["InternalFilter", "get_primary_keys"]
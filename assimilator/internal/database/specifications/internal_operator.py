@@ -21,20 +21,29 @@ def find_attribute(func: callable, field: str, value: Any) -> Callable[[BaseMode
     :return: function to be called with a model to find an attribute and call the comparison function.
     """
 
-    @wraps(func)
-    def find_attribute_wrapper(model: BaseModel) -> bool:
-        foreign_fields = field.split(FILTERING_OPTIONS_SEPARATOR)
+    foreign_fields = field.split(FILTERING_OPTIONS_SEPARATOR)
 
-        if len(foreign_fields) == 1:
-            return func(getattr(model, foreign_fields[0]), value)
+    if len(foreign_fields) == 1:
+        get_value = operator.attrgetter(field)
 
-        model_val = find_model_value(fields=foreign_fields, model=model)
-        if isinstance(model_val, InternalContainers):
-            return any(func(member, value) for member in model_val)
+        @wraps(func)
+        def find_attribute_wrapper(model: BaseModel) -> bool:
+            return func(get_value(model), value)
 
-        return func(model_val, value)
+    else:
+
+        @wraps(func)
+        def find_attribute_wrapper(model: BaseModel) -> bool:
+            model_val = find_model_value(fields=foreign_fields, model=model)
+            if isinstance(model_val, InternalContainers):
+                return any(func(member, value) for member in model_val)
+
+            return func(model_val, value)
 
     find_attribute_wrapper: func
+    find_attribute_wrapper.field = field  # used by the indexes to find the models without the full scan
+    find_attribute_wrapper.operation = func
+    find_attribute_wrapper.value = value
     return find_attribute_wrapper
 
 
@@ -66,12 +75,13 @@ def is_(field: str, value: Literal[True] | Literal[False] | Literal[None]):
     return find_attribute(func=operator.is_, field=field, value=value)
 
 
+def match_regex(model_val: str, pattern: re.Pattern):
+    return pattern.match(model_val)
+
+
 def regex(field: str, value: str):
-    return find_attribute(
-        func=lambda model_val, val: re.compile(value).match(model_val),
-        field=field,
-        value=value,
-    )
+    # Pattern is compiled once for all the models, and the indexes can read it
+    return find_attribute(func=match_regex, field=field, value=re.compile(value))
 
 
 def like(field: str, value: str):
@@ -79,7 +89,7 @@ def like(field: str, value: str):
 
 
 def invert(func: Callable):
-    @wraps(func)
+    @wraps(func, updated=())  # inverted function must not copy the field and the operation used by the indexes
     def invert_wrapper(model):
         return not func(model)
 
@@ -87,6 +97,30 @@ def invert(func: Callable):
     return invert_wrapper
 
 
+def conjunction(*funcs: Callable[[BaseModel], bool]) -> Callable[[BaseModel], bool]:
+    """
+    Fuses the filter functions into one function that returns True if all of them are True.
+    The functions are called in the order they were provided, and we stop at the first False result.
+    """
+    if len(funcs) == 1:
+        return funcs[0]
+
+    first, second = funcs[0], conjunction(*funcs[1:])
+    return lambda model: first(model) and second(model)
+
+
+def disjunction(*funcs: Callable[[BaseModel], bool]) -> Callable[[BaseModel], bool]:
+    """
+    Fuses the filter functions into one function that returns True if any of them is True.
+    The functions are called in the order they were provided, and we stop at the first True result.
+    """
+    if len(funcs) == 1:
+        return funcs[0]
+
+    first, second = funcs[0], disjunction(*funcs[1:])
+    return lambda model: first(model) or second(model)
+
+
 __all__ = [
     "find_attribute",
     "eq",
@@ -97,6 +131,9 @@ __all__ = [
     "not_",
     "is_",
     "regex",
+    "match_regex",
     "like",
     "invert",
+    "conjunction",
+    "disjunction",
 ]
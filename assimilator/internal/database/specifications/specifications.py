@@ -1,8 +1,15 @@
-from typing import List, Iterable, Optional, Collection
-
-from assimilator.core.database import specification, SpecificationList, BaseModel
+import heapq
+import operator
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+from typing import Any, List, Collection
+
+from assimilator.core.database import specification, Specification, SpecificationList, BaseModel
 from assimilator.internal.database.specifications.filter_specifications import InternalFilter
 from assimilator.internal.database.specifications.utils import find_model_value
+from assimilator.core.database.specifications.filtering_options import FILTERING_OPTIONS_SEPARATOR
+from assimilator.internal.database.session import SessionModels, SessionValues
 
 QueryT = str | List[BaseModel]
 internal_filter = InternalFilter
@@ -11,6 +18,9 @@ internal_filter = InternalFilter
 def _internal_ordering(sorting_field: str):
     fields = sorting_field.strip("-").split(".")
 
+    if len(fields) == 1:
+        return operator.attrgetter(fields[0])
+
     def _internal_ordering_wrapper(item: BaseModel):
         current = find_model_value(fields=fields, model=item)
 
@@ -19,33 +29,144 @@ def _internal_ordering(sorting_field: str):
     return _internal_ordering_wrapper
 
 
-@specification
-def internal_order(*clauses: str, query: QueryT, **_) -> Iterable[BaseModel]:
-    if isinstance(query, str):
-        return query
+class _ReversedKey:
+    """Sorting key that inverts the comparison of the values that cannot be negated."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other: "_ReversedKey"):
+        return self.value == other.value
+
+    def __lt__(self, other: "_ReversedKey"):
+        return other.value < self.value
+
+    def __gt__(self, other: "_ReversedKey"):
+        return other.value > self.value
+
+
+def _reversed_ordering(sorting_field: str):
+    get_value = _internal_ordering(sorting_field=sorting_field)
+
+    def _reversed_ordering_wrapper(item: BaseModel):
+        value = get_value(item)
+        # Pydantic validates the fields, so all the values of the field are negated or wrapped in the same way
+        return -value if type(value) in (int, float) else _ReversedKey(value)
+
+    return _reversed_ordering_wrapper
+
+
+@lru_cache(maxsize=256)
+def _get_sorting_key(clauses: tuple[str, ...]) -> tuple[Callable[[BaseModel], Any], bool]:
+    """
+    Creates one key for all the clauses, so the models are sorted in a single pass.
+    The first clause is the most important one, just like ORDER BY in SQL.
+    Returns the key and whether the models must be sorted in the reverse order.
+    """
+    directions = {field.startswith("-") for field in clauses}
+
+    if len(directions) == 1:
+        reverse = directions.pop()
+        keys = [_internal_ordering(sorting_field=field) for field in clauses]
+    else:
+        reverse = False
+        keys = [
+            _reversed_ordering(sorting_field=field)
+            if field.startswith("-")
+            else _internal_ordering(sorting_field=field)
+            for field in clauses
+        ]
+
+    if len(keys) == 1:
+        return keys[0], reverse
+
+    return (lambda model: tuple(get_key(model) for get_key in keys)), reverse
+
+
+def _find_sorted_models(sorting_field: str, query: SessionValues) -> Iterator[BaseModel] | None:
+    """Returns all the models of the session if the session can sort them by the field without sort()."""
+    find_sorted_keys = getattr(query.session, "find_sorted_keys", None)
+    if find_sorted_keys is None:
+        return None
+
+    field = sorting_field.strip("-").replace(".", FILTERING_OPTIONS_SEPARATOR)
+    keys = find_sorted_keys(field, sorting_field.startswith("-"))
+    if keys is None:
+        return None
+
+    return iter(SessionModels(session=query.session, keys=keys))  # models deleted by other threads are skipped
+
 
-    query = list(query)
-    for field in clauses:
-        query.sort(
-            key=_internal_ordering(sorting_field=field),
-            reverse=field.startswith("-"),
+class OrderedQuery:
+    """
+    Models that are sorted only when we iterate over them. That allows internal_paginate()
+    to find the first models with a heap instead of sorting all of them.
+    """
+
+    def __init__(self, query: Iterable[BaseModel], clauses: tuple[str, ...]):
+        self.query = query
+        self.clauses = clauses
+
+    def sort(self, limit: int | None = None) -> Iterable[BaseModel]:
+        """Returns sorted models. If the limit is provided, only the first models are returned."""
+        if not self.clauses:
+            return self.query if limit is None else islice(self.query, limit)
+        elif len(self.clauses) == 1 and isinstance(self.query, SessionValues):
+            sorted_models = _find_sorted_models(sorting_field=self.clauses[0], query=self.query)
+            if sorted_models is not None:
+                return sorted_models if limit is None else islice(sorted_models, limit)
+
+        # Query or its session may sort the models faster, for example, in many processes
+        sort_models = getattr(
+            self.query.session if isinstance(self.query, SessionValues) else self.query, "sort_models", None
         )
+        sorted_models = None if sort_models is None else sort_models(self.clauses, limit)
+        if sorted_models is not None:
+            return sorted_models
 
-    return query
+        key, reverse = _get_sorting_key(self.clauses)
+
+        if limit is not None:
+            find_first = heapq.nlargest if reverse else heapq.nsmallest
+            return find_first(limit, self.query, key=key)
+
+        return sorted(self.query, key=key, reverse=reverse)
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        return iter(self.sort())
 
 
 @specification
-def internal_paginate(
-    *,
-    query: QueryT,
-    limit: Optional[int] = None,
-    offset: Optional[int] = None,
-    **_,
-) -> Iterable[BaseModel]:
+def internal_order(*clauses: str, query: QueryT, **_) -> Iterable[BaseModel]:
     if isinstance(query, str):
         return query
 
-    return list(query)[offset:limit]
+    return OrderedQuery(query=query, clauses=clauses)
+
+
+class InternalPaginate(Specification):
+    """Returns the models from offset to offset + limit. The limit and the offset may be used by the repositories."""
+
+    def __init__(self, *, limit: int | None = None, offset: int | None = None):
+        self.limit = limit
+        self.offset = offset
+
+    def __call__(self, query: QueryT, **_) -> Iterable[BaseModel]:
+        if isinstance(query, str):
+            return query
+
+        offset = self.offset or 0
+        if self.limit is None:
+            return list(query)[offset:]
+        elif isinstance(query, OrderedQuery):  # we only sort the models that are going to be returned
+            query = query.sort(limit=offset + self.limit)
+
+        return list(islice(query, offset, offset + self.limit))
+
+
+internal_paginate = InternalPaginate
 
 
 @specification
@@ -53,13 +174,32 @@ def internal_join(*targets: Collection, query: QueryT, **join_args: dict) -> Que
     return query
 
 
-@specification
-def internal_only(*only_fields: Iterable[str], query: QueryT, **_) -> Iterable[BaseModel]:
+class InternalOnly(Specification):
     """
     This specification will do nothing since we waste more resources trying to remove all the fields.
     Also, we must provide a deference mechanisms for fields to be loaded which is impossible.
+    The fields are kept, so the repositories that can load only some fields may find them with get_only_fields().
     """
-    return query
+
+    def __init__(self, *only_fields: str):
+        self.only_fields = only_fields
+
+    def __call__(self, query: QueryT, **_) -> Iterable[BaseModel]:
+        return query
+
+
+internal_only = InternalOnly
+
+
+def get_only_fields(*specifications) -> tuple[str, ...] | None:
+    """Returns the fields of the only() specifications, or None if there are no such specifications."""
+    only_fields = None
+
+    for only_specification in specifications:
+        if isinstance(only_specification, InternalOnly):
+            only_fields = (*(only_fields or ()), *only_specification.only_fields)
+
+    return only_fields
 
 
 class InternalSpecificationList(SpecificationList):
@@ -74,8 +214,12 @@ __all__ = [
     "internal_filter",
     "InternalFilter",
     "internal_order",
+    "OrderedQuery",
     "internal_paginate",
+    "InternalPaginate",
     "internal_join",
     "internal_only",
+    "InternalOnly",
+    "get_only_fields",
     "InternalSpecificationList",
 ]
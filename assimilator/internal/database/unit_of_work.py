@@ -1,8 +1,9 @@
-from copy import deepcopy
 from typing import Optional
 
 from assimilator.core.database import UnitOfWork, Repository
 from assimilator.internal.database.error_wrapper import InternalErrorWrapper
+from assimilator.internal.database.session import InternalTransaction
+from assimilator.internal.database.persistence import InternalStorage
 from assimilator.core.patterns import ErrorWrapper
 
 
@@ -12,26 +13,31 @@ class InternalUnitOfWork(UnitOfWork):
         repository: Repository,
         error_wrapper: Optional[ErrorWrapper] = None,
         autocommit: bool = False,
+        storage: InternalStorage | None = None,
     ):
         super(InternalUnitOfWork, self).__init__(
             repository=repository,
             error_wrapper=error_wrapper or InternalErrorWrapper(),
             autocommit=autocommit,
         )
+        self.storage = storage
         self._saved_data: Optional[dict] = None
 
     def begin(self):
         self._saved_data = self.repository.session
-        self.repository.session = deepcopy(self._saved_data)
+        self.repository.session = InternalTransaction(session=self._saved_data)
 
     def rollback(self):
         self.repository.session = self._saved_data
 
     def commit(self):
-        self._saved_data.update(self.repository.session)
+        transaction = self.repository.session
 
-        for deleted_key in set(self._saved_data.keys()) - set(self.repository.session.keys()):
-            del self._saved_data[deleted_key]
+        if isinstance(transaction, InternalTransaction):
+            if self.storage is None:
+                transaction.commit()
+            else:
+                self.storage.commit(transaction)
 
         self.repository.session = self._saved_data
 
@@ -0,0 +1,139 @@
+from collections.abc import Callable, Hashable, Iterable, MutableMapping
+from typing import Any
+
+from assimilator.core.database import AdaptiveFilter
+from assimilator.core.database.models import BaseModel
+from assimilator.internal.database.indexes import SortedKeyList
+from assimilator.internal.database.session import InternalTransaction, SessionModels, SessionValues
+from assimilator.internal.database.specifications.filter_specifications import InternalFilter
+from assimilator.internal.database.specifications.specifications import _get_sorting_key, internal_order
+
+_MISSING = object()
+
+
+class MaterializedView:
+    """
+    Named result of the filters and the ordering that is kept up to date by the session.
+    Every saved model is checked with the filters once, and the keys of the found models are kept
+    sorted, so reading the view only loads the models that are in it.
+
+    Like the indexes, the view only sees the changes that go through the session, so save
+    the models again after you change them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *filters: InternalFilter | AdaptiveFilter | Callable[[BaseModel], bool],
+        order: Iterable[str] = (),
+    ):
+        """
+        :param name: name that is used to read the view.
+        :param filters: filter specifications or functions that the models in the view must satisfy.
+        :param order: clauses of internal_order() that sort the models in the view.
+        """
+        self.name = name
+        self.filter = InternalFilter()
+
+        for filter_ in filters:
+            if not isinstance(filter_, (InternalFilter, AdaptiveFilter)):
+                filter_ = InternalFilter(filter_)
+
+            self.filter = self.filter & filter_
+
+        self.order = tuple(order)
+        self._sorting_key, self.reverse = _get_sorting_key(self.order) if self.order else (None, False)
+
+        self._found_keys: dict[Hashable, Any] = {}  # keys of the models in the view and their sorting values
+        self._sorted_keys = SortedKeyList()
+        self._sorted = True  # False when the sorting values cannot be compared, so we sort them when we read them
+
+    def add(self, key: Hashable, model: BaseModel) -> None:
+        predicate = self.filter.predicate
+
+        try:
+            found = predicate is None or predicate(model)
+            value = None if self._sorting_key is None else self._sorting_key(model)
+        except (AttributeError, TypeError):  # model does not have the fields of the view
+            found = False
+
+        if not found:
+            self._discard(key)
+            return
+        elif self._sorting_key is None:
+            self._found_keys[key] = None  # saved models keep their position in the view
+            return
+
+        self._discard(key)
+        self._found_keys[key] = value
+
+        if not self._sorted:
+            return
+
+        try:
+            self._sorted_keys.check(value)
+        except TypeError:
+            self._sorted = False
+            self._sorted_keys.clear()
+            return
+
+        self._sorted_keys.add(key=key, value=value)
+
+    def remove(self, key: Hashable) -> None:
+        """Removes the key of the model that was deleted from the session."""
+        self._discard(key)
+        self._sorted_keys.forget(key)
+
+    def _discard(self, key: Hashable) -> None:
+        value = self._found_keys.pop(key, _MISSING)
+
+        if value is _MISSING or self._sorting_key is None or not self._sorted:
+            return
+
+        self._sorted_keys.remove(key=key, value=value)
+
+    def clear(self) -> None:
+        self._found_keys.clear()
+        self._sorted_keys.clear()
+        self._sorted = True
+
+    def keys(self) -> list[Hashable]:
+        """Returns the keys of the models in the view in the order of the view."""
+        if self._sorting_key is None:
+            return list(self._found_keys)
+        elif not self._sorted:
+            return sorted(self._found_keys, key=self._found_keys.__getitem__, reverse=self.reverse)
+
+        return list(reversed(self._sorted_keys) if self.reverse else self._sorted_keys)
+
+    def query(self, session: MutableMapping) -> Iterable[BaseModel]:
+        """
+        Returns the models of the view from the session. Transactions with changes are not in the view yet,
+        so we find the models of the view in them with the filters and the ordering.
+        """
+        if isinstance(session, InternalTransaction) and session.changes:
+            query = self.filter(SessionValues(session))
+            return internal_order(*self.order)(query=query) if self.order else query
+        elif isinstance(session, InternalTransaction):
+            session = session.session
+
+        lock = getattr(session, "lock", None)
+        if lock is None:
+            return SessionModels(session=session, keys=self.keys())
+
+        with lock.read():
+            return SessionModels(session=session, keys=self.keys())
+
+    def __len__(self) -> int:
+        return len(self._found_keys)
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.name})"
+
+    def __repr__(self):
+        return str(self)
+
+
+__all__ = [
+    "MaterializedView",
+]
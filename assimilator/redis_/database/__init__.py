@@ -1,3 +1,4 @@
+from assimilator.redis_.database.indexes import *
 from assimilator.redis_.database.models import *
 from assimilator.redis_.database.repository import *
 from assimilator.redis_.database.unit_of_work import *
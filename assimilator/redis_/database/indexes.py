@@ -0,0 +1,193 @@
+import json
+import math
+import operator
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from pydantic.fields import SHAPE_SINGLETON
+from redis import Redis
+
+from assimilator.core.database.models import BaseModel
+from assimilator.core.database.specifications.filtering_options import FILTERING_OPTIONS_SEPARATOR
+from assimilator.internal.database.specifications.utils import InternalContainers, find_model_value
+
+MAX_EXACT_SCORE = 2**53  # larger integers lose precision in the scores of sorted sets
+
+
+def encode_value(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+def get_score(value: Any) -> float | None:
+    """Returns the score of the value in the sorted set, or None if the value cannot be stored there."""
+    if isinstance(value, (int, float)):
+        if math.isnan(value) or (isinstance(value, int) and abs(value) > MAX_EXACT_SCORE):
+            return None
+
+        return float(value)
+    elif isinstance(value, datetime):
+        return value.timestamp()
+    elif isinstance(value, date):
+        return datetime.combine(value, time()).timestamp()
+    elif isinstance(value, timedelta):
+        return value.total_seconds()
+
+    return None
+
+
+def validate_value(model: type[BaseModel], field: str, value: Any) -> tuple[Any, bool]:
+    """
+    Validates the value of the filter with the field of the model, so it is encoded the same way
+    as the values of the saved models. For example, 10 is found as 10.0 in the index of a float field.
+    Returns False if the value is not valid for the field, so the index cannot be used.
+    """
+    model_field = None
+    current_model = model
+
+    for field_name in field.split(FILTERING_OPTIONS_SEPARATOR):
+        model_field = getattr(current_model, "__fields__", {}).get(field_name)
+        if model_field is None:
+            return value, False
+
+        current_model = model_field.type_
+
+    if model_field.shape != SHAPE_SINGLETON:  # filters of the lists are checked with their members
+        if not model_field.sub_fields:
+            return value, False
+
+        model_field = model_field.sub_fields[0]
+
+    validated_value, errors = model_field.validate(value, {}, loc=field)
+    return validated_value, not errors
+
+
+class RedisIndex(ABC):
+    """
+    Index of the field of the models that is stored in Redis. Indexes are changed by the Lua scripts
+    that save and delete the models, so the old values of the models are read in the same atomic step.
+    Indexes only return the ids of the candidates, so the found models are still checked with the filters.
+    """
+
+    kind: str
+    operations: tuple = ()
+
+    def __init__(self, field: str):
+        self.field = field
+        self._fields = field.split(FILTERING_OPTIONS_SEPARATOR)
+
+    def get_key(self, key_prefix: str) -> str:
+        return f"{key_prefix}.{self.kind}:{self.field}"
+
+    def get_values(self, model: BaseModel) -> tuple | None:
+        """Returns the values that the model is indexed by, or None if the model does not have the field."""
+        try:
+            if len(self._fields) == 1:
+                return (getattr(model, self._fields[0]),)
+
+            model_val = find_model_value(fields=self._fields, model=model)
+        except AttributeError:
+            return None
+
+        if isinstance(model_val, InternalContainers):
+            return tuple(model_val)
+
+        return (model_val,)
+
+    def dump(self, key_prefix: str, model: BaseModel | None = None) -> dict:
+        """
+        Returns the index for the Lua scripts with the new values of the model. If there is no model,
+        the scripts only need the key of the index to remove the models from it.
+        """
+        return {"kind": self.kind, "key": self.get_key(key_prefix)}
+
+    @abstractmethod
+    def lookup(self, session: Redis, key_prefix: str, operation: Callable, value: Any) -> set | None:
+        """Returns the ids of the models that may satisfy the filter, or None if the index cannot be used."""
+        raise NotImplementedError("lookup() is not implemented in the index")
+
+    def __str__(self):
+        return f"{type(self).__name__}({self.field})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class RedisHashIndex(RedisIndex):
+    """
+    Stores the ids of the models in a Redis set for every value of the field, so eq filters are found
+    with SINTER. Indexed values of every model are kept in a hash, so the model can be removed from its sets.
+    """
+
+    kind = "hash"
+    operations = (operator.eq,)
+
+    def get_set_key(self, key_prefix: str, encoded_value: str) -> str:
+        return f"{self.get_key(key_prefix)}:{encoded_value}"
+
+    def dump(self, key_prefix: str, model: BaseModel | None = None) -> dict:
+        arguments = super().dump(key_prefix)
+        if model is None:
+            return arguments
+
+        values = self.get_values(model)
+        new_values = [] if values is None else list(dict.fromkeys(encode_value(value) for value in values))
+        arguments["values"] = new_values
+        arguments["encoded"] = json.dumps(new_values)  # compared with the saved values, so the sets are not changed
+        return arguments
+
+    def lookup(self, session: Redis, key_prefix: str, operation: Callable, value: Any) -> set | None:
+        if operation not in self.operations:
+            return None
+
+        return session.smembers(self.get_set_key(key_prefix, encode_value(value)))
+
+
+class RedisSortedIndex(RedisIndex):
+    """
+    Stores the ids of the models in a Redis sorted set with the values of the field as scores, so range
+    filters(gt, gte, lt, lte) and eq are found with ZRANGEBYSCORE. Numbers, dates and timedeltas are indexed.
+    Models with other values, None or many values are stored in a separate set, and they are always checked.
+    """
+
+    kind = "sorted"
+    operations = (operator.eq, operator.gt, operator.ge, operator.lt, operator.le)
+
+    def get_unindexed_key(self, key_prefix: str) -> str:
+        return f"{self.get_key(key_prefix)}:unindexed"
+
+    def dump(self, key_prefix: str, model: BaseModel | None = None) -> dict:
+        arguments = super().dump(key_prefix)
+        if model is None:
+            return arguments
+
+        values = self.get_values(model)
+        score = get_score(values[0]) if values is not None and len(values) == 1 else None
+        if score is not None:
+            arguments["score"] = repr(score)  # Lua would round the numbers to 14 digits
+
+        return arguments
+
+    def lookup(self, session: Redis, key_prefix: str, operation: Callable, value: Any) -> set | None:
+        score = get_score(value)
+        if operation not in self.operations or score is None:
+            return None
+
+        # Bounds are always inclusive, so rounded scores still find all the candidates
+        min_score = score if operation in (operator.eq, operator.gt, operator.ge) else "-inf"
+        max_score = score if operation in (operator.eq, operator.lt, operator.le) else "+inf"
+
+        pipeline = session.pipeline(transaction=False)
+        pipeline.zrangebyscore(self.get_key(key_prefix), min_score, max_score)
+        pipeline.smembers(self.get_unindexed_key(key_prefix))
+        found_ids, unindexed_ids = pipeline.execute()
+        return {*found_ids, *unindexed_ids}
+
+
+__all__ = [
+    "RedisHashIndex",
+    "RedisIndex",
+    "RedisSortedIndex",
+    "validate_value",
+]
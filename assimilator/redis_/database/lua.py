@@ -0,0 +1,539 @@
+import json
+import math
+import operator
+import re
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from pydantic.fields import SHAPE_SINGLETON
+
+from assimilator.core.database import SpecificationType
+from assimilator.core.database.models import BaseModel
+from assimilator.core.database.specifications.filtering_options import FILTERING_OPTIONS_SEPARATOR
+from assimilator.internal.database import InternalFilter, InternalOnly, InternalPaginate
+from assimilator.internal.database.specifications.internal_operator import match_regex
+
+# Checks the models on the server with cjson, so only the found models are sent to the client.
+# KEYS are the keys of the models, ARGV[1] is the JSON query that is created by compile_query().
+FILTER_SCRIPT = """
+local unpack = unpack or table.unpack
+local query = cjson.decode(ARGV[1])
+local skip = query.skip
+local limit = query.limit
+local matched = 0
+local results = {}
+
+local function is_array(value)
+    return type(value) == "table" and (#value > 0 or next(value) == nil)
+end
+
+local function normalize(value)
+    if type(value) == "boolean" then
+        return value and 1 or 0
+    end
+    return value
+end
+
+local function has_newline(value, first, last)
+    return string.find(string.sub(value, first, last), "\\n", 1, true) ~= nil
+end
+
+-- like patterns are literal parts with .*? between them. The dot of the regex does not match newlines
+local function match_parts(value, parts)
+    local count = #parts
+    if count == 1 then
+        return value == parts[1]
+    end
+
+    local first, last = parts[1], parts[count]
+    if string.sub(value, 1, #first) ~= first then
+        return false
+    end
+
+    local position = #first + 1
+    for i = 2, count - 1 do
+        local found = string.find(value, parts[i], position, true)
+        if found == nil or has_newline(value, position, found - 1) then
+            return false
+        end
+        position = found + #parts[i]
+    end
+
+    local last_start = #value - #last + 1
+    if last_start < position or string.sub(value, last_start) ~= last then
+        return false
+    end
+    return not has_newline(value, position, last_start - 1)
+end
+
+local function match_like(value, parts)
+    if type(value) ~= "string" then
+        return false
+    elseif string.sub(value, -1) == "\\n" and match_parts(string.sub(value, 1, -2), parts) then
+        return true -- $ of the regex also matches before the last newline
+    end
+    return match_parts(value, parts)
+end
+
+-- Python compares the strings by their code points, and UTF-8 bytes are in the same order.
+-- < of Lua strings uses the locale of the server, so the bytes are compared instead
+local function compare_strings(value, expected)
+    if value == expected then
+        return 0
+    end
+
+    for i = 1, math.min(#value, #expected) do
+        local value_byte, expected_byte = string.byte(value, i), string.byte(expected, i)
+        if value_byte ~= expected_byte then
+            return value_byte < expected_byte and -1 or 1
+        end
+    end
+    return #value < #expected and -1 or 1
+end
+
+local function compare(value, operation, expected)
+    if operation == "like" then
+        return match_like(value, expected)
+    end
+
+    if value == nil then
+        value = cjson.null
+    end
+    if value == cjson.null or expected == cjson.null then
+        return operation == "eq" and value == expected
+    end
+
+    value, expected = normalize(value), normalize(expected)
+    if type(value) ~= type(expected) or type(value) == "table" then
+        return false
+    elseif operation == "eq" then
+        return value == expected
+    end
+
+    local order
+    if type(value) == "string" then
+        order = compare_strings(value, expected)
+    else
+        order = value < expected and -1 or (value > expected and 1 or 0)
+    end
+
+    if operation == "gt" then
+        return order > 0
+    elseif operation == "ge" then
+        return order >= 0
+    elseif operation == "lt" then
+        return order < 0
+    elseif operation == "le" then
+        return order <= 0
+    end
+    return false
+end
+
+-- Foreign fields are found the same way as find_model_value() does it, and lists match if any member matches
+local function check(document, path, operation, expected)
+    local value = document
+    for _, field in ipairs(path) do
+        if is_array(value) then
+            local members = {}
+            for _, member in ipairs(value) do
+                if type(member) == "table" and member[field] ~= nil then
+                    table.insert(members, member[field])
+                end
+            end
+            value = members
+        elseif type(value) == "table" then
+            value = value[field]
+        else
+            return false
+        end
+    end
+
+    if #path > 1 and is_array(value) then
+        for _, member in ipairs(value) do
+            if compare(member, operation, expected) then
+                return true
+            end
+        end
+        return false
+    end
+    return compare(value, operation, expected)
+end
+
+local function load(key)
+    if not query.hashes then
+        local raw = redis.call("GET", key)
+        if not raw then
+            return nil, nil
+        end
+        return cjson.decode(raw), raw
+    end
+
+    local values = {}
+    if query.fields ~= cjson.null then
+        local found = redis.call("HMGET", key, unpack(query.fields))
+        for i, field in ipairs(query.fields) do
+            if found[i] then
+                table.insert(values, field)
+                table.insert(values, found[i])
+            end
+        end
+    else
+        values = redis.call("HGETALL", key)
+    end
+
+    if #values == 0 then
+        return nil, nil
+    end
+
+    local document = {}
+    for i = 1, #values, 2 do
+        document[values[i]] = cjson.decode(values[i + 1])
+    end
+    return document, values
+end
+
+for _, key in ipairs(KEYS) do
+    local document, raw = load(key)
+    local found = document ~= nil
+
+    if found then
+        for _, filter in ipairs(query.filters) do
+            if not check(document, filter[1], filter[2], filter[3]) then
+                found = false
+                break
+            end
+        end
+    end
+
+    if found then
+        matched = matched + 1
+        if matched > skip and not query.count then
+            table.insert(results, raw)
+            if limit >= 0 and #results >= limit then
+                break
+            end
+        end
+    end
+end
+
+return {matched, results}
+"""
+
+# Functions of the scripts that change the models. Old values of the models are read from the indexes
+# in the same script, so the indexes are correct even if the model is saved twice in one transaction.
+# Indexes are the JSON of RedisIndex.dump(), and the scores are strings, so Lua does not round them.
+INDEX_FUNCTIONS = """
+if redis.replicate_commands then
+    redis.replicate_commands() -- TIME is called between the writes in old versions of Redis
+end
+
+local function remove_from_indexes(indexes, id)
+    for _, index in ipairs(indexes) do
+        if index.kind == "hash" then
+            local old = redis.call("HGET", index.key, id)
+            if old then
+                for _, value in ipairs(cjson.decode(old)) do
+                    redis.call("SREM", index.key .. ":" .. value, id)
+                end
+                redis.call("HDEL", index.key, id)
+            end
+        else
+            redis.call("ZREM", index.key, id)
+            redis.call("SREM", index.key .. ":unindexed", id)
+        end
+    end
+end
+
+local function add_to_indexes(indexes, id)
+    for _, index in ipairs(indexes) do
+        if index.kind == "hash" then
+            local old = redis.call("HGET", index.key, id)
+            if old ~= index.encoded then -- the sets are not changed if the model is saved with the same values
+                if old then
+                    for _, value in ipairs(cjson.decode(old)) do
+                        redis.call("SREM", index.key .. ":" .. value, id)
+                    end
+                end
+                for _, value in ipairs(index.values) do
+                    redis.call("SADD", index.key .. ":" .. value, id)
+                end
+                redis.call("HSET", index.key, id, index.encoded)
+            end
+        elseif index.score then
+            redis.call("ZADD", index.key, index.score, id)
+            redis.call("SREM", index.key .. ":unindexed", id)
+        else
+            redis.call("ZREM", index.key, id)
+            redis.call("SADD", index.key .. ":unindexed", id)
+        end
+    end
+end
+
+local function remove_model(ids_key, deadlines_key, indexes, id)
+    redis.call("SREM", ids_key, id)
+    redis.call("ZREM", deadlines_key, id)
+    remove_from_indexes(indexes, id)
+end
+"""
+
+# Saves the model, adds it to the set of the ids and changes the indexes in one step, so only_create
+# and only_update do not add the models that were not saved. Deadlines of the models that expire are stored
+# in a sorted set, so count() does not count them. KEYS are the key of the model, the set of the ids,
+# the sorted set of the deadlines and the keys of the indexes. The sets are only used with the key prefix.
+# Sets of the old values of the indexes are only known in the script, so the keys must share the hash tag
+# of the prefix on Redis Cluster. ARGV[1] is the JSON of RedisRepository._run_save_script().
+# If there is no value and no hash, only the indexes of the model are changed.
+SAVE_SCRIPT = (
+    INDEX_FUNCTIONS
+    + """
+local unpack = unpack or table.unpack
+local args = cjson.decode(ARGV[1])
+local key = KEYS[1]
+local exists = redis.call("EXISTS", key) == 1
+
+if (args.nx and exists) or (args.xx and not exists) then
+    return 0
+end
+
+if args.value then
+    local command = {"SET", key, args.value}
+    if args.ex then
+        table.insert(command, "EX")
+        table.insert(command, args.ex)
+    elseif args.px then
+        table.insert(command, "PX")
+        table.insert(command, args.px)
+    elseif args.keepttl then
+        table.insert(command, "KEEPTTL")
+    end
+    redis.call(unpack(command))
+elseif args.hash then
+    local mapping = {}
+    for field, value in pairs(args.hash) do
+        table.insert(mapping, field)
+        table.insert(mapping, value)
+    end
+    if #mapping > 0 then
+        redis.call("HSET", key, unpack(mapping))
+    end
+
+    if args.ex then
+        redis.call("EXPIRE", key, args.ex)
+    elseif args.px then
+        redis.call("PEXPIRE", key, args.px)
+    elseif not args.keepttl then
+        redis.call("PERSIST", key)
+    end
+end
+
+if KEYS[2] then
+    redis.call("SADD", KEYS[2], args.id)
+
+    local ttl = redis.call("PTTL", key)
+    if ttl >= 0 then
+        local now = redis.call("TIME")
+        redis.call("ZADD", KEYS[3], now[1] * 1000 + math.floor(now[2] / 1000) + ttl, args.id)
+    else
+        redis.call("ZREM", KEYS[3], args.id)
+    end
+end
+
+add_to_indexes(args.indexes, args.id)
+return 1
+"""
+)
+
+# Removes the models from the set of the ids, the sorted set of the deadlines and the indexes.
+# KEYS are the set of the ids, the sorted set of the deadlines, the keys of the models and the keys of the indexes.
+# ARGV[1] is the JSON list of the indexes, ARGV[2] is "missing" if only the models whose keys do not exist
+# are removed, and the rest of ARGV are the ids of the models in the order of their keys.
+DELETE_SCRIPT = (
+    INDEX_FUNCTIONS
+    + """
+local indexes = cjson.decode(ARGV[1])
+local only_missing = ARGV[2] == "missing"
+local deleted = 0
+
+for i = 3, #ARGV do
+    local key = KEYS[i]
+    if not only_missing or redis.call("EXISTS", key) == 0 then
+        deleted = deleted + redis.call("DEL", key)
+        remove_model(KEYS[1], KEYS[2], indexes, ARGV[i])
+    end
+end
+return deleted
+"""
+)
+
+# Removes the models that have expired from the set of the ids, the sorted set of the deadlines and the indexes,
+# and returns their number. KEYS are the set of the ids, the sorted set of the deadlines and the keys of
+# the indexes. ARGV[1] is the key prefix and ARGV[2] is the JSON list of the indexes. Keys of the expired models
+# are only known in the script, so they must share the hash tag of the prefix on Redis Cluster.
+EXPIRE_SCRIPT = (
+    INDEX_FUNCTIONS
+    + """
+local indexes = cjson.decode(ARGV[2])
+local now = redis.call("TIME")
+local expired = redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", now[1] * 1000 + math.floor(now[2] / 1000))
+local removed = 0
+
+for _, id in ipairs(expired) do
+    if redis.call("EXISTS", ARGV[1] .. ":" .. id) == 0 then
+        remove_model(KEYS[1], KEYS[2], indexes, id)
+        removed = removed + 1
+    end
+end
+return removed
+"""
+)
+
+MAX_EXACT_NUMBER = 2**53  # numbers of Lua are doubles
+
+OPERATIONS = {
+    operator.eq: "eq",
+    operator.gt: "gt",
+    operator.ge: "ge",
+    operator.lt: "lt",
+    operator.le: "le",
+    match_regex: "like",
+}
+REGEX_CHARACTERS = set(".^$*+?{}[]\\|()")
+SIMPLE_TYPES = (str, int, float, bool)
+
+
+def _compile_like(pattern: Any) -> list[str] | None:
+    """Returns the literal parts of the like pattern, or None if the regex cannot be checked with them."""
+    if not isinstance(pattern, re.Pattern) or not isinstance(pattern.pattern, str) or pattern.flags != re.UNICODE:
+        return None
+
+    source = pattern.pattern
+    if not (source.startswith("^") and source.endswith("$")):
+        return None
+
+    parts = source[1:-1].split(".*?")
+    if any(REGEX_CHARACTERS.intersection(part) for part in parts):
+        return None
+
+    return parts
+
+
+def _compile_value(operation: str, value: Any) -> bool:
+    if value is None:
+        return operation == "eq"
+    elif isinstance(value, float):
+        return not math.isnan(value) and not math.isinf(value)
+    elif isinstance(value, int):
+        return abs(value) <= MAX_EXACT_NUMBER
+
+    return isinstance(value, (str, bool))
+
+
+def _is_simple_field(model: type[BaseModel], path: list[str]) -> bool:
+    """
+    Checks that the values of the field are JSON strings, numbers or booleans, so Lua compares them
+    the same way as Python. Other types, like dates, are saved as strings and must be checked in Python.
+    """
+    current_model = model
+
+    for field_name in path:
+        field = getattr(current_model, "__fields__", {}).get(field_name)
+        if field is None:
+            return False
+
+        current_model = field.type_
+
+    if len(path) == 1 and field.shape != SHAPE_SINGLETON:
+        return False
+
+    return current_model in SIMPLE_TYPES
+
+
+def _compile_filter(model: type[BaseModel], filter_func: Callable) -> list | None:
+    field = getattr(filter_func, "field", None)
+    operation = OPERATIONS.get(getattr(filter_func, "operation", None))
+    if field is None or operation is None:
+        return None
+
+    path = field.split(FILTERING_OPTIONS_SEPARATOR)
+    if not _is_simple_field(model, path):
+        return None
+
+    if operation == "like":
+        value = _compile_like(filter_func.value)
+        return None if value is None else [path, operation, value]
+    elif not _compile_value(operation, filter_func.value):
+        return None
+
+    return [path, operation, filter_func.value]
+
+
+class LuaQuery:
+    """Filters, pagination and loaded fields of the query that is checked with FILTER_SCRIPT."""
+
+    def __init__(self, filters: list[list], limit: int | None, offset: int):
+        self.filters = filters
+        self.limit = limit
+        self.offset = offset
+
+    def dumps(
+        self,
+        skip: int,
+        limit: int | None,
+        use_hashes: bool,
+        fields: list[str] | None = None,
+        count: bool = False,
+    ) -> str:
+        return json.dumps(
+            {
+                "filters": self.filters,
+                "skip": skip,
+                "limit": -1 if limit is None else limit,
+                "hashes": use_hashes,
+                "fields": fields,
+                "count": count,
+            }
+        )
+
+
+def compile_query(model: type[BaseModel], specifications: Iterable[SpecificationType]) -> LuaQuery | None:
+    """
+    Creates the query for FILTER_SCRIPT from eq, gt, gte, lt, lte and like filters, only() and one paginate()
+    that must be the last specification. Returns None if some specification cannot be checked in Lua,
+    so the models must be checked in Python.
+    """
+    filters = []
+    pagination = None
+
+    for specification in specifications:
+        if pagination is not None:  # specifications after paginate() are applied to the page
+            return None
+        elif isinstance(specification, InternalFilter):
+            if specification.text_filters or specification.keys is not None:
+                return None
+
+            for filter_func in specification.filters:
+                compiled_filter = _compile_filter(model, filter_func)
+                if compiled_filter is None:
+                    return None
+
+                filters.append(compiled_filter)
+
+        elif isinstance(specification, InternalPaginate):
+            pagination = specification
+        elif not isinstance(specification, InternalOnly):
+            return None
+
+    if pagination is None:
+        return LuaQuery(filters=filters, limit=None, offset=0)
+
+    return LuaQuery(filters=filters, limit=pagination.limit, offset=pagination.offset or 0)
+
+
+__all__ = [
+    "DELETE_SCRIPT",
+    "EXPIRE_SCRIPT",
+    "FILTER_SCRIPT",
+    "SAVE_SCRIPT",
+    "LuaQuery",
+    "compile_query",
+]
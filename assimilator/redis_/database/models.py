@@ -11,6 +11,8 @@ class RedisModel(BaseModel):
     keep_ttl: Optional[bool] = False
 
     class AssimilatorConfig:
+        key_prefix: str | None = None  # models are saved in "{key_prefix}:{id}" keys and counted in a set
+        use_hashes: bool = False  # models are saved as Redis hashes with a field for every field of the model
         exclude = {
             "expire_in": True,
             "expire_in_px": True,
@@ -1,16 +1,41 @@
 import json
-from collections.abc import Iterable, Sized
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from itertools import islice
 from typing import List, Optional, TypeVar, cast
 
+from pydantic import ValidationError
 from redis import Redis
 from redis.client import Pipeline
 from redis.typing import KeyT
 
 from assimilator.core.database import BaseModel, LazyCommand, Repository, SpecificationType
 from assimilator.core.database.exceptions import DataLayerError, InvalidQueryError, MultipleResultsError, NotFoundError
+from assimilator.core.database.specifications.filtering_options import FILTERING_OPTIONS_SEPARATOR
 from assimilator.core.patterns.error_wrapper import ErrorWrapper
-from assimilator.internal.database import InternalSpecificationList
+from assimilator.internal.database import (
+    HashIndex,
+    InternalFilter,
+    InternalSpecificationList,
+    SortedIndex,
+    get_only_fields,
+    get_primary_keys,
+)
 from assimilator.internal.database.models_utils import dict_to_internal_models
+from assimilator.redis_.database.indexes import (
+    RedisHashIndex,
+    RedisIndex,
+    RedisSortedIndex,
+    encode_value,
+    validate_value,
+)
+from assimilator.redis_.database.lua import (
+    DELETE_SCRIPT,
+    EXPIRE_SCRIPT,
+    FILTER_SCRIPT,
+    SAVE_SCRIPT,
+    LuaQuery,
+    compile_query,
+)
 
 RedisModelT = TypeVar("RedisModelT", bound=BaseModel)
 
@@ -27,7 +52,32 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         specifications=InternalSpecificationList,
         error_wrapper: Optional[ErrorWrapper] = None,
         use_double_filter: bool = True,
+        scan_count: int = 1000,
+        use_keys_command: bool = False,
+        key_prefix: str | None = None,
+        indexes: Iterable[RedisIndex] | None = None,
+        use_hashes: bool | None = None,
+        use_lua: bool = False,
     ):
+        """
+        :param scan_count: COUNT of every SCAN call and the number of the keys that are loaded with one MGET.
+        :param use_keys_command: find the keys with KEYS instead of SCAN. KEYS blocks the server until all
+        the keys are checked, so only use it with small databases.
+        :param key_prefix: models are stored in the "{key_prefix}:{id}" keys, and their ids are stored in the set
+        with the key_prefix name. Deadlines of the models that expire are stored in the "{key_prefix}.expiration"
+        sorted set, so count() does not count them. AssimilatorConfig.key_prefix of the model is used by default.
+        If there is no prefix, the models are stored in the keys with their ids. The Lua scripts find the keys of
+        the old values of the indexes and of the expired models themselves, so on Redis Cluster the prefix must be
+        a hash tag, like "{users}", to store all the keys of the models in one slot.
+        :param indexes: indexes of the fields that are stored in Redis. AssimilatorConfig.indexes of the model
+        is used by default. Indexes are only used with the key_prefix.
+        :param use_hashes: store the models as Redis hashes with a JSON value for every field, so only()
+        reads the fields with HMGET and update() only writes the changed fields. AssimilatorConfig.use_hashes
+        of the model is used by default.
+        :param use_lua: check eq, gt, gte, lt, lte and like filters, paginate() and only() with a Lua script
+        on the server, so only the found models are sent to the client. The script is only used with the key_prefix,
+        because other keys of the database cannot be read as the models.
+        """
         super(RedisRepository, self).__init__(
             session=session,
             model=model,
@@ -37,6 +87,39 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         )
         self.transaction = session
         self.use_double_specifications = use_double_filter
+        self.scan_count = scan_count
+        self.use_keys_command = use_keys_command
+
+        if key_prefix is None:
+            key_prefix = getattr(getattr(model, "AssimilatorConfig", None), "key_prefix", None)
+
+        self.key_prefix = key_prefix
+        self.indexes: list[RedisIndex] = [] if key_prefix is None else self._create_indexes(indexes)
+
+        if use_hashes is None:
+            use_hashes = getattr(getattr(model, "AssimilatorConfig", None), "use_hashes", False)
+
+        self.use_hashes = use_hashes
+        self.use_lua = use_lua
+        self._filter_script = session.register_script(FILTER_SCRIPT) if use_lua else None  # called with EVALSHA
+        self._save_script = session.register_script(SAVE_SCRIPT)
+        self._delete_script = session.register_script(DELETE_SCRIPT)
+        self._expire_script = session.register_script(EXPIRE_SCRIPT)
+
+    def _create_indexes(self, indexes: Iterable[RedisIndex] | None) -> list[RedisIndex]:
+        if indexes is not None:
+            return list(indexes)
+
+        indexes = getattr(getattr(self.model, "AssimilatorConfig", None), "indexes", None) or ()
+        if not isinstance(indexes, Mapping):  # only field names are provided
+            indexes = dict.fromkeys(indexes, RedisHashIndex)
+
+        index_types = {HashIndex: RedisHashIndex, SortedIndex: RedisSortedIndex}  # same config as internal models
+        return [
+            index_types.get(index_type, index_type)(field)
+            for field, index_type in indexes.items()
+            if issubclass(index_types.get(index_type, index_type), RedisIndex)
+        ]
 
     # type: ignore
     def get(
@@ -45,16 +128,26 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         lazy: bool = False,
         initial_query: Optional[str] = None,
     ) -> LazyCommand[RedisModelT] | RedisModelT:
-        query = self._apply_specifications(query=initial_query, specifications=specifications) or "*"
-        keys = cast(KeyT, self.session.keys(query))
-        found_objects = cast(Iterable, self.session.mget(keys))
+        primary_keys = get_primary_keys(*specifications)
+        fields = self._find_loaded_fields(specifications)
 
-        if not all(found_objects):
-            raise NotFoundError(f"{self} repository get() did not find any results with this query: {query}")
+        if primary_keys is not None:  # models are requested by their ids, so we do not have to search for the keys
+            query = primary_keys
+            found_objects = [found_object for found_object in self._get_by_ids(primary_keys, fields) if found_object]
+        elif (indexed_ids := self._find_indexed_ids(specifications, initial_query)) is not None:
+            query = "indexes"
+            found_objects = [found_object for found_object in self._get_by_ids(indexed_ids, fields) if found_object]
+        elif (lua_query := self._compile_lua_query(specifications, initial_query)) is not None:
+            query = "lua"
+            found_objects = list(islice(self._scan_with_lua(lua_query, fields), 2))
+            specifications = ()  # the script has checked all the specifications
+        else:
+            query = self._apply_specifications(query=initial_query, specifications=specifications) or "*"
+            found_objects = self._scan_values(query, fields)
 
         parsed_objects = list(
             self._apply_specifications(
-                query=[self.model.loads(found_object) for found_object in found_objects],  # type: ignore
+                query=[self._load_model(found_object, fields) for found_object in found_objects],  # type: ignore
                 specifications=specifications,
             )
         )
@@ -72,26 +165,343 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         lazy: bool = False,
         initial_query: Optional[str] = None,
     ) -> LazyCommand[List[RedisModelT]] | List[RedisModelT]:
-        if self.use_double_specifications and specifications:
-            key_name = (
-                self._apply_specifications(
-                    query=initial_query,
-                    specifications=specifications,
-                )
-                or "*"
-            )
+        primary_keys = get_primary_keys(*specifications)
+        fields = self._find_loaded_fields(specifications)
+
+        if primary_keys is not None:
+            models = [model for model in self._get_by_ids(primary_keys, fields) if model is not None]
+        elif (indexed_ids := self._find_indexed_ids(specifications, initial_query)) is not None:
+            models = (model for model in self._get_by_ids(indexed_ids, fields) if model is not None)
+        elif (lua_query := self._compile_lua_query(specifications, initial_query)) is not None:
+            return [self._load_model(value, fields) for value in self._scan_with_lua(lua_query, fields)]
         else:
-            key_name = "*"
-        keys = cast(KeyT, self.session.keys(key_name))
-        models = cast(Iterable, self.session.mget(keys))
+            if self.use_double_specifications and specifications:
+                key_name = (
+                    self._apply_specifications(
+                        query=initial_query,
+                        specifications=specifications,
+                    )
+                    or "*"
+                )
+            else:
+                key_name = "*"
+            models = self._scan_values(key_name, fields)
 
-        if isinstance(self.model, BaseModel):
-            query = [self.model.loads(value) for value in models]
+        # Models are parsed while we read them, so internal_paginate() can stop the scan
+        if self.use_hashes:
+            query = (self._load_model(value, fields) for value in models)
+        elif isinstance(self.model, BaseModel):
+            query = (self.model.loads(value) for value in models)
         else:
-            query = [self.model(**json.loads(value)) for value in models]
+            query = (self.model(**json.loads(value)) for value in models)
 
         return cast(list[RedisModelT], list(self._apply_specifications(specifications=specifications, query=query)))  # type: ignore
 
+    def _find_loaded_fields(self, specifications: Iterable[SpecificationType]) -> list[str] | None:
+        """
+        Returns the fields that must be loaded from the hashes for only(). Fields of the filters are loaded too,
+        so the models can still be checked. Returns None if all the fields must be loaded.
+        """
+        only_fields = get_only_fields(*specifications)
+        if not self.use_hashes or not only_fields:
+            return None
+
+        fields = {"id", *only_fields}
+
+        for specification in specifications:
+            if not isinstance(specification, InternalFilter):
+                continue
+
+            for filter_func in specification.filters:
+                field = getattr(filter_func, "field", None)
+                if field is None:  # we do not know which fields are checked by the function
+                    return None
+
+                fields.add(field.split(FILTERING_OPTIONS_SEPARATOR)[0])
+
+        return [field for field in self.model.__fields__ if field in fields]
+
+    def _load_model(self, value: bytes | dict, fields: list[str] | None = None) -> RedisModelT:
+        if not isinstance(value, dict):
+            return self.model.loads(value)
+
+        data = {field: json.loads(field_value) for field, field_value in value.items() if field_value is not None}
+        if fields is None:
+            return self.model(**data)
+
+        # Only some fields are loaded, so we validate them and create the model without the rest of them
+        validated_values = {}
+        for field_name, field_value in data.items():
+            validated_values[field_name], errors = self.model.__fields__[field_name].validate(
+                field_value, validated_values, loc=field_name
+            )
+            if errors:
+                raise ValidationError([errors], self.model)
+
+        return self.model.construct(_fields_set=set(validated_values), **validated_values)
+
+    def _dump_hash(self, obj: RedisModelT, fields: set | None = None) -> dict:
+        return {field: json.dumps(value) for field, value in json.loads(obj.json(include=fields)).items()}
+
+    def _compile_lua_query(
+        self,
+        specifications: Iterable[SpecificationType],
+        initial_query: str | None,
+    ) -> LuaQuery | None:
+        if not self.use_lua or initial_query or self.key_prefix is None:
+            return None
+
+        return compile_query(self.model, specifications)
+
+    def _scan_with_lua(self, lua_query: LuaQuery, fields: list[str] | None = None) -> Iterator[bytes | dict]:
+        """
+        Checks every chunk of the keys with the script. Skipped and returned models are counted, so the script
+        only sends the models of the page. Hashes are returned as the lists of their fields and values.
+        """
+        skip, limit = lua_query.offset, lua_query.limit
+
+        for keys in self._scan_keys("*"):
+            if limit is not None and limit <= 0:
+                return
+
+            matched, values = self._filter_script(
+                keys=keys,
+                args=[lua_query.dumps(skip=skip, limit=limit, use_hashes=self.use_hashes, fields=fields)],
+            )
+            skip = max(skip - matched, 0)
+
+            if limit is not None:
+                limit -= len(values)
+
+            for value in values:
+                if self.use_hashes:
+                    yield {
+                        self._decode(field): field_value
+                        for field, field_value in zip(value[::2], value[1::2], strict=True)
+                    }
+                else:
+                    yield value
+
+    def _count_with_lua(self, lua_query: LuaQuery) -> int:
+        return sum(
+            self._filter_script(
+                keys=keys, args=[lua_query.dumps(skip=0, limit=None, use_hashes=self.use_hashes, count=True)]
+            )[0]
+            for keys in self._scan_keys("*")
+        )
+
+    def _find_indexed_ids(self, specifications: Iterable[SpecificationType], initial_query: str | None):
+        """
+        Finds the ids of the candidates for the filters with the indexes. Equality filters of the hash indexes
+        are found with one SINTER, and the rest of the indexes are intersected with them. Returns None if
+        the indexes cannot be used, so the keys must be scanned.
+        """
+        if not self.indexes or initial_query:
+            return None
+
+        filter_funcs = []
+        for specification in specifications:
+            if isinstance(specification, InternalFilter):
+                if specification.text_filters:  # patterns of the keys cannot be checked with the indexes
+                    return None
+
+                filter_funcs.extend(specification.filters)
+
+        set_keys = []
+        candidates = None
+
+        for filter_func in filter_funcs:
+            index = self._find_index(filter_func)
+            if index is None:
+                continue
+
+            value, is_valid = validate_value(self.model, index.field, filter_func.value)
+            if not is_valid:  # the value cannot be saved in the field, so the models are checked without the index
+                continue
+
+            if isinstance(index, RedisHashIndex):
+                set_keys.append(index.get_set_key(self.key_prefix, encode_value(value)))
+                continue
+
+            found_ids = index.lookup(self.session, self.key_prefix, filter_func.operation, value)
+            if found_ids is not None:
+                candidates = found_ids if candidates is None else candidates & found_ids
+
+        if set_keys:
+            found_ids = self.session.sinter(set_keys)
+            candidates = found_ids if candidates is None else candidates & found_ids
+
+        return None if candidates is None else [self._decode(model_id) for model_id in candidates]
+
+    def _find_index(self, filter_func: Callable) -> RedisIndex | None:
+        field = getattr(filter_func, "field", None)
+        operation = getattr(filter_func, "operation", None)
+
+        for index in self.indexes:
+            if index.field == field and operation in index.operations:
+                return index
+
+        return None
+
+    def _dump_indexes(self, model: RedisModelT | None = None, fields: set | None = None) -> list[dict]:
+        """
+        Returns the indexes for the Lua scripts with the values of the model. If the fields are provided,
+        only the indexes of these fields are changed.
+        """
+        return [
+            index.dump(self.key_prefix, model)
+            for index in self.indexes
+            if fields is None or index.field.split(FILTERING_OPTIONS_SEPARATOR)[0] in fields
+        ]
+
+    def reindex(self) -> None:
+        """Creates the indexes again from all the models. Use it after you add an index to the existing models."""
+        if not self.indexes:
+            return
+
+        for index in self.indexes:
+            self.session.delete(index.get_key(self.key_prefix))
+            for keys in self._chunk_unique(self.session.scan_iter(match=f"{index.get_key(self.key_prefix)}:*")):
+                self.session.delete(*keys)
+
+        for keys in self._scan_keys("*"):
+            pipeline = self.session.pipeline()
+
+            for key, value in zip(keys, self._get_by_keys(keys), strict=True):
+                if value is None:
+                    continue
+
+                # Only the indexes are changed if the model still exists
+                arguments = {
+                    "id": self._get_id(key),
+                    "xx": True,
+                    "indexes": self._dump_indexes(self._load_model(value)),
+                }
+                keys = [key, self.key_prefix, self._get_expiration_key(), *self._get_index_keys(arguments["indexes"])]
+                self._save_script(keys=keys, args=[json.dumps(arguments)], client=pipeline)
+
+            pipeline.execute()
+
+    def remove_expired(self) -> int:
+        """
+        Removes the ids of the expired models from the set of the ids and from the indexes, and returns their number.
+        count() does not count the expired models anyway, so call it from time to time to keep the sets small.
+        """
+        if self.key_prefix is None:
+            return 0
+
+        indexes = self._dump_indexes()
+        keys = [self.key_prefix, self._get_expiration_key(), *self._get_index_keys(indexes)]
+        return cast(int, self._expire_script(keys=keys, args=[self.key_prefix, json.dumps(indexes)]))
+
+    def _get_key(self, model_id) -> KeyT:
+        return model_id if self.key_prefix is None else f"{self.key_prefix}:{model_id}"
+
+    def _get_expiration_key(self) -> str:
+        return f"{self.key_prefix}.expiration"
+
+    @staticmethod
+    def _decode(value: KeyT) -> str:
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def _get_id(self, key: KeyT) -> str:
+        key = self._decode(key)
+        return key if self.key_prefix is None else key[len(self.key_prefix) + 1 :]
+
+    def _chunk_unique(self, keys: Iterable[KeyT]) -> Iterator[list[KeyT]]:
+        """SCAN can return the same key more than once, so the keys are only returned the first time."""
+        found_keys = set()
+        chunk = []
+
+        for key in keys:
+            if key in found_keys:
+                continue
+
+            found_keys.add(key)
+            chunk.append(key)
+
+            if len(chunk) >= self.scan_count:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def _scan_keys(self, pattern: str) -> Iterator[list[KeyT]]:
+        """
+        Finds the keys with SCAN and returns them in chunks of scan_count. If the models have the key prefix,
+        all of them are found in the set of their ids with SSCAN.
+        """
+        if self.key_prefix is not None:
+            if pattern == "*":
+                model_ids = self.session.sscan_iter(self.key_prefix, count=self.scan_count)
+                for chunk in self._chunk_unique(model_ids):
+                    yield [self._get_key(self._decode(model_id)) for model_id in chunk]
+
+                return
+
+            pattern = self._get_key(pattern)
+
+        if self.use_keys_command:
+            keys = cast(list, self.session.keys(pattern))
+            for start in range(0, len(keys), self.scan_count):
+                yield keys[start : start + self.scan_count]
+
+            return
+
+        yield from self._chunk_unique(self.session.scan_iter(match=pattern, count=self.scan_count))
+
+    def _scan_values(self, pattern: str, fields: list[str] | None = None) -> Iterator[bytes | dict]:
+        """Returns the values of the keys that match the pattern. Keys are loaded with MGET in chunks."""
+        for keys in self._scan_keys(pattern):
+            missing_ids = []
+
+            for key, value in zip(keys, self._get_by_keys(keys, fields), strict=True):
+                if value is not None:
+                    yield value
+                else:  # key was deleted or expired after we found it
+                    missing_ids.append(self._get_id(key))
+
+            if missing_ids and self.key_prefix is not None:  # expired models are removed from the set and the indexes
+                self._run_delete_script(self.session, missing_ids, only_missing=True)
+
+    def _get_by_ids(self, model_ids: list[str], fields: list[str] | None = None) -> list[bytes | dict | None]:
+        return self._get_by_keys([self._get_key(model_id) for model_id in model_ids], fields)
+
+    def _get_by_keys(self, keys: list[str], fields: list[str] | None = None) -> list[bytes | dict | None]:
+        """
+        Returns the values of the keys with GET or MGET. Keys that do not exist return None.
+        Hashes are loaded with HGETALL, or with HMGET if only some fields are needed.
+        """
+        if not keys:
+            return []
+        elif self.use_hashes:
+            return self._get_hashes(keys, fields)
+        elif len(keys) == 1:
+            return [self.session.get(keys[0])]
+
+        return cast(list, self.session.mget(keys))
+
+    def _get_hashes(self, keys: list[str], fields: list[str] | None = None) -> list[dict | None]:
+        pipeline = self.session.pipeline(transaction=False)
+
+        for key in keys:
+            if fields is None:
+                pipeline.hgetall(key)
+            else:
+                pipeline.hmget(key, fields)
+
+        if fields is None:
+            return [
+                {self._decode(field): value for field, value in found_hash.items()} or None
+                for found_hash in pipeline.execute()
+            ]
+
+        return [
+            None if all(value is None for value in values) else dict(zip(fields, values, strict=True))
+            for values in pipeline.execute()
+        ]
+
     def dict_to_models(self, data: dict) -> RedisModelT:
         return self.model(**dict_to_internal_models(data=data, model=self.model))
 
@@ -99,25 +509,123 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         if obj is None:
             obj = self.dict_to_models(data=obj_data)
 
-        self.transaction.set(
-            name=obj.id,
-            value=obj.json(),
-            ex=getattr(obj, "expire_in", None),  # for Pydantic model compatability
-            px=getattr(obj, "expire_in_px", None),
-            nx=getattr(obj, "only_create", False),
-            xx=getattr(obj, "only_update", False),
-            keepttl=getattr(obj, "keep_ttl", False),
-        )
+        if self.key_prefix is None and not self.use_hashes:
+            self.transaction.set(
+                name=self._get_key(obj.id),
+                value=obj.json(),
+                ex=getattr(obj, "expire_in", None),  # for Pydantic model compatability
+                px=getattr(obj, "expire_in_px", None),
+                nx=getattr(obj, "only_create", False),
+                xx=getattr(obj, "only_update", False),
+                keepttl=getattr(obj, "keep_ttl", False),
+            )
+            return obj
+
+        self._run_save_script(self.transaction, obj)
         return obj
 
+    def _run_save_script(
+        self,
+        pipeline: Pipeline | Redis,
+        obj: RedisModelT,
+        fields: set | None = None,
+        only_update: bool = False,
+    ) -> None:
+        """
+        Saves the model with SAVE_SCRIPT, so the model is only added to the set of the ids and the indexes
+        if it is saved. Expiration is set the same way as SET does it. If the fields are provided,
+        only these fields are written to the hash of the existing model, and its expiration is not changed.
+        """
+        arguments = {
+            "id": str(obj.id),
+            "nx": fields is None and bool(getattr(obj, "only_create", False)),
+            "xx": fields is not None or only_update or bool(getattr(obj, "only_update", False)),
+            "keepttl": fields is not None or bool(getattr(obj, "keep_ttl", False)),
+        }
+
+        if self.use_hashes:
+            arguments["hash"] = self._dump_hash(obj, fields)
+        else:
+            arguments["value"] = obj.json()
+
+        if fields is None and getattr(obj, "expire_in", None):
+            arguments["ex"] = obj.expire_in
+        elif fields is None and getattr(obj, "expire_in_px", None):
+            arguments["px"] = obj.expire_in_px
+
+        arguments["indexes"] = self._dump_indexes(obj, fields)
+        key = self._get_key(obj.id)
+
+        if self.key_prefix is None:
+            keys = [key]
+        else:
+            keys = [key, self.key_prefix, self._get_expiration_key(), *self._get_index_keys(arguments["indexes"])]
+
+        self._save_script(keys=keys, args=[json.dumps(arguments)], client=pipeline)
+
+    def _run_delete_script(self, pipeline: Pipeline | Redis, model_ids: list[str], only_missing: bool = False) -> None:
+        """Deletes the models with DELETE_SCRIPT. If only_missing is True, only the ids of the deleted keys are removed."""
+        indexes = self._dump_indexes()
+        keys = [
+            self.key_prefix,
+            self._get_expiration_key(),
+            *(self._get_key(model_id) for model_id in model_ids),
+            *self._get_index_keys(indexes),
+        ]
+        args = [json.dumps(indexes), "missing" if only_missing else "all", *model_ids]
+        self._delete_script(keys=keys, args=args, client=pipeline)
+
+    @staticmethod
+    def _get_index_keys(indexes: list[dict]) -> list[str]:
+        """
+        Returns the keys that the scripts change for the dumped indexes. Sets of the old values of the hash indexes
+        are only known in the scripts, so they are not returned.
+        """
+        keys = []
+
+        for index in indexes:
+            keys.append(index["key"])
+
+            if index["kind"] == "hash":
+                keys.extend(f"{index['key']}:{value}" for value in index.get("values", ()))
+            else:
+                keys.append(f"{index['key']}:unindexed")
+
+        return keys
+
+    def _get_pipeline(self) -> Pipeline | Redis:
+        """
+        Returns the pipeline of the transaction. If we are not in the transaction, a new pipeline is created,
+        so the model and the set of the ids are changed together.
+        """
+        if (self.key_prefix is None and not self.use_hashes) or isinstance(self.transaction, Pipeline):
+            return self.transaction
+
+        return self.transaction.pipeline()
+
+    def _execute(self, pipeline: Pipeline | Redis) -> None:
+        if pipeline is not self.transaction:
+            cast(Pipeline, pipeline).execute()
+
     def delete(self, obj: Optional[RedisModelT] = None, *specifications: SpecificationType) -> None:
         obj, clear_specifications = self._check_obj_is_specification(obj, specifications)
 
         if clear_specifications:
             models = cast(list[RedisModelT], self.filter(*clear_specifications))
-            self.transaction.delete(*[str(model.id) for model in models])
+            model_ids = [str(model.id) for model in models]
         elif obj is not None:
-            self.transaction.delete(obj.id)
+            model_ids = [str(obj.id)]
+        else:
+            return
+
+        if not model_ids:
+            return
+
+        if self.key_prefix is None:
+            self.transaction.delete(*[self._get_key(model_id) for model_id in model_ids])
+            return
+
+        self._run_delete_script(self.transaction, model_ids)
 
     def update(
         self,
@@ -133,28 +641,55 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
                     "You did not provide any update_values to the update() yet provided specifications"
                 )
 
+            if self.use_hashes:
+                self._update_hashes(clear_specifications, update_values)
+                return
+
             models = cast(list[RedisModelT], self.filter(*clear_specifications, lazy=False))
-            updated_models = {}
+            if not models:
+                return
 
             for model in models:
                 model.__dict__.update(update_values)
-                updated_models[str(model.id)] = model.json()
 
-            self.transaction.mset(updated_models)
+            pipeline = self._get_pipeline()
+
+            if self.key_prefix is None:
+                pipeline.mset({self._get_key(model.id): model.json() for model in models})
+            else:  # the script does not add the models that were deleted after we found them
+                for model in models:
+                    self._run_save_script(pipeline, model, only_update=True)
+
+            self._execute(pipeline)
 
         elif obj is not None:
             obj.only_update = True
             self.save(obj)
 
+    def _update_hashes(self, specifications: Iterable[SpecificationType], update_values: dict) -> None:
+        """Only loads the fields of the filters and writes the changed fields with HSET."""
+        models = cast(list[RedisModelT], self.filter(*specifications, self.specs.only(*update_values), lazy=False))
+        if not models:
+            return
+
+        updated_fields = set(update_values)
+        pipeline = self._get_pipeline()
+
+        for model in models:
+            model.__dict__.update(update_values)
+            self._run_save_script(pipeline, model, fields=updated_fields)
+
+        self._execute(pipeline)
+
     def is_modified(self, obj: RedisModelT) -> bool | None:
         if self.specifications is None:
             return False
-        return self.get(self.specifications.filter(obj.id), lazy=False) == obj
+        return self.get(self.specifications.filter(id=obj.id), lazy=False) == obj
 
     def refresh(self, obj: RedisModelT) -> None:
         if self.specifications is None:
             return
-        fresh_obj = self.get(self.specifications.filter(obj.id), lazy=False)
+        fresh_obj = self.get(self.specifications.filter(id=obj.id), lazy=False)
 
         for key, value in fresh_obj.dict().items():
             setattr(obj, key, value)
@@ -166,14 +701,33 @@ class RedisRepository(Repository[Redis, RedisModelT, str, InternalSpecificationL
         initial_query: Optional[str] = None,
     ) -> LazyCommand[int] | int:
         if not specifications:
+            if self.key_prefix is not None:
+                # Expired models stay in the set until remove_expired() is called, so their deadlines are counted
+                # and subtracted. Both commands only read, so count() can be called on the replicas.
+                seconds, microseconds = self.session.time()
+                now = seconds * 1000 + microseconds // 1000
+
+                pipeline = self.session.pipeline(transaction=False)
+                pipeline.scard(self.key_prefix)
+                pipeline.zcount(self._get_expiration_key(), "-inf", f"({now}")
+                saved, expired = pipeline.execute()
+                return saved - expired
+
             return cast(int, self.session.dbsize())
 
-        filter_query = self._apply_specifications(
-            query=initial_query,
-            specifications=specifications,
-        )
-        keys = cast(Sized, self.session.keys(filter_query))
-        return len(keys)
+        primary_keys = get_primary_keys(*specifications)
+        if primary_keys is not None or self._find_indexed_ids(specifications, initial_query) is not None:
+            return len(self.filter(*specifications, initial_query=initial_query))
+
+        lua_query = self._compile_lua_query(specifications, initial_query)
+        if lua_query is not None:
+            if lua_query.limit is None and not lua_query.offset:  # the script only counts the models
+                return self._count_with_lua(lua_query)
+
+            return len(self.filter(*specifications))
+
+        # Filters check the values of the models, so the found keys cannot be counted without loading them
+        return len(self.filter(*specifications, initial_query=initial_query))
 
 
 __all__ = [
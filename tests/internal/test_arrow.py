@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession
+
+pytest.importorskip("pyarrow")
+
+
+class Tag(BaseModel):
+    name: str
+    weight: float | None = None
+
+
+class Event(BaseModel):
+    number: int
+    deleted_at: datetime | None = None
+    note: str | None = None
+    tags: list[Tag] = []  # noqa: RUF012
+    values: list[int] = []  # noqa: RUF012
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Event)
+
+    for i in range(10):
+        repository.save(
+            number=i,
+            deleted_at=datetime(2024, 1, 1) if i >= 5 else None,
+            note="note" if i >= 7 else None,
+            tags=[{"name": "tag", "weight": 1.5}] if i >= 5 else [],
+            values=[i] if i >= 6 else [],
+        )
+
+    return repository
+
+
+def load(path, validate: bool = False) -> InternalRepository:
+    repository = InternalRepository(session=InternalSession(), model=Event)
+    repository.load_from_parquet(str(path), validate=validate)
+    return repository
+
+
+@pytest.mark.parametrize("validate", [False, True])
+def test_models_are_loaded_from_dumped_file(tmp_path, repository, validate):
+    path = tmp_path / "events.parquet"
+    assert repository.dump_to_parquet(str(path), batch_size=4) == 10
+
+    assert load(path, validate=validate).session == repository.session
+
+
+def test_columns_without_values_in_first_batch_use_field_types(tmp_path, repository):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "events.parquet"
+    repository.dump_to_parquet(str(path), batch_size=3)
+
+    schema = pyarrow_parquet.read_schema(str(path))
+    assert str(schema.field("deleted_at").type) == "timestamp[us]"
+    assert str(schema.field("note").type) == "string"
+    assert str(schema.field("values").type) == "list<element: int64>"
+
+
+def test_specifications_choose_dumped_models(tmp_path, repository):
+    path = tmp_path / "events.parquet"
+    assert repository.dump_to_parquet(str(path), repository.specs.filter(number__gte=8)) == 2
+
+    assert sorted(model.number for model in load(path).session.values()) == [8, 9]
+
+
+def test_empty_repository_is_dumped(tmp_path):
+    path = tmp_path / "events.parquet"
+    repository = InternalRepository(session=InternalSession(), model=Event)
+
+    assert repository.dump_to_parquet(str(path)) == 0
+    assert not load(path).session
@@ -0,0 +1,62 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.core.database.exceptions import DataLayerError
+from assimilator.internal.database import HashIndex, InternalRepository, InternalSession, InternalUnitOfWork
+
+
+class Account(BaseModel):
+    owner: str
+    balance: float
+    tags: list[str] = []  # noqa: RUF012
+
+    class AssimilatorConfig:
+        indexes = {"owner": HashIndex}  # noqa: RUF012
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Account)
+
+    for i in range(10):
+        repository.save(id=str(i), owner=f"owner{i % 3}", balance=i)
+
+    return repository
+
+
+def test_update_returns_the_number_of_models(repository):
+    assert repository.update(repository.specs.filter(owner="owner0"), balance="100", tags=["rich"]) == 4
+    assert repository.update(repository.specs.filter(owner="missing"), balance=1) == 0
+
+    updated = repository.filter(repository.specs.filter(balance=100.0))
+    assert sorted(account.id for account in updated) == ["0", "3", "6", "9"]
+
+    updated[0].tags.append("changed")
+    assert updated[1].tags == ["rich"]  # values are copied for every model
+
+
+def test_invalid_values_do_not_change_the_models(repository):
+    with pytest.raises(DataLayerError):
+        repository.update(repository.specs.filter(owner="owner1"), balance="not a number")
+
+    with pytest.raises(DataLayerError):
+        repository.update(repository.specs.filter(owner="owner1"), missing_field=1)
+
+    assert [account.balance for account in repository.filter(repository.specs.filter(owner="owner1"))] == [1, 4, 7]
+
+
+def test_indexes_see_the_updated_models(repository):
+    repository.update(repository.specs.filter(balance__lt=2), owner="changed")
+
+    assert sorted(account.id for account in repository.filter(repository.specs.filter(owner="changed"))) == ["0", "1"]
+    assert len(repository.filter(repository.specs.filter(owner="owner0"))) == 3
+
+
+def test_update_in_unit_of_work(repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        assert unit_of_work.repository.update(unit_of_work.repository.specs.filter(owner="owner2"), balance=0) == 3
+        unit_of_work.commit()
+
+    assert [account.balance for account in repository.filter(repository.specs.filter(owner="owner2"))] == [0, 0, 0]
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from assimilator.core.database import BaseModel, NotFoundError
+from assimilator.internal.database import CacheSession, InternalRepository, InternalUnitOfWork, LFUPolicy
+
+
+class Item(BaseModel):
+    name: str
+
+
+@pytest.fixture()
+def session():
+    return CacheSession(max_entries=3)
+
+
+@pytest.fixture()
+def repository(session):
+    return InternalRepository(session=session, model=Item)
+
+
+def test_least_recently_used_model_is_evicted(session, repository):
+    for key in "abc":
+        repository.save(id=key, name=key)
+
+    repository.get(repository.specs.filter(id="a"))
+    repository.save(id="d", name="d")
+
+    assert set(session.keys()) == {"a", "c", "d"}
+    assert session.evictions == 1
+
+
+def test_least_frequently_used_model_is_evicted():
+    session = CacheSession(max_entries=2, eviction_policy=LFUPolicy())
+    session["a"] = Item(id="a", name="a")
+    session["b"] = Item(id="b", name="b")
+    session["a"], session["a"]
+
+    session["c"] = Item(id="c", name="c")
+    assert set(session.keys()) == {"a", "c"}
+
+
+def test_access_by_key_is_counted(session, repository):
+    repository.save(id="a", name="a")
+    repository.get(repository.specs.filter(id="a"))
+
+    with pytest.raises(NotFoundError):
+        repository.get(repository.specs.filter(id="missing"))
+
+    assert (session.hits, session.misses) == (1, 1)
+
+
+def test_in_counts_hits_and_misses(session, repository):
+    repository.save(id="a", name="a")
+    repository.save(id="b", name="b")
+
+    assert "a" in session and "missing" not in session
+    assert (session.hits, session.misses) == (1, 1)
+
+    assert len(repository.filter(repository.specs.filter(id__in=["a", "b", "missing"]))) == 2
+    assert len(repository.filter(repository.specs.filter(name="a"))) == 1
+    assert (session.hits, session.misses) == (3, 2)
+
+    unit_of_work = InternalUnitOfWork(repository)
+    with unit_of_work:
+        assert "a" in unit_of_work.repository.session and "missing" not in unit_of_work.repository.session
+
+    assert (session.hits, session.misses) == (3, 2)
+
+
+def test_unit_of_work_does_not_count_internal_checks(session, repository):
+    repository.save(id="a", name="a")
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="b", name="b")
+        unit_of_work.repository.get(unit_of_work.repository.specs.filter(id="a")).name = "changed"
+        assert len(unit_of_work.repository.filter()) == 2
+        assert unit_of_work.repository.count() == 2
+        unit_of_work.commit()
+
+    assert (session.hits, session.misses) == (1, 0)
+    assert session.statistics["hits"] == 1
+    assert session["a"].name == "changed"
+
+
+def test_get_counts_one_miss(session):
+    assert session.get("missing", "default") == "default"
+    assert session.misses == 1
+
+
+def test_models_expire():
+    session = CacheSession(default_ttl=0.05)
+    session["a"] = Item(id="a", name="a")
+    assert "a" in session
+
+    time.sleep(0.06)
+    assert "a" not in session
+    assert session.expirations == 1
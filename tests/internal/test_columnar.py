@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository
+
+pytest.importorskip("numpy")
+
+from assimilator.internal.database.columnar import ColumnarSession
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Sale(BaseModel):
+    city: str
+    amount: float
+    quantity: int
+    paid: bool
+    day: date
+    tags: list[Tag] = []  # noqa: RUF012
+
+
+def create_sales(repository: InternalRepository) -> InternalRepository:
+    for i in range(3000):  # more than the capacity, so the columns grow
+        repository.save(
+            id=str(i),
+            city=f"city{i % 7}",
+            amount=i * 1.5,
+            quantity=i % 11,
+            paid=i % 2 == 0,
+            day=date(2024, 1, 1 + i % 28),
+            tags=[{"name": f"tag{i % 3}"}],
+        )
+
+    return repository
+
+
+@pytest.fixture()
+def repositories():
+    columnar_repository = create_sales(InternalRepository(session=ColumnarSession(model=Sale), model=Sale))
+    repository = create_sales(InternalRepository(session={}, model=Sale))
+    return columnar_repository, repository
+
+
+@pytest.mark.parametrize(
+    "specifications",
+    [
+        {"filter": {"city": "city3", "quantity__gte": 5}},
+        {"filter": {"paid__is": True, "amount__lt": 100}},
+        {"filter": {"day": date(2024, 1, 5)}},
+        {"filter": {"tags__name": "tag1", "quantity": 2}},
+        {"filter": {"city__like": "city1%"}, "order": ("-amount",)},
+        {"order": ("quantity", "-amount"), "paginate": {"limit": 20, "offset": 10}},
+        {"order": ("-quantity",)},
+    ],
+)
+def test_columns_find_the_same_models(repositories, specifications):
+    found = []
+
+    for repository in repositories:
+        applied = []
+        if "filter" in specifications:
+            applied.append(repository.specs.filter(**specifications["filter"]))
+        if "order" in specifications:
+            applied.append(repository.specs.order(*specifications["order"]))
+        if "paginate" in specifications:
+            applied.append(repository.specs.paginate(**specifications["paginate"]))
+
+        found.append([model.id for model in repository.filter(*applied)])
+        assert repository.count(*applied) == len(found[-1])
+
+    assert found[0] == found[1]
+
+
+def test_changed_and_deleted_models(repositories):
+    for repository in repositories:
+        model = repository.get(repository.specs.filter(id="10"))
+        model.city = "changed"
+        repository.update(model)
+        repository.delete(repository.get(repository.specs.filter(id="11")))
+        repository.update(repository.specs.filter(quantity=0), paid=False)
+
+    columnar_repository, repository = repositories
+    assert columnar_repository.get(columnar_repository.specs.filter(id="10")).city == "changed"
+    assert columnar_repository.count() == repository.count() == 2999
+
+    specification = columnar_repository.specs.filter(paid__is=False)
+    assert sorted(model.id for model in columnar_repository.filter(specification)) == sorted(
+        model.id for model in repository.filter(repository.specs.filter(paid__is=False))
+    )
@@ -0,0 +1,58 @@
+from pydantic import PrivateAttr
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository
+from assimilator.internal.database.compact import CompactSession
+
+
+class Point(BaseModel):
+    x: int
+    y: int | None = None
+
+
+def test_models_are_stored_as_rows():
+    session = CompactSession(Point)
+    repository = InternalRepository(session=session, model=Point)
+    saved = repository.save(id="a", x=1)
+
+    row = dict.__getitem__(session, "a")
+    assert not hasattr(row, "__dict__")
+    assert session["a"] == saved
+    assert session["a"].__fields_set__ == saved.__fields_set__
+
+
+def test_get_returns_default_for_missing_keys():
+    session = CompactSession(Point)
+    session["a"] = Point(id="a", x=1)
+
+    assert session.get("a") == Point(id="a", x=1)
+    assert session.get("missing") is None
+    assert session.get("missing", "default") == "default"
+
+
+def test_filters_are_checked_on_rows():
+    session = CompactSession(Point)
+    repository = InternalRepository(session=session, model=Point)
+
+    for i in range(10):
+        repository.save(id=str(i), x=i, y=i % 2)
+
+    found = repository.filter(repository.specs.filter(x__gt=4, y=1))
+    assert [model.id for model in found] == ["5", "7", "9"]
+    assert all(isinstance(model, Point) for model in found)
+
+
+class CachedPoint(BaseModel):
+    x: int
+    _cache: int = PrivateAttr(default=5)
+
+
+def test_models_with_private_attributes_are_stored_as_they_are():
+    session = CompactSession(CachedPoint)
+    repository = InternalRepository(session=session, model=CachedPoint)
+    saved = repository.save(id="a", x=1)
+    saved._cache = 10
+
+    assert session.stores_rows is False
+    assert repository.get(repository.specs.filter(id="a"))._cache == 10
+    assert [model.id for model in repository.filter(repository.specs.filter(x=1))] == ["a"]
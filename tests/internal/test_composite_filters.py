@@ -0,0 +1,68 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import HashIndex, InternalRepository, InternalSession
+from assimilator.internal.database.specifications.internal_operator import conjunction, disjunction
+
+
+class Ticket(BaseModel):
+    priority: int
+    open: bool
+
+    class AssimilatorConfig:
+        indexes = {"priority": HashIndex}  # noqa: RUF012
+
+
+class CallCounter:
+    def __init__(self, result: bool):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, model) -> bool:
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Ticket)
+
+    for i in range(30):
+        repository.save(id=str(i), priority=i % 5, open=i % 2 == 0)
+
+    return repository
+
+
+def test_conjunction_stops_at_the_first_false_result():
+    first, second, third = CallCounter(True), CallCounter(False), CallCounter(True)
+
+    assert not conjunction(first, second, third)(None)
+    assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+
+
+def test_disjunction_stops_at_the_first_true_result():
+    first, second, third = CallCounter(False), CallCounter(True), CallCounter(True)
+
+    assert disjunction(first, second, third)(None)
+    assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+
+
+def test_combined_filters(repository):
+    specs = repository.specs
+    tickets = list(repository.session.values())
+
+    both = specs.filter(priority=1) & specs.filter(open__is=True)
+    either = specs.filter(priority=1) | specs.filter(open__is=True)
+    inverted = ~specs.filter(priority=1)
+
+    assert repository.filter(both) == [ticket for ticket in tickets if ticket.priority == 1 and ticket.open]
+    assert repository.filter(either) == [ticket for ticket in tickets if ticket.priority == 1 or ticket.open]
+    assert repository.filter(inverted) == [ticket for ticket in tickets if ticket.priority != 1]
+
+
+def test_combined_filters_still_use_the_indexes(repository):
+    specification = repository.specs.filter(priority=2) & repository.specs.filter(open__is=True)
+    candidates = repository.session.find_candidates(*specification.filters)
+
+    assert candidates is not None
+    assert len(candidates) == 6
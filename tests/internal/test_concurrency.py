@@ -0,0 +1,86 @@
+import threading
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import ConcurrentSession, InternalRepository, InternalUnitOfWork, SortedIndex
+
+
+class Task(BaseModel):
+    priority: int
+
+    class AssimilatorConfig:
+        indexes = {"priority": SortedIndex}  # noqa: RUF012
+
+
+class DeletingSession(ConcurrentSession):
+    """Deletes a model after the sorted keys are found, like another thread would do it."""
+
+    def find_sorted_keys(self, field, reverse=False):
+        keys = super().find_sorted_keys(field, reverse)
+        del self["0"]
+        return keys
+
+
+def test_sorted_models_deleted_by_other_thread_are_skipped():
+    session = DeletingSession()
+    repository = InternalRepository(session=session, model=Task)
+
+    for i in range(5):
+        repository.save(id=str(i), priority=i)
+
+    found = repository.filter(repository.specs.order("priority"))
+    assert [model.id for model in found] == ["1", "2", "3", "4"]
+
+
+def test_sorting_while_other_threads_delete_models():
+    session = ConcurrentSession()
+    repository = InternalRepository(session=session, model=Task)
+    stop, errors = threading.Event(), []
+
+    for i in range(500):
+        repository.save(id=str(i), priority=i % 10)
+
+    def write():
+        i = 0
+
+        while not stop.is_set():
+            key = str(i % 500)
+            session.pop(key, None)
+            repository.save(id=key, priority=i % 10)
+            i += 1
+
+    def read():
+        try:
+            for _ in range(50):
+                priorities = [model.priority for model in repository.filter(repository.specs.order("-priority"))]
+                assert priorities == sorted(priorities, reverse=True)
+        except Exception as error:  # noqa: BLE001
+            errors.append(error)
+
+    writer = threading.Thread(target=write)
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writer.start()
+
+    for reader in readers:
+        reader.start()
+
+    for reader in readers:
+        reader.join()
+
+    stop.set()
+    writer.join()
+    assert not errors
+
+
+def test_unit_of_work_commits_atomically():
+    session = ConcurrentSession()
+    repository = InternalRepository(session=session, model=Task)
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        for i in range(100):
+            unit_of_work.repository.save(id=str(i), priority=i)
+
+        assert not session
+        unit_of_work.commit()
+
+    assert len(repository.filter(repository.specs.filter(priority__gte=50))) == 50
@@ -0,0 +1,88 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.core.services import CRUDService
+from assimilator.internal.database import (
+    HashIndex,
+    InternalRepository,
+    InternalSession,
+    InternalUnitOfWork,
+    SortedIndex,
+)
+from assimilator.internal.database.specifications.specifications import OrderedQuery
+
+
+class Order(BaseModel):
+    status: str
+    total: float
+
+
+class IndexedOrder(BaseModel):
+    status: str
+    total: float
+
+    class AssimilatorConfig:
+        indexes = {"status": HashIndex, "total": SortedIndex}  # noqa: RUF012
+
+
+def create_repository(model: type[BaseModel], session) -> InternalRepository:
+    repository = InternalRepository(session=session, model=model)
+
+    for i in range(60):
+        repository.save(id=str(i), status=("new", "paid", "sent")[i % 3], total=float("nan") if i == 7 else i)
+
+    return repository
+
+
+@pytest.fixture(params=[(Order, dict), (IndexedOrder, InternalSession)], ids=["dict", "indexes"])
+def repository(request):
+    model, session_type = request.param
+    return create_repository(model, session_type())
+
+
+@pytest.mark.parametrize(
+    "create_specifications",
+    [
+        lambda specs: [specs.filter(status="paid")],
+        lambda specs: [specs.filter(status="paid", total__gte=30)],
+        lambda specs: [specs.filter(total__lt=10)],
+        lambda specs: [~specs.filter(status="new")],
+        lambda specs: [specs.filter(status="sent"), specs.paginate(limit=5, offset=18)],
+        lambda specs: [specs.filter(id__in=["1", "2", "missing"])],
+        lambda specs: [specs.filter(status="paid"), specs.order("-total")],
+        lambda specs: [specs.filter(total__gt=5), specs.order("status", "-total"), specs.paginate(offset=50, limit=5)],
+    ],
+)
+def test_count_is_the_number_of_found_models(repository, create_specifications):
+    specifications = create_specifications(repository.specs)
+    assert repository.count(*specifications) == len(repository.filter(*specifications))
+
+
+def test_count_does_not_sort_the_models(monkeypatch, repository):
+    def sort(self, limit=None):
+        raise AssertionError("count() sorted the models")
+
+    monkeypatch.setattr(OrderedQuery, "sort", sort)
+    specifications = [repository.specs.filter(total__gte=30), repository.specs.order("-total", "id")]
+    assert repository.count(*specifications) == 30
+    assert repository.count(repository.specs.order("status")) == 60
+
+
+def test_count_without_specifications(repository):
+    assert repository.count() == 60
+
+
+def test_count_sees_the_changes_of_unit_of_work():
+    session = InternalSession()
+    unit_of_work = InternalUnitOfWork(create_repository(IndexedOrder, session))
+    session_repository = InternalRepository(session=session, model=IndexedOrder)
+
+    with unit_of_work:
+        unit_of_work.repository.update(unit_of_work.repository.specs.filter(status="new"), status="paid")
+        assert unit_of_work.repository.count(unit_of_work.repository.specs.filter(status="paid")) == 40
+        assert session_repository.count(session_repository.specs.filter(status="paid")) == 20
+
+
+def test_service_counts_the_models():
+    service = CRUDService(uow=InternalUnitOfWork(create_repository(Order, InternalSession())))
+    assert service.count(status="sent", total__gt=50) == 3
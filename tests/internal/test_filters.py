@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession, internal_filter
+
+
+class Address(BaseModel):
+    city: str
+
+
+class User(BaseModel):
+    username: str
+    age: int
+    active: bool | None = None
+    addresses: list[Address] = []  # noqa: RUF012
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=User)
+
+    for i in range(20):
+        repository.save(
+            id=str(i),
+            username=f"user{i}",
+            age=10 + i,
+            active=(None, True, False)[i % 3],
+            addresses=[{"city": f"city{i % 4}"}, {"city": "capital"}],
+        )
+
+    return repository
+
+
+@pytest.mark.parametrize(
+    ("filters", "check"),
+    [
+        ({"age": 15}, lambda user: user.age == 15),
+        ({"age__gt": 25}, lambda user: user.age > 25),
+        ({"age__gte": 25, "age__lt": 28}, lambda user: 25 <= user.age < 28),
+        ({"age__lte": 12}, lambda user: user.age <= 12),
+        ({"active__is": None}, lambda user: user.active is None),
+        ({"username__like": "user1%"}, lambda user: user.username.startswith("user1")),
+        ({"username__regex": r"user\d$"}, lambda user: re.match(r"user\d$", user.username)),
+        ({"addresses__city": "city2"}, lambda user: any(address.city == "city2" for address in user.addresses)),
+    ],
+)
+def test_filters_find_the_models(repository, filters, check):
+    found = repository.filter(repository.specs.filter(**filters))
+    assert [user.id for user in found] == [user.id for user in repository.session.values() if check(user)]
+
+
+def test_regex_is_compiled_once():
+    specification = internal_filter(username__like="user%")
+    (filter_func,) = specification.filters
+
+    assert isinstance(filter_func.value, re.Pattern)
+    assert filter_func.field == "username"
+
+
+def test_specification_is_reused(repository):
+    specification = repository.specs.filter(age__gte=28)
+
+    assert len(repository.filter(specification)) == 2
+    repository.save(id="new", username="new", age=40)
+    assert len(repository.filter(specification)) == 3
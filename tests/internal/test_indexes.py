@@ -0,0 +1,137 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import (
+    HashIndex,
+    InternalRepository,
+    InternalSession,
+    InternalUnitOfWork,
+    SortedIndex,
+)
+
+
+class Address(BaseModel):
+    city: str
+
+
+class User(BaseModel):
+    username: str
+    balance: int = 0
+    addresses: list[Address] = []  # noqa: RUF012
+
+    class AssimilatorConfig:
+        indexes = ("username", "addresses__city")
+
+
+@pytest.fixture()
+def session():
+    return InternalSession()
+
+
+@pytest.fixture()
+def repository(session):
+    repository = InternalRepository(session=session, model=User)
+
+    for i in range(100):
+        repository.save(username=f"user{i % 10}", balance=i, addresses=[{"city": f"city{i % 7}"}])
+
+    return repository
+
+
+def test_indexes_are_created_from_config(session, repository):
+    assert {(type(index), index.field) for index in session.indexes} == {
+        (HashIndex, "username"),
+        (HashIndex, "addresses__city"),
+    }
+
+
+def test_eq_filter_uses_hash_index(session, repository):
+    index = session.find_index("username", HashIndex)
+
+    assert len(index.lookup(index.operations[0], "user3")) == 10
+    assert len(repository.filter(repository.specs.filter(username="user3"))) == 10
+    assert len(repository.filter(repository.specs.filter(addresses__city="city3"))) == 14
+
+
+def test_indexed_filter_checks_other_filters(repository):
+    found = repository.filter(repository.specs.filter(username="user3", balance__gt=50))
+    assert sorted(model.balance for model in found) == [53, 63, 73, 83, 93]
+
+
+def test_index_follows_updates_and_deletes(session, repository):
+    model = repository.get(repository.specs.filter(username="user3", balance=3))
+    model.username = "changed"
+    repository.update(model)
+
+    assert repository.get(repository.specs.filter(username="changed")).balance == 3
+    assert repository.count(repository.specs.filter(username="user3")) == 9
+
+    repository.delete(model)
+    assert repository.count(repository.specs.filter(username="changed")) == 0
+    assert not session.find_index("username", HashIndex).lookup(HashIndex.operations[0], "changed")
+
+
+def test_index_is_restored_on_rollback(repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with pytest.raises(RuntimeError), unit_of_work:
+        unit_of_work.repository.update(unit_of_work.repository.specs.filter(username="user2"), username="user5")
+        raise RuntimeError("rollback")
+
+    assert repository.count(repository.specs.filter(username="user2")) == 10
+    assert repository.count(repository.specs.filter(username="user5")) == 10
+
+
+def test_unhashable_values_are_always_checked(session):
+    class Document(BaseModel):
+        tags: list
+
+        class AssimilatorConfig:
+            indexes = ("tags",)
+
+    repository = InternalRepository(session=session, model=Document)
+    repository.save(tags=["a"])
+    repository.save(tags=["b"])
+
+    assert len(repository.filter(repository.specs.filter(tags=["a"]))) == 1
+
+
+@pytest.mark.parametrize("index", [HashIndex, SortedIndex])
+def test_indexes_do_not_change_the_order_of_the_results(index):
+    class Person(BaseModel):
+        age: int
+
+        class AssimilatorConfig:
+            indexes = {"age": index}  # noqa: RUF012
+
+    indexed, plain = (
+        InternalRepository(session=InternalSession(), model=Person),
+        InternalRepository(session={}, model=Person),
+    )
+
+    for repository in (indexed, plain):
+        for i, age in enumerate([1, 3, 2, 1, 4, 2, 3, 2]):
+            repository.save(id=str(i), age=age)
+
+        repository.update(repository.specs.filter(id="1"), age=2)  # key keeps its place after the update
+
+    def find_ids(repository, *specifications):
+        return [person.id for person in repository.filter(*specifications)]
+
+    for specifications in (
+        (indexed.specs.filter(age__gt=1), indexed.specs.paginate(limit=3)),
+        (indexed.specs.filter(age=2),),
+        (indexed.specs.filter(age__gte=2, id__in=["7", "5", "1"]),),
+    ):
+        assert find_ids(indexed, *specifications) == find_ids(plain, *specifications)
+
+    assert find_ids(indexed, indexed.specs.filter(age=2)) == ["1", "2", "5", "7"]
+
+    unit_of_work = InternalUnitOfWork(indexed)
+    with unit_of_work:
+        unit_of_work.repository.update(unit_of_work.repository.specs.filter(id="6"), age=2)
+        unit_of_work.repository.save(id="8", age=2)
+
+        found = find_ids(unit_of_work.repository, indexed.specs.filter(age=2))
+        assert found == [person.id for person in unit_of_work.repository.filter() if person.age == 2]
+        assert found == ["1", "2", "5", "6", "7", "8"]
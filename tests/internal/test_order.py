@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession
+
+
+class Team(BaseModel):
+    name: str
+
+
+class Player(BaseModel):
+    username: str
+    score: float
+    joined: date
+    team: Team
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Player)
+
+    for i in range(40):
+        repository.save(
+            id=str(i),
+            username=f"player{i % 6}",
+            score=i % 4,
+            joined=date(2024, 1, 1 + i % 5),
+            team={"name": f"team{i % 3}"},
+        )
+
+    return repository
+
+
+def find_ids(repository, *clauses: str) -> list:
+    return [model.id for model in repository.filter(repository.specs.order(*clauses))]
+
+
+def sort_ids(repository, *keys) -> list:
+    models = list(repository.session.values())
+
+    for get_key, reverse in reversed(keys):  # the last sort decides the order
+        models.sort(key=get_key, reverse=reverse)
+
+    return [model.id for model in models]
+
+
+def test_clauses_with_the_same_direction(repository):
+    assert find_ids(repository, "score", "username") == sort_ids(
+        repository, (lambda model: model.score, False), (lambda model: model.username, False)
+    )
+    assert find_ids(repository, "-joined", "-username") == sort_ids(
+        repository, (lambda model: model.joined, True), (lambda model: model.username, True)
+    )
+
+
+def test_clauses_with_mixed_directions(repository):
+    assert find_ids(repository, "-score", "username", "-joined") == sort_ids(
+        repository,
+        (lambda model: model.score, True),
+        (lambda model: model.username, False),
+        (lambda model: model.joined, True),
+    )
+
+
+def test_foreign_fields_are_ordered(repository):
+    assert find_ids(repository, "-team.name", "score") == sort_ids(
+        repository, (lambda model: model.team.name, True), (lambda model: model.score, False)
+    )
@@ -0,0 +1,46 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession
+
+
+class Product(BaseModel):
+    name: str
+    price: int
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Product)
+
+    for i in range(50):
+        repository.save(id=str(i), name=f"product{i % 9}", price=(i * 7) % 13)
+
+    return repository
+
+
+def expected_ids(repository, reverse: bool = False) -> list:
+    products = sorted(repository.session.values(), key=lambda product: product.price, reverse=reverse)
+    return [product.id for product in products]
+
+
+@pytest.mark.parametrize(("limit", "offset"), [(5, None), (5, 10), (None, 45), (100, 0)])
+@pytest.mark.parametrize("clause", ["price", "-price"])
+def test_page_of_ordered_models(repository, clause, limit, offset):
+    found = repository.filter(repository.specs.order(clause), repository.specs.paginate(limit=limit, offset=offset))
+
+    start = offset or 0
+    end = None if limit is None else start + limit
+    assert [model.id for model in found] == expected_ids(repository, reverse=clause.startswith("-"))[start:end]
+
+
+def test_page_of_filtered_and_ordered_models(repository):
+    found = repository.filter(
+        repository.specs.filter(name="product1"),
+        repository.specs.order("-price"),
+        repository.specs.paginate(limit=2),
+    )
+
+    products = [product for product in repository.session.values() if product.name == "product1"]
+    products.sort(key=lambda product: product.price, reverse=True)
+    assert found == products[:2]
@@ -0,0 +1,91 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import HashIndex, InternalRepository, InternalSession, ParallelSession
+from assimilator.internal.database.parallel import ParallelQuery
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="parallel scans need forked processes",
+)
+
+
+class Product(BaseModel):
+    category: str
+    price: float
+    stock: int
+
+    class AssimilatorConfig:
+        indexes = {"category": HashIndex}  # noqa: RUF012
+
+
+def fill(repository: InternalRepository) -> InternalRepository:
+    for i in range(200):
+        repository.save(id=f"{i:03}", category=("food", "toys", "books")[i % 3], price=(i * 37) % 50, stock=i % 7)
+
+    return repository
+
+
+@pytest.fixture()
+def repositories():
+    parallel = fill(InternalRepository(session=ParallelSession(processes=2, min_size=10), model=Product))
+    internal = fill(InternalRepository(session=InternalSession(), model=Product))
+    return parallel, internal
+
+
+def test_session_is_scanned_in_parallel(repositories):
+    parallel, _ = repositories
+
+    assert parallel.session.is_parallel()
+    assert isinstance(parallel.session.filter_rows(lambda product: product.stock > 3), ParallelQuery)
+    assert not ParallelSession(processes=1, min_size=10).is_parallel()
+
+
+@pytest.mark.parametrize(
+    "create_specifications",
+    [
+        lambda specs: [specs.filter(price__gt=25)],
+        lambda specs: [specs.filter(category="toys", stock__lt=3)],
+        lambda specs: [specs.filter(price__gt=10) | specs.filter(stock=0)],
+        lambda specs: [specs.filter(price__gt=10), specs.order("-price", "id")],
+        lambda specs: [specs.filter(stock__gte=2), specs.order("stock", "-price"), specs.paginate(offset=7, limit=15)],
+        lambda specs: [specs.order("-stock"), specs.paginate(limit=10)],
+        lambda specs: [specs.filter(price__gt=1000)],
+    ],
+)
+def test_parallel_session_finds_the_same_models(repositories, create_specifications):
+    parallel, internal = repositories
+
+    assert parallel.filter(*create_specifications(parallel.specs)) == internal.filter(
+        *create_specifications(internal.specs)
+    )
+    assert parallel.count(*create_specifications(parallel.specs)) == internal.count(
+        *create_specifications(internal.specs)
+    )
+
+
+def test_replaced_workers_get_the_scan(monkeypatch, repositories):
+    parallel, internal = repositories
+    context = multiprocessing.get_context("fork")  # every worker is replaced after one part of the scan
+    monkeypatch.setattr(
+        multiprocessing, "get_context", lambda method: SimpleNamespace(Pool=partial(context.Pool, maxtasksperchild=1))
+    )
+
+    assert parallel.filter(parallel.specs.filter(price__gt=25)) == internal.filter(internal.specs.filter(price__gt=25))
+
+
+def test_scans_of_many_threads(repositories):
+    parallel, internal = repositories
+
+    def find_ids(repository, stock: int) -> list:
+        return [product.id for product in repository.filter(repository.specs.filter(stock=stock, price__gte=0))]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        found = list(executor.map(lambda stock: find_ids(parallel, stock), range(7)))
+
+    assert found == [find_ids(internal, stock) for stock in range(7)]
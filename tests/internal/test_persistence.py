@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession, InternalStorage, InternalUnitOfWork
+
+
+class Account(BaseModel):
+    owner: str
+    balance: int = 0
+
+
+def create_unit_of_work(storage: InternalStorage, session=None) -> InternalUnitOfWork:
+    repository = InternalRepository(session=InternalSession() if session is None else session, model=Account)
+    return InternalUnitOfWork(repository, storage=storage)
+
+
+def reload(path) -> InternalSession:
+    return InternalStorage(str(path), fsync=False).load(InternalSession())
+
+
+@pytest.fixture()
+def path(tmp_path):
+    return tmp_path / "accounts"
+
+
+@pytest.fixture()
+def storage(path):
+    return InternalStorage(str(path), snapshot_every=None, fsync=False)
+
+
+def test_commits_are_loaded_after_restart(path, storage):
+    unit_of_work = create_unit_of_work(storage)
+
+    with unit_of_work:
+        for i in range(3):
+            unit_of_work.repository.save(id=str(i), owner=f"owner{i}", balance=i)
+
+        unit_of_work.commit()
+
+    with unit_of_work:
+        unit_of_work.repository.delete(unit_of_work.repository.specs.filter(id="1"))
+        unit_of_work.commit()
+
+    assert reload(path) == unit_of_work.repository.session
+
+
+def test_saved_model_is_logged_even_if_it_is_the_same_object(path, storage):
+    unit_of_work = create_unit_of_work(storage)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="1", owner="owner")
+        unit_of_work.commit()
+
+    model = unit_of_work.repository.get(unit_of_work.repository.specs.filter(id="1"))
+    model.balance = 100
+
+    with unit_of_work:
+        unit_of_work.repository.save(model)
+        unit_of_work.commit()
+
+    assert reload(path)["1"].balance == 100
+
+
+def test_torn_tail_of_the_log_is_removed(path, storage):
+    unit_of_work = create_unit_of_work(storage)
+
+    for i in range(2):
+        with unit_of_work:
+            unit_of_work.repository.save(id=str(i), owner=f"owner{i}")
+            unit_of_work.commit()
+
+    complete_size = os.path.getsize(storage.log_path)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="2", owner="owner2")
+        unit_of_work.commit()
+
+    os.truncate(storage.log_path, os.path.getsize(storage.log_path) - 3)  # process stopped during the write
+
+    session = reload(path)
+    assert set(session) == {"0", "1"}
+    assert os.path.getsize(storage.log_path) == complete_size
+
+    new_storage = InternalStorage(str(path), snapshot_every=None, fsync=False)
+    unit_of_work = create_unit_of_work(new_storage, session=session)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="3", owner="owner3")
+        unit_of_work.commit()
+
+    assert set(reload(path)) == {"0", "1", "3"}
+
+
+def test_record_with_wrong_checksum_is_removed(path, storage):
+    unit_of_work = create_unit_of_work(storage)
+
+    for i in range(2):
+        with unit_of_work:
+            unit_of_work.repository.save(id=str(i), owner=f"owner{i}")
+            unit_of_work.commit()
+
+    with open(storage.log_path, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        last_byte = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last_byte[0] ^ 0xFF]))
+
+    assert set(reload(path)) == {"0"}
+
+
+def test_snapshot_and_log_are_loaded_together(path):
+    storage = InternalStorage(str(path), snapshot_every=2, fsync=False)
+    unit_of_work = create_unit_of_work(storage)
+
+    for i in range(5):
+        with unit_of_work:
+            unit_of_work.repository.save(id=str(i), owner=f"owner{i}", balance=i)
+            unit_of_work.commit()
+
+    assert storage.log_records == 1
+    assert reload(path) == unit_of_work.repository.session
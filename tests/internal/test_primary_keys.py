@@ -0,0 +1,69 @@
+import pytest
+
+from assimilator.core.database import BaseModel, NotFoundError, filter_
+from assimilator.internal.database import InternalRepository, InternalUnitOfWork, get_primary_keys
+
+
+class User(BaseModel):
+    username: str
+    age: int
+
+
+class UnscannedSession(dict):
+    """Session that fails if the models are found by checking all of them."""
+
+    def values(self):
+        raise AssertionError("session was scanned")
+
+    def __iter__(self):
+        raise AssertionError("session was scanned")
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=UnscannedSession(), model=User)
+
+    for i in range(10):
+        repository.save(id=str(i), username=f"user{i}", age=20 + i)
+
+    return repository
+
+
+def test_models_are_found_by_their_keys(repository):
+    specs = repository.specs
+
+    assert repository.get(specs.filter(id="3")).username == "user3"
+    assert [user.id for user in repository.filter(specs.filter(id__in=["5", "missing", "1"]))] == ["5", "1"]
+    assert [user.id for user in repository.filter(specs.filter(id__in=["5", "1"], age__gt=22))] == ["5"]
+    assert repository.count(specs.filter(id__in=["1", "2", "2"])) == 2
+
+    with pytest.raises(NotFoundError):
+        repository.get(specs.filter(id="missing"))
+
+
+def test_keys_of_many_filters_are_intersected(repository):
+    specifications = (repository.specs.filter(id__in=["1", "2", "3"]), repository.specs.filter(id__in=["3", "4"]))
+
+    assert get_primary_keys(*specifications) == ["3"]
+    assert [user.id for user in repository.filter(*specifications)] == ["3"]
+
+
+def test_unit_of_work_finds_the_new_models_by_their_keys(repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="new", username="new", age=1)
+        assert unit_of_work.repository.get(unit_of_work.repository.specs.filter(id="new")).username == "new"
+        unit_of_work.commit()
+
+    assert repository.get(repository.specs.filter(id="new")).age == 1
+
+
+def test_keys_of_adaptive_filters(repository):
+    specs = repository.specs
+
+    assert get_primary_keys(filter_(id="1")) == ["1"]
+    assert get_primary_keys(filter_(id__in=["1", "2"]) & specs.filter(id__in=["2", "3"])) == ["2"]
+    assert get_primary_keys(filter_(id="1") | filter_(id="2")) == ["1", "2"]
+    assert get_primary_keys(filter_(id="1") | filter_(age=20)) is None
+    assert get_primary_keys(filter_(age=20) & filter_(id="1"), specs.filter(id__in=["1", "5"])) == ["1"]
@@ -0,0 +1,96 @@
+import uuid
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, SharedMemoryPublisher, SharedMemorySession, shared
+
+
+class City(BaseModel):
+    name: str
+    population: int
+
+
+def create_cities(*names: str) -> dict:
+    return {name: City(id=name, name=name, population=len(name)) for name in names}
+
+
+@pytest.fixture()
+def publisher():
+    publisher = SharedMemoryPublisher(name=f"test-{uuid.uuid4().hex[:12]}")
+    yield publisher
+    publisher.close()
+
+
+def test_models_are_read_from_the_published_snapshot(publisher):
+    publisher.publish(create_cities("paris", "rome", "oslo"))
+    session = SharedMemorySession(name=publisher.name)
+    repository = InternalRepository(session=session, model=City)
+
+    assert session["rome"] == create_cities("rome")["rome"]
+    assert [model.id for model in repository.filter(repository.specs.filter(population=4))] == ["rome", "oslo"]
+
+    publisher.publish(create_cities("paris"))
+    assert repository.count() == 1
+
+
+def test_found_models_are_loaded_from_the_same_snapshot(publisher):
+    publisher.publish(create_cities("paris", "rome"))
+    session = SharedMemorySession(name=publisher.name)
+
+    assert "rome" in session
+    publisher.publish(create_cities("paris"))
+
+    assert session["rome"].name == "rome"
+    assert [model.id for model in session.get_models(["paris", "rome"])] == ["paris", "rome"]
+
+    assert "rome" not in session
+    assert [model.id for model in session.get_models(["paris", "rome"])] == ["paris"]
+
+
+def test_new_models_are_found_by_key(publisher):
+    publisher.publish(create_cities("paris"))
+    session = SharedMemorySession(name=publisher.name)
+    assert len(session) == 1
+
+    publisher.publish(create_cities("paris", "rome"))
+    assert session["rome"].name == "rome"
+
+
+def test_restarted_publisher_removes_the_previous_snapshot():
+    name = f"test-{uuid.uuid4().hex[:12]}"
+    SharedMemoryPublisher(name=name).publish(create_cities("paris"))  # publisher stops without close()
+    publisher = SharedMemoryPublisher(name=name)
+
+    try:
+        assert publisher.publish(create_cities("rome")) == 2
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=f"{name}-1")
+
+        assert list(SharedMemorySession(name=name)) == ["rome"]
+    finally:
+        publisher.close()
+
+
+@pytest.mark.parametrize("same_hashes", [False, True])
+def test_keys_are_found_in_the_table_of_the_snapshot(monkeypatch, publisher, same_hashes):
+    if same_hashes:  # keys with the same hash are told apart by the keys themselves
+        monkeypatch.setattr(shared, "_hash_key", lambda encoded_key: 7)
+
+    keys = [*(f"city{i}" for i in range(50)), 3, (1, "a")]
+    publisher.publish({key: City(id=str(key), name=str(key), population=i) for i, key in enumerate(keys)})
+    session = SharedMemorySession(name=publisher.name)
+
+    assert list(session) == keys
+    assert [session[key].population for key in reversed(keys)] == list(reversed(range(len(keys))))
+    assert "missing" not in session and (1, "b") not in session
+    assert [model.name for model in session.get_models(["city7", "missing", 3])] == ["city7", "3"]
+
+    with pytest.raises(KeyError):
+        session["missing"]
+
+    publisher.publish({})
+    assert len(session) == 0
+    assert "city7" not in session
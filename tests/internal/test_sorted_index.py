@@ -0,0 +1,109 @@
+import operator
+import random
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession, SortedIndex, SortedKeyList
+from assimilator.internal.database.views import MaterializedView
+
+
+class Score(BaseModel):
+    score: int
+
+    class AssimilatorConfig:
+        indexes = {"score": SortedIndex}  # noqa: RUF012
+
+
+def create_models(repository: InternalRepository) -> None:
+    generator = random.Random(3)
+    models = [repository.save(score=generator.randrange(5)) for _ in range(200)]
+
+    for model in generator.sample(models, 50):
+        model.score = generator.randrange(5)
+        repository.update(model)
+
+    for model in generator.sample(models, 30):
+        repository.delete(model)
+
+
+def expected_ids(session, reverse: bool) -> list:
+    return [model.id for model in sorted(session.values(), key=lambda model: model.score, reverse=reverse)]
+
+
+@pytest.mark.parametrize("load", [2, 4, SortedKeyList.load])
+def test_sorted_key_list_matches_sorted(monkeypatch, load):
+    monkeypatch.setattr(SortedKeyList, "load", load)
+    generator = random.Random(1)
+    sorted_keys, values = SortedKeyList(), {}
+
+    for _ in range(3000):
+        key = generator.randrange(300)
+
+        if key in values and generator.random() < 0.3:
+            sorted_keys.remove(key, values.pop(key))
+            sorted_keys.forget(key)
+            continue
+        elif key in values:
+            sorted_keys.remove(key, values[key])
+
+        values[key] = generator.randrange(20)
+        sorted_keys.add(key, values[key])
+
+    assert len(sorted_keys) == len(values)
+    assert list(sorted_keys) == sorted(values, key=values.get)
+    assert list(reversed(sorted_keys)) == sorted(values, key=values.get, reverse=True)
+
+
+@pytest.mark.parametrize("operation", SortedIndex.operations)
+@pytest.mark.parametrize("value", [-1, 0, 2, 4, 5])
+def test_range_lookup(operation, value):
+    session = InternalSession()
+    repository = InternalRepository(session=session, model=Score)
+    create_models(repository)
+
+    index = session.find_index("score", SortedIndex)
+    expected = [model.id for model in sorted(session.values(), key=lambda model: model.score)]
+
+    assert index.lookup(operation, value) == [key for key in expected if operation(session[key].score, value)]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_sorted_keys_keep_order_of_equal_values(reverse):
+    session = InternalSession()
+    repository = InternalRepository(session=session, model=Score)
+    create_models(repository)
+
+    found = repository.filter(repository.specs.order("-score" if reverse else "score"))
+    assert [model.id for model in found] == expected_ids(session, reverse=reverse)
+
+
+def test_unsortable_values_are_not_used_for_sorting():
+    session = InternalSession()
+    index = session.add_index(SortedIndex("score"))
+    session["a"] = Score.construct(id="a", score=None)
+
+    assert index.sorted_keys() is None
+    assert index.lookup(operator.gt, 1) == ["a"]
+
+
+def test_view_keeps_order_of_equal_values():
+    session = InternalSession()
+    session.add_view(MaterializedView("top", order=("-score",)))
+    create_models(InternalRepository(session=session, model=Score))
+
+    found = session.find_view("top").query(session)
+    assert [model.id for model in found] == expected_ids(session, reverse=True)
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_columnar_session_keeps_order_of_equal_values(reverse):
+    pytest.importorskip("numpy")
+    from assimilator.internal.database.columnar import ColumnarSession
+
+    session = ColumnarSession(Score)
+    repository = InternalRepository(session=session, model=Score)
+    create_models(repository)
+
+    found = repository.filter(repository.specs.order("-score" if reverse else "score"))
+    assert [model.id for model in found] == expected_ids(session, reverse=reverse)
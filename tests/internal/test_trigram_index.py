@@ -0,0 +1,59 @@
+import re
+
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import InternalRepository, InternalSession, TrigramIndex, match_regex
+from assimilator.internal.database.indexes import find_required_literals
+
+
+class Article(BaseModel):
+    title: str
+
+    class AssimilatorConfig:
+        indexes = {"title": TrigramIndex}  # noqa: RUF012
+
+
+TITLES = ["hello world", "world peace", "say hello", "Hello there", "nothing"]
+
+
+@pytest.fixture()
+def repository():
+    repository = InternalRepository(session=InternalSession(), model=Article)
+
+    for i, title in enumerate(TITLES):
+        repository.save(id=str(i), title=title)
+
+    return repository
+
+
+@pytest.mark.parametrize(
+    ("pattern", "literals"),
+    [
+        ("hello", ["hello"]),
+        ("^hello.*world$", ["hello", "world"]),
+        ("he(llo|y)", []),
+        ("(?i)hello", []),
+    ],
+)
+def test_required_literals(pattern, literals):
+    assert find_required_literals(re.compile(pattern)) == literals
+
+
+def test_index_finds_candidates(repository):
+    index = repository.session.find_index("title", TrigramIndex)
+    assert sorted(index.lookup(match_regex, re.compile("hello"))) == ["0", "2"]
+    assert index.lookup(match_regex, re.compile("he")) is None
+
+
+@pytest.mark.parametrize(
+    "specification",
+    [{"title__like": "%hello%"}, {"title__regex": "world"}, {"title__regex": ".*o w"}, {"title__like": "%ello%th%"}],
+)
+def test_filters_give_the_same_results_as_without_index(repository, specification):
+    unindexed_repository = InternalRepository(session=dict(repository.session), model=Article)
+
+    found = repository.filter(repository.specs.filter(**specification))
+    expected = unindexed_repository.filter(unindexed_repository.specs.filter(**specification))
+    assert sorted(model.id for model in found) == sorted(model.id for model in expected)
+    assert found
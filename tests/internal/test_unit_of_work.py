@@ -0,0 +1,121 @@
+import pytest
+
+from assimilator.core.database import BaseModel
+from assimilator.internal.database import (
+    InternalRepository,
+    InternalSession,
+    InternalTransaction,
+    InternalUnitOfWork,
+    SortedIndex,
+)
+
+
+class Product(BaseModel):
+    name: str
+    price: int = 0
+
+    class AssimilatorConfig:
+        indexes = {"price": SortedIndex}  # noqa: RUF012
+
+
+class CountingSession(InternalSession):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = []
+
+    def __setitem__(self, key, model):
+        self.writes.append(key)
+        super().__setitem__(key, model)
+
+
+@pytest.fixture()
+def session():
+    return CountingSession()
+
+
+@pytest.fixture()
+def repository(session):
+    repository = InternalRepository(session=session, model=Product)
+
+    for i in range(10):
+        repository.save(id=str(i), name=f"product{i}", price=i % 3)
+
+    session.writes.clear()
+    return repository
+
+
+def test_read_models_are_not_written_back(session, repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        assert len(unit_of_work.repository.filter()) == 10
+        unit_of_work.repository.save(id="new", name="new")
+        unit_of_work.commit()
+
+    assert session.writes == ["new"]
+
+
+def test_changed_copies_are_committed(session, repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.get(unit_of_work.repository.specs.filter(id="1")).name = "changed"
+        assert session["1"].name == "product1"
+        unit_of_work.commit()
+
+    assert session.writes == ["1"]
+    assert session["1"].name == "changed"
+
+
+def test_saved_model_is_committed_even_if_it_is_the_same_object(session, repository):
+    model = repository.get(repository.specs.filter(id="2"))
+    model.price = 100
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(model)
+        unit_of_work.commit()
+
+    assert session.writes == ["2"]
+    assert [model.id for model in repository.filter(repository.specs.filter(price__gt=50))] == ["2"]
+
+
+def test_changes_are_discarded_on_rollback(session, repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with pytest.raises(RuntimeError), unit_of_work:
+        unit_of_work.repository.delete(unit_of_work.repository.specs.filter(id="3"))
+        raise RuntimeError("rollback")
+
+    assert "3" in session
+    assert not session.writes
+
+
+def test_sorted_index_is_used_until_indexed_field_changes(session, repository):
+    transaction = InternalTransaction(session)
+    transaction.checkout("1").name = "changed"
+    assert transaction.find_sorted_keys("price") is not None
+
+    transaction.checkout("2").price = 100
+    assert transaction.find_sorted_keys("price") is None
+
+
+def test_sorted_index_is_not_used_with_new_or_deleted_models(session, repository):
+    transaction = InternalTransaction(session)
+    transaction["new"] = Product(id="new", name="new")
+    assert transaction.find_sorted_keys("price") is None
+
+    transaction.rollback()
+    del transaction["1"]
+    assert transaction.find_sorted_keys("price") is None
+
+
+def test_order_in_transaction_sees_changed_copies(repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.get(unit_of_work.repository.specs.filter(id="0")).name = "changed"
+        found = unit_of_work.repository.filter(unit_of_work.repository.specs.order("-price"))
+
+        assert [model.id for model in found] == ["2", "5", "8", "1", "4", "7", "0", "3", "6", "9"]
+        assert found[6].name == "changed"
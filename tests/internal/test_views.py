@@ -0,0 +1,79 @@
+import pytest
+
+from assimilator.core.database import BaseModel, NotFoundError
+from assimilator.internal.database import (
+    InternalRepository,
+    InternalSession,
+    InternalUnitOfWork,
+    MaterializedView,
+    internal_filter,
+)
+
+
+class Player(BaseModel):
+    username: str
+    age: int
+    score: int
+
+
+def expected_players(session) -> list:
+    adults = [model for model in session.values() if model.age >= 18]
+    adults.sort(key=lambda model: model.username)
+    adults.sort(key=lambda model: model.score, reverse=True)
+    return [model.id for model in adults]
+
+
+@pytest.fixture()
+def session():
+    session = InternalSession()
+    session.add_view(MaterializedView("top_adults", internal_filter(age__gte=18), order=("-score", "username")))
+    return session
+
+
+@pytest.fixture()
+def repository(session):
+    repository = InternalRepository(session=session, model=Player)
+
+    for i in range(30):
+        repository.save(id=str(i), username=f"player{i % 7}", age=10 + i, score=i % 5)
+
+    return repository
+
+
+def test_view_is_updated_with_the_session(session, repository):
+    assert [model.id for model in repository.view("top_adults")] == expected_players(session)
+
+    model = repository.get(repository.specs.filter(id="20"))
+    model.score = 100
+    repository.update(model)
+    repository.delete(repository.get(repository.specs.filter(id="21")))
+    repository.update(repository.specs.filter(id="0"), age=50)
+
+    found = [model.id for model in repository.view("top_adults")]
+    assert found == expected_players(session)
+    assert found[0] == "20"
+    assert "21" not in found
+    assert "0" in found
+
+
+def test_specifications_are_applied_to_the_view(session, repository):
+    found = repository.view("top_adults", repository.specs.paginate(limit=3))
+    assert [model.id for model in found] == expected_players(session)[:3]
+
+
+def test_view_in_unit_of_work_sees_the_changes(session, repository):
+    unit_of_work = InternalUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="new", username="new", age=30, score=1000)
+        assert unit_of_work.repository.view("top_adults")[0].id == "new"
+        view_keys = session.find_view("top_adults").keys()  # view of the session is changed after commit()
+        assert "new" not in view_keys
+        unit_of_work.commit()
+
+    assert repository.view("top_adults")[0].id == "new"
+
+
+def test_missing_view_raises_not_found(repository):
+    with pytest.raises(NotFoundError):
+        repository.view("missing")
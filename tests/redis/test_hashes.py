@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from assimilator.redis_.database import RedisModel, RedisRepository
+
+
+class Article(RedisModel):
+    title: str
+    text: str
+    views: int = 0
+
+
+class PrefixedArticle(RedisModel):
+    title: str
+    text: str
+    views: int = 0
+
+    class AssimilatorConfig:
+        key_prefix = "articles"
+        use_hashes = True
+
+
+@pytest.fixture(params=[Article, PrefixedArticle], ids=["without_prefix", "with_prefix"])
+def repository(request):
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    repository = RedisRepository(session=session, model=request.param, use_hashes=True)
+
+    for i in range(5):
+        repository.save(id=str(i), title=f"title{i}", text="long text" * 100, views=i)
+
+    return repository
+
+
+def test_models_are_saved_as_hashes(repository):
+    key = repository._get_key("1")
+
+    assert repository.session.type(key) == b"hash"
+    assert json.loads(repository.session.hget(key, "title")) == "title1"
+    assert repository.get(repository.specs.filter(id="1")) == repository.model(
+        id="1", title="title1", text="long text" * 100, views=1
+    )
+
+
+def test_only_loads_the_requested_fields(repository, monkeypatch):
+    loaded_fields = []
+    get_hashes = repository._get_hashes
+
+    def record_fields(keys, fields=None):
+        loaded_fields.append(fields)
+        return get_hashes(keys, fields)
+
+    monkeypatch.setattr(repository, "_get_hashes", record_fields)
+    specs = repository.specs
+
+    articles = repository.filter(specs.filter(id__in=["1", "2"]), specs.only("title"))
+    assert loaded_fields == [["id", "title"]]
+    assert [(article.id, article.title) for article in articles] == [("1", "title1"), ("2", "title2")]
+    assert articles[0].__fields_set__ == {"id", "title"}
+
+    repository.filter(specs.filter(id="3", views__gt=1), specs.only("title"))
+    assert loaded_fields[-1] == ["id", "title", "views"]  # fields of the filters are loaded too
+
+
+def test_update_only_writes_the_changed_fields(repository):
+    key = repository._get_key("2")
+    repository.session.hset(key, "text", json.dumps("changed by another client"))
+
+    repository.update(repository.specs.filter(id__in=["2", "3"]), views=100)
+
+    assert json.loads(repository.session.hget(key, "views")) == 100
+    assert json.loads(repository.session.hget(key, "text")) == "changed by another client"
+    assert repository.get(repository.specs.filter(id="3")).views == 100
+    assert repository.get(repository.specs.filter(id="4")).views == 4
+
+
+def test_only_create_and_only_update(repository):
+    specs = repository.specs
+
+    repository.save(repository.model(id="1", title="new", text="", only_create=True))
+    repository.save(repository.model(id="missing", title="new", text="", only_update=True))
+
+    assert repository.get(specs.filter(id="1")).title == "title1"
+    assert repository.filter(specs.filter(id="missing")) == []
+
+
+def test_expiration(repository):
+    key = repository._get_key("new")
+    repository.save(repository.model(id="new", title="new", text="", expire_in=100))
+    assert 0 < repository.session.ttl(key) <= 100
+
+    repository.update(repository.specs.filter(id="new"), views=1)
+    assert 0 < repository.session.ttl(key) <= 100
+
+    repository.save(repository.model(id="new", title="kept", text="", keep_ttl=True))
+    assert 0 < repository.session.ttl(key) <= 100
+
+    repository.save(repository.model(id="new", title="persisted", text=""))
+    assert repository.session.ttl(key) == -1
+    assert repository.get(repository.specs.filter(id="new")).title == "persisted"
@@ -0,0 +1,160 @@
+import time
+from datetime import datetime
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.crc import key_slot
+
+from assimilator.internal.database import HashIndex, SortedIndex
+from assimilator.redis_.database import RedisModel, RedisRepository, RedisUnitOfWork
+
+
+class Book(RedisModel):
+    title: str
+    price: float
+    published: datetime = datetime(2024, 1, 1)
+
+    class AssimilatorConfig:
+        key_prefix = "books"
+        indexes = {"title": HashIndex, "price": SortedIndex}  # noqa: RUF012
+
+
+class PricedBook(RedisModel):
+    title: str
+    price: float
+
+    class AssimilatorConfig:
+        key_prefix = "books"
+        indexes = ("title", "price")
+
+
+class HashBook(Book):
+    class AssimilatorConfig:
+        key_prefix = "books"
+        use_hashes = True
+        indexes = {"title": HashIndex, "price": SortedIndex}  # noqa: RUF012
+
+
+@pytest.fixture()
+def session():
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    return session
+
+
+def create_repository(session, model) -> RedisRepository:
+    repository = RedisRepository(session=session, model=model)
+
+    for i in range(10):
+        repository.save(id=str(i), title=f"title{i % 3}", price=i)
+
+    return repository
+
+
+def find_ids(repository: RedisRepository, **filters) -> list:
+    return sorted(model.id for model in repository.filter(repository.specs.filter(**filters)))
+
+
+def test_query_values_are_validated_with_the_field(session):
+    repository = create_repository(session, PricedBook)
+
+    assert session.smembers("books.hash:price:4.0") == {b"4"}
+    assert find_ids(repository, price=4) == ["4"]
+    assert find_ids(repository, price="not a number") == []
+
+
+@pytest.mark.parametrize("model", [Book, HashBook])
+def test_sorted_index_finds_ranges(session, model):
+    repository = create_repository(session, model)
+
+    assert find_ids(repository, price__gt=6) == ["7", "8", "9"]
+    assert find_ids(repository, price__lte=1, title="title1") == ["1"]
+    assert repository.count(repository.specs.filter(price__gte=5)) == 5
+
+
+def test_saving_the_model_twice_in_unit_of_work(session):
+    repository = create_repository(session, Book)
+    unit_of_work = RedisUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(id="new", title="first", price=1)
+        unit_of_work.repository.save(id="new", title="second", price=1)
+        unit_of_work.commit()
+
+    assert session.smembers('books.hash:title:"first"') == set()
+    assert find_ids(repository, title="second") == ["new"]
+
+
+@pytest.mark.parametrize("model", [Book, HashBook])
+def test_indexes_are_changed_with_the_models(session, model):
+    repository = create_repository(session, model)
+
+    repository.update(repository.specs.filter(title="title0"), title="changed")
+    assert find_ids(repository, title="changed") == ["0", "3", "6", "9"]
+    assert find_ids(repository, title="title0") == []
+
+    repository.delete(repository.get(repository.specs.filter(id="3")))
+    assert find_ids(repository, title="changed") == ["0", "6", "9"]
+    assert session.zscore("books.sorted:price", "3") is None
+
+
+def test_skipped_saves_do_not_change_the_indexes(session):
+    repository = create_repository(session, Book)
+
+    repository.save(Book(id="0", title="other", price=0, only_create=True))
+    repository.save(Book(id="new", title="other", price=0, only_update=True))
+    assert find_ids(repository, title="other") == []
+
+
+def test_expired_models_are_removed_from_the_indexes(session):
+    repository = create_repository(session, Book)
+    repository.save(Book(id="short", title="title0", price=100, expire_in_px=50))
+
+    time.sleep(0.1)
+    assert repository.count() == 10
+    assert session.sismember('books.hash:title:"title0"', "short")  # count() does not change the indexes
+
+    assert repository.remove_expired() == 1
+    assert repository.count() == 10
+    assert not session.sismember('books.hash:title:"title0"', "short")
+    assert session.zscore("books.sorted:price", "short") is None
+
+
+def test_indexes_are_created_again(session):
+    repository = create_repository(session, Book)
+    session.delete('books.hash:title:"title1"', "books.hash:title")
+
+    repository.reindex()
+    assert find_ids(repository, title="title1") == ["1", "4", "7"]
+
+
+def test_keys_share_the_hash_tag_of_the_prefix(session, monkeypatch):
+    repository = RedisRepository(session=session, model=Book, key_prefix="{books}")
+    declared_keys = set()
+
+    def record_keys(script):
+        def run_script(keys, args, client=None):
+            declared_keys.update(keys)
+            return script(keys=keys, args=args, client=client)
+
+        return run_script
+
+    for name in ("_save_script", "_delete_script", "_expire_script"):
+        monkeypatch.setattr(repository, name, record_keys(getattr(repository, name)))
+
+    for i in range(5):
+        repository.save(id=str(i), title=f"title{i % 2}", price=i)
+
+    repository.save(Book(id="short", title="title0", price=10, expire_in_px=50))
+    repository.update(repository.specs.filter(id="1"), title="changed")
+    repository.delete(repository.specs.filter(id="2"))
+    time.sleep(0.1)
+    assert repository.remove_expired() == 1
+
+    assert {key_slot(key) for key in session.keys("*")} == {key_slot(b"{books}")}
+    assert {"{books}", "{books}.expiration", "{books}:1", "{books}:2", "{books}.sorted:price:unindexed"} < declared_keys
+    assert {'{books}.hash:title:"changed"', '{books}.hash:title:"title0"'} < declared_keys
+    assert find_ids(repository, title="title1") == ["3"]
+    assert repository.count() == 4
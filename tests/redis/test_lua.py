@@ -0,0 +1,83 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from assimilator.redis_.database import RedisModel, RedisRepository
+from assimilator.redis_.database.lua import compile_query
+
+
+class Player(RedisModel):
+    username: str
+    score: int
+
+    class AssimilatorConfig:
+        key_prefix = "players"
+
+
+class HashPlayer(Player):
+    class AssimilatorConfig:
+        key_prefix = "players"
+        use_hashes = True
+
+
+class UnprefixedPlayer(RedisModel):
+    username: str
+    score: int
+
+
+USERNAMES = ["alice", "Bob", "zoe", "émile", "ann", "z", "alice2"]
+
+
+@pytest.fixture()
+def session():
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    return session
+
+
+@pytest.fixture(params=[Player, HashPlayer], ids=["strings", "hashes"])
+def repositories(request, session):
+    repository = RedisRepository(session=session, model=request.param, use_lua=True)
+    python_repository = RedisRepository(session=session, model=request.param)
+
+    for i, username in enumerate(USERNAMES):
+        repository.save(id=str(i), username=username, score=i * 10)
+
+    return repository, python_repository
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"username__gt": "b"},
+        {"username__lte": "z"},
+        {"username__lt": "émile", "score__gte": 20},
+        {"username__like": "a%"},
+        {"score": 30},
+    ],
+)
+def test_script_finds_the_same_models_as_python(repositories, filters):
+    repository, python_repository = repositories
+
+    found = repository.filter(repository.specs.filter(**filters))
+    expected = python_repository.filter(python_repository.specs.filter(**filters))
+    assert sorted(model.id for model in found) == sorted(model.id for model in expected)
+    assert repository.count(repository.specs.filter(**filters)) == len(expected)
+
+
+def test_paginate_must_be_the_last_specification(repositories):
+    repository, python_repository = repositories
+    specifications = (repository.specs.paginate(limit=3), repository.specs.filter(score__gte=30))
+
+    assert compile_query(repository.model, specifications) is None
+    assert compile_query(repository.model, specifications[::-1]) is not None
+    assert len(repository.filter(*specifications)) == len(python_repository.filter(*specifications))
+
+
+def test_script_is_not_used_without_the_key_prefix(session):
+    session.sadd("other", "value")
+    session.hset("other_hash", "field", "value")
+    repository = RedisRepository(session=session, model=UnprefixedPlayer, use_lua=True)
+    repository.save(id="player", username="player", score=1)
+
+    assert [model.id for model in repository.filter(repository.specs.filter(score=1))] == ["player"]
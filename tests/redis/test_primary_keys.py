@@ -0,0 +1,53 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from assimilator.core.database import NotFoundError, filter_
+from assimilator.redis_.database import RedisModel, RedisRepository
+
+
+class User(RedisModel):
+    username: str
+    age: int
+
+
+def fail_scan(*args, **kwargs):
+    raise AssertionError("keys were scanned")
+
+
+@pytest.fixture(params=[None, "users"], ids=["without_prefix", "with_prefix"])
+def repository(request, monkeypatch):
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    repository = RedisRepository(session=session, model=User, key_prefix=request.param)
+
+    for i in range(10):
+        repository.save(id=str(i), username=f"user{i}", age=20 + i)
+
+    for method in ("scan_iter", "sscan_iter", "keys"):
+        monkeypatch.setattr(session, method, fail_scan)
+
+    return repository
+
+
+def test_models_are_loaded_by_their_ids(repository):
+    specs = repository.specs
+
+    assert repository.get(specs.filter(id="3")).username == "user3"
+    assert [user.id for user in repository.filter(specs.filter(id__in=["5", "missing", "1"]))] == ["5", "1"]
+    assert [user.id for user in repository.filter(specs.filter(id__in=["5", "1"], age__gt=22))] == ["5"]
+    assert repository.count(specs.filter(id__in=["1", "2"])) == 2
+
+    with pytest.raises(NotFoundError):
+        repository.get(specs.filter(id="missing"))
+
+
+def test_adaptive_filters_are_loaded_by_their_ids(repository):
+    specs = repository.specs
+
+    assert repository.get(filter_(id="3")).username == "user3"
+    assert [user.id for user in repository.filter(filter_(id__in=["5", "1"], age__gt=22))] == ["5"]
+    assert [user.id for user in repository.filter(filter_(id="2") | filter_(id__in=["7", "missing"]))] == ["2", "7"]
+    assert [user.id for user in repository.filter(filter_(id__in=["2", "4"]) & specs.filter(age__gt=22))] == ["4"]
+    assert [user.id for user in repository.filter(filter_(age__gt=22) & filter_(id__in=["1", "8"]))] == ["8"]
+    assert repository.count(filter_(id__in=["1", "2"])) == 2
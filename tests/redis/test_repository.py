@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.crc import key_slot
+
+from assimilator.redis_.database import RedisModel, RedisRepository, RedisUnitOfWork
+
+
+class Product(RedisModel):
+    name: str
+    price: float = 0
+
+    class AssimilatorConfig:
+        key_prefix = "products"
+
+
+class HashProduct(Product):
+    class AssimilatorConfig:
+        key_prefix = "products"
+        use_hashes = True
+
+
+@pytest.fixture()
+def session():
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    return session
+
+
+@pytest.fixture(params=[Product, HashProduct], ids=["strings", "hashes"])
+def repository(request, session):
+    return RedisRepository(session=session, model=request.param)
+
+
+def test_models_are_found_in_the_set_of_the_ids(repository):
+    for i in range(5):
+        repository.save(id=str(i), name=f"product{i}")
+
+    assert repository.count() == 5
+    assert sorted(model.id for model in repository.filter()) == ["0", "1", "2", "3", "4"]
+
+    repository.delete(repository.get(repository.specs.filter(id="3")))
+    assert repository.count() == 4
+
+
+def test_skipped_saves_do_not_add_the_ids(session, repository):
+    repository.save(repository.model(id="new", name="new", only_update=True))
+    assert repository.count() == 0
+    assert not session.exists("products:new")
+
+    repository.save(id="old", name="old")
+    repository.save(repository.model(id="old", name="changed", only_create=True))
+    assert repository.get(repository.specs.filter(id="old")).name == "old"
+    assert repository.count() == 1
+
+
+def test_skipped_saves_in_unit_of_work(repository):
+    unit_of_work = RedisUnitOfWork(repository)
+
+    with unit_of_work:
+        unit_of_work.repository.save(unit_of_work.repository.model(id="new", name="new", only_update=True))
+        unit_of_work.repository.save(id="other", name="other")
+        unit_of_work.commit()
+
+    assert repository.count() == 1
+
+
+def test_expired_models_are_not_counted(session, repository):
+    repository.save(repository.model(id="short", name="short", expire_in_px=50))
+    repository.save(repository.model(id="long", name="long", expire_in=100))
+    repository.save(id="forever", name="forever")
+    assert repository.count() == 3
+
+    time.sleep(0.1)
+    assert repository.count() == 2
+    assert session.scard("products") == 3  # count() only reads
+
+    assert repository.remove_expired() == 1
+    assert repository.remove_expired() == 0
+    assert repository.count() == 2
+    assert session.zrange("products.expiration", 0, -1) == [b"long"]
+
+    repository.save(id="long", name="long")  # saved again without expiration
+    assert session.zcard("products.expiration") == 0
+
+
+def test_count_does_not_run_the_scripts(session, repository, monkeypatch):
+    repository.save(repository.model(id="short", name="short", expire_in_px=50))
+    repository.save(id="forever", name="forever")
+    time.sleep(0.1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("count() ran a script")
+
+    monkeypatch.setattr(session, "evalsha", fail)
+    monkeypatch.setattr(session, "eval", fail)
+    assert repository.count() == 1
+
+
+def test_update_does_not_add_deleted_models(session, repository):
+    repository.save(id="1", name="one")
+    repository.save(id="2", name="two")
+    models = repository.filter()
+    session.delete("products:2")
+
+    for model in models:
+        model.name = "changed"
+        repository.update(model)
+
+    assert [model.name for model in repository.filter()] == ["changed"]
+    assert repository.count() == 1
+
+
+def test_update_with_specifications(repository):
+    repository.save(id="1", name="one", price=1)
+    repository.save(id="2", name="two", price=2)
+
+    repository.update(repository.specs.filter(price__gt=1), name="expensive")
+    assert sorted(model.name for model in repository.filter()) == ["expensive", "one"]
+
+
+@pytest.mark.parametrize("model", [Product, HashProduct])
+def test_keys_share_the_hash_tag_of_the_prefix(session, model):
+    repository = RedisRepository(session=session, model=model, key_prefix="{products}")
+
+    for i in range(5):
+        repository.save(id=str(i), name=f"product{i}")
+
+    repository.save(model(id="short", name="short", expire_in_px=50))
+    repository.delete(repository.specs.filter(id="2"))
+    time.sleep(0.1)
+
+    assert session.exists("{products}:1", "{products}.expiration") == 2
+    assert {key_slot(key) for key in session.keys("*")} == {key_slot(b"{products}")}
+    assert repository.remove_expired() == 1
+    assert repository.count() == 4
@@ -0,0 +1,52 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from assimilator.redis_.database import RedisModel, RedisRepository
+
+
+class User(RedisModel):
+    username: str
+    age: int
+
+
+@pytest.fixture(params=[False, True], ids=["scan", "keys_command"])
+def repository(request):
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    repository = RedisRepository(session=session, model=User, scan_count=3, use_keys_command=request.param)
+
+    for i in range(20):
+        repository.save(id=str(i), username=f"user{i}", age=20 + i)
+
+    return repository
+
+
+def test_all_the_keys_are_found_in_chunks(repository):
+    specs = repository.specs
+    users = repository.filter()
+
+    assert sorted(user.id for user in users) == sorted(str(i) for i in range(20))
+    assert repository.count() == 20
+    assert sorted(user.id for user in repository.filter(specs.filter(age__gt=30))) == [str(i) for i in range(11, 20)]
+    assert repository.count(specs.filter(username__like="user1%")) == 11
+
+    chunks = list(repository._scan_keys("*"))
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 20
+
+
+def test_keys_found_twice_are_loaded_once(monkeypatch):
+    session = fakeredis.FakeRedis()
+    session.flushall()
+    repository = RedisRepository(session=session, model=User, scan_count=4)
+
+    for i in range(5):
+        repository.save(id=str(i), username=f"user{i}", age=i)
+
+    scan_iter = session.scan_iter
+    monkeypatch.setattr(session, "scan_iter", lambda *args, **kwargs: [*scan_iter(*args, **kwargs)] * 2)
+
+    assert sorted(user.id for user in repository.filter()) == ["0", "1", "2", "3", "4"]
+    assert repository.count(repository.specs.filter(age__gte=0)) == 5
+    assert repository.count(repository.specs.filter(id__like="%")) == 5